@@ -57,7 +57,8 @@ to an index with a single line of code using SimpleITK:
 """
 
 
-def Point2Index(Point, Origin, Directions, Spacings, Rounding=True):
+def Point2Index(Point, Origin=None, Directions=None, Spacings=None, 
+                Rounding=True, Geometry=None):
     """
     Convert a physical point (in Patient Coordinate System (PCS)) to an index
     (in Image Coordinate System (ICS).
@@ -88,6 +89,11 @@ def Point2Index(Point, Origin, Directions, Spacings, Rounding=True):
     Rounding : boolean (optional; True by default)
         If True, the integers in Index will be rounded to the nearest integers.
     
+    Geometry : SeriesGeometry (optional; None by default)
+        The geometry of the DICOM series (see ImageTools.GetSeriesGeometry()).
+        If provided, Origin, Directions and Spacings are not required and 
+        the precomputed affine matrices are used.
+    
         
     Ouputs:
     ------
@@ -167,6 +173,9 @@ def Point2Index(Point, Origin, Directions, Spacings, Rounding=True):
         k = Vz/dk
     """
     
+    if Geometry is not None:
+        return Pts2Inds([Point], Rounding=Rounding, Geometry=Geometry)[0].tolist()
+    
     # Define S, X, Y and Z:
     S = Origin # the origin
     
@@ -234,7 +243,207 @@ def Point2Index(Point, Origin, Directions, Spacings, Rounding=True):
 
 
 
-def Contour2Indices(Points, Origin, Directions, Spacings, Rounding=True):
+def GetInd2PtAffine(Origin, Directions, Spacings):
+    """
+    Get the 4x4 affine matrix that maps (homogeneous) indices in the Image
+    Coordinate System (ICS) to physical points in the Patient Coordinate 
+    System (PCS), and its inverse.
+    
+    Inputs:
+    ------
+    
+    Origin : list of floats
+        A list (for each dimension) of the 3D image origin 
+        (= ImagePositionPatient of the first slice in the DICOM series), 
+        e.g. [x0, y0, z0].
+        
+    Directions : list of floats 
+        List of the direction cosines along x (rows), y (columns) and z 
+        (slices) (= the cross product of the x and y direction cosines from 
+        ImageOrientationPatient appended to ImageOrientationPatient),
+        e.g. [Xx, Xy, Xz, Yx, Yy, Yz, Zx, Zy, Zz].
+        
+    Spacings : list of floats 
+        List (for each dimension) of the pixel spacings along x, y and z, 
+        e.g. [di, dj, dk].
+    
+        
+    Ouputs:
+    ------
+    
+    Affine : Numpy array
+        4x4 array A such that [x, y, z, 1] = A.[i, j, k, 1], i.e.
+        
+            | di*Xx  dj*Yx  dk*Zx  Sx |
+            | di*Xy  dj*Yy  dk*Zy  Sy |
+            | di*Xz  dj*Yz  dk*Zz  Sz |
+            |   0      0      0     1 |
+            
+        (see the equations in Index2Point()).
+        
+    InvAffine : Numpy array
+        4x4 array that maps points in PCS to indices in ICS.
+    """
+    
+    import numpy as np
+    
+    Directions = np.array(Directions, dtype=float)
+    
+    Affine = np.eye(4)
+    
+    # The columns are the direction cosine vectors scaled by the spacings:
+    Affine[:3, 0] = Spacings[0]*Directions[0:3]
+    Affine[:3, 1] = Spacings[1]*Directions[3:6]
+    Affine[:3, 2] = Spacings[2]*Directions[6:9]
+    Affine[:3, 3] = Origin
+    
+    InvAffine = np.linalg.inv(Affine)
+    
+    return Affine, InvAffine
+
+
+
+
+
+
+def Pts2Inds(Points, Origin=None, Directions=None, Spacings=None, 
+             Rounding=True, Geometry=None):
+    """
+    Convert an array of physical points (in Patient Coordinate System (PCS)) 
+    to an array of indices (in Image Coordinate System (ICS)) using a single
+    matrix multiplication.
+    
+    Inputs:
+    ------
+    
+    Points : Numpy array or list of a list of floats
+        N x 3 array of points in the PCS, e.g. [[x0, y0, z0], [x1, y1, z1], 
+        ...].
+        
+    Origin : list of floats
+        A list (for each dimension) of the 3D image origin 
+        (= ImagePositionPatient of the first slice in the DICOM series), 
+        e.g. [x0, y0, z0].
+        
+    Directions : list of floats 
+        List of the direction cosines along x (rows), y (columns) and z 
+        (slices), e.g. [Xx, Xy, Xz, Yx, Yy, Yz, Zx, Zy, Zz].
+        
+    Spacings : list of floats 
+        List (for each dimension) of the pixel spacings along x, y and z, 
+        e.g. [di, dj, dk].
+    
+    Rounding : boolean (optional; True by default)
+        If True, the indices will be rounded to the nearest integers.
+    
+    Geometry : SeriesGeometry (optional; None by default)
+        The geometry of the DICOM series (see ImageTools.GetSeriesGeometry()).
+        If provided, Origin, Directions and Spacings are not required and 
+        the precomputed affine matrices are used.
+    
+        
+    Ouputs:
+    ------
+    
+    Indices : Numpy array
+        N x 3 array (of integers if Rounding = True, floats otherwise) of the
+        indices (in ICS) of Points, e.g. [[i0, j0, k0], [i1, j1, k1], ...].
+        
+    
+    Note:
+    ----
+    
+    The indices are obtained by inverting the full 3x3 system (see 
+    GetInd2PtAffine()), so unlike Point2Index(), which picks out the largest 
+    direction cosines, the result is also correct for coronal and sagittal 
+    stacks.  For (oblique) axial stacks the two agree to within rounding 
+    errors.
+    """
+    
+    import numpy as np
+    
+    Points = np.asarray(Points, dtype=float).reshape(-1, 3)
+    
+    if Geometry is None:
+        Affine, InvAffine = GetInd2PtAffine(Origin, Directions, Spacings)
+    else:
+        InvAffine = Geometry.InvAffine
+    
+    Indices = Points @ InvAffine[:3, :3].T + InvAffine[:3, 3]
+    
+    if Rounding:
+        # Convert fractional indices to integers (np.rint rounds halves to 
+        # even like round() in Point2Index()):
+        Indices = np.rint(Indices).astype(int)
+    
+    return Indices
+
+
+
+
+
+
+def Inds2Pts(Indices, Origin=None, Directions=None, Spacings=None, 
+             Geometry=None):
+    """
+    Convert an array of indices (in Image Coordinate System (ICS)) to an array
+    of physical points (in Patient Coordinate System (PCS)) using a single 
+    matrix multiplication.
+    
+    Inputs:
+    ------
+    
+    Indices : Numpy array or list of a list of integers/floats
+        N x 3 array of indices (in ICS), e.g. [[i0, j0, k0], [i1, j1, k1], 
+        ...].
+        
+    Origin : list of floats
+        A list (for each dimension) of the 3D image origin 
+        (= ImagePositionPatient of the first slice in the DICOM series), 
+        e.g. [x0, y0, z0].
+        
+    Directions : list of floats 
+        List of the direction cosines along x (rows), y (columns) and z 
+        (slices), e.g. [Xx, Xy, Xz, Yx, Yy, Yz, Zx, Zy, Zz].
+        
+    Spacings : list of floats 
+        List (for each dimension) of the pixel spacings along x, y and z, 
+        e.g. [di, dj, dk].
+    
+    Geometry : SeriesGeometry (optional; None by default)
+        The geometry of the DICOM series (see ImageTools.GetSeriesGeometry()).
+        If provided, Origin, Directions and Spacings are not required and 
+        the precomputed affine matrices are used.
+    
+        
+    Ouputs:
+    ------
+    
+    Points : Numpy array
+        N x 3 array of floats of the points in the PCS, 
+        e.g. [[x0, y0, z0], [x1, y1, z1], ...].
+    """
+    
+    import numpy as np
+    
+    Indices = np.asarray(Indices, dtype=float).reshape(-1, 3)
+    
+    if Geometry is None:
+        Affine, InvAffine = GetInd2PtAffine(Origin, Directions, Spacings)
+    else:
+        Affine = Geometry.Affine
+    
+    Points = Indices @ Affine[:3, :3].T + Affine[:3, 3]
+    
+    return Points
+
+
+
+
+
+
+def Contour2Indices(Points, Origin=None, Directions=None, Spacings=None, 
+                    Rounding=True, Geometry=None):
     """
     Convert a list of physical point (in Patient Coordinate System (PCS)) to a
     list of indeces (in Image Coordinate System (ICS).
@@ -266,6 +475,11 @@ def Contour2Indices(Points, Origin, Directions, Spacings, Rounding=True):
     Rounding : boolean (optional; True by default)
         If True, the integers in Index will be rounded to the nearest integers.
     
+    Geometry : SeriesGeometry (optional; None by default)
+        The geometry of the DICOM series (see ImageTools.GetSeriesGeometry()).
+        If provided, Origin, Directions and Spacings are not required and 
+        the precomputed affine matrices are used.
+    
         
     Ouputs:
     ------
@@ -273,13 +487,17 @@ def Contour2Indices(Points, Origin, Directions, Spacings, Rounding=True):
     Indices : list of a list of integers
         List (for each point) of a list (for each dimension) of the indices 
         (in ICS) of Points, e.g. [[i0, j0, k0], [i1, j1, k1], ...].
-    """
+        
+    
+    Note:
+    ----
     
-    Indices = []
+    This is a list wrapper around Pts2Inds(), which converts all points with
+    a single matrix multiplication.
+    """
     
-    for Point in Points:
-        Indices.append(Point2Index(Point, Origin, Directions, Spacings, 
-                                   Rounding))
+    Indices = Pts2Inds(Points, Origin, Directions, Spacings, Rounding, 
+                       Geometry).tolist()
         
     return Indices
 
@@ -310,23 +528,14 @@ def ConvertContourDataToIndices(ContourData, DicomDir):
                       e.g. [[i0, j0, k0], [i1, j1, k1], ...]
     """
     
-    from ImageTools import GetImageAttributes
+    from ImageTools import GetSeriesGeometry
     
-    # Get the image attributes:
-    Size, Spacings, ST, IPPs, Dirs = GetImageAttributes(DicomDir)
+    # Get the (memoised) geometry:
+    Geometry = GetSeriesGeometry(DicomDir)
     
-    # Initialise the array of contour points:
-    Indices = []
-    
-    # Iterate for all contour points in threes:
-    for p in range(0, len(ContourData), 3):
-        # The point in Patient Coordinate System:
-        pt = [ContourData[p], ContourData[p+1], ContourData[p+2]]
-        
-        # Convert pt to Image Coordinate System:
-        ind = Point2Index(pt, IPPs[0], Dirs, Spacings)
-        
-        Indices.append(ind)
+    # Convert all points (in threes) to the Image Coordinate System:
+    Indices = Pts2Inds([float(item) for item in ContourData], 
+                       Geometry=Geometry).tolist()
         
     return Indices
 
@@ -337,7 +546,8 @@ def ConvertContourDataToIndices(ContourData, DicomDir):
 
 
 
-def Index2Point(Index, Origin, Directions, Spacings):
+def Index2Point(Index, Origin=None, Directions=None, Spacings=None, 
+                Geometry=None):
     """
     Convert an index (in Image Coordinate System (ICS)) to a physical point 
     (in Patient Coordinate System (PCS)).
@@ -366,6 +576,11 @@ def Index2Point(Index, Origin, Directions, Spacings):
         z spacing is not the SliceThickness but instead is determined from 
         ImagePositionPatient and ImageOrientationPatient.
     
+    Geometry : SeriesGeometry (optional; None by default)
+        The geometry of the DICOM series (see ImageTools.GetSeriesGeometry()).
+        If provided, Origin, Directions and Spacings are not required and 
+        the precomputed affine matrices are used.
+    
         
     Ouputs:
     ------
@@ -396,6 +611,9 @@ def Index2Point(Index, Origin, Directions, Spacings):
           i, j, and k are the row (x), column (y) and slice (z) indices
     """
     
+    if Geometry is not None:
+        return Inds2Pts([Index], Geometry=Geometry)[0].tolist()
+    
     if False: # 08/12/20
         x = Origin[0] + Index[0]*Spacings[0]*Directions[0] \
                       + Index[0]*Spacings[0]*Directions[1] \
@@ -429,7 +647,8 @@ def Index2Point(Index, Origin, Directions, Spacings):
 
 
 
-def Indices2Points(Indices, Origin, Directions, Spacings):
+def Indices2Points(Indices, Origin=None, Directions=None, Spacings=None, 
+                   Geometry=None):
     """
     Convert a list of indices (in Image Coordinate System (ICS)) to a list of
     physical points (in Patient Coordinate System (PCS)).
@@ -458,6 +677,11 @@ def Indices2Points(Indices, Origin, Directions, Spacings):
         z spacing is not the SliceThickness but instead is determined from 
         ImagePositionPatient and ImageOrientationPatient.
     
+    Geometry : SeriesGeometry (optional; None by default)
+        The geometry of the DICOM series (see ImageTools.GetSeriesGeometry()).
+        If provided, Origin, Directions and Spacings are not required and 
+        the precomputed affine matrices are used.
+    
         
     Ouputs:
     ------
@@ -465,12 +689,16 @@ def Indices2Points(Indices, Origin, Directions, Spacings):
     Points : list of a list of floats
         List (for each point) of a list (for each dimension) of points in the
         PCS, e.g. [[x0, y0, z0], [x1, y1, z1], ...].
-    """
+        
+    
+    Note:
+    ----
     
-    Points = []
+    This is a list wrapper around Inds2Pts(), which converts all indices with
+    a single matrix multiplication.
+    """
     
-    for index in Indices:
-        Points.append(Index2Point(index, Origin, Directions, Spacings))
+    Points = Inds2Pts(Indices, Origin, Directions, Spacings, Geometry).tolist()
         
     return Points
 
@@ -482,6 +710,89 @@ def Indices2Points(Indices, Origin, Directions, Spacings):
 
 
 
+def CntData2Pts(ContourData):
+    """
+    Parse ContourData into an array of [x, y, z] coordinates.
+    
+    Inputs:
+    ------
+    
+    ContourData : list of strings (or floats) or bytes
+        Flat list of [x, y, z] coordinates, e.g. the value of the ContourData
+        tag, or the raw (undecoded) value of ContourData as stored in the 
+        file, i.e. backslash-delimited decimal strings.
+    
+        
+    Outputs:
+    -------
+    
+    Points : Numpy array
+        N x 3 array of floats, e.g. [[x0, y0, z0], [x1, y1, z1], ...].
+        
+        
+    Notes:
+    -----
+    
+    Parsing the raw value (e.g. RawDataElement.value) avoids pydicom creating
+    a DSfloat for every coordinate.
+    """
+    
+    import numpy as np
+    
+    if isinstance(ContourData, bytes):
+        ContourData = ContourData.decode('ascii').split('\\')
+    
+    return np.array(ContourData, dtype=float).reshape(-1, 3)
+
+
+
+
+
+
+
+def Pts2CntData(Points):
+    """
+    Format an array of points to a flat list of decimal strings as required
+    for ContourData.
+    
+    Inputs:
+    ------
+    
+    Points : Numpy array or list of a list of floats
+        N x 3 array (or list for each point of a list for each dimension) of 
+        points, e.g. [[x0, y0, z0], [x1, y1, z1], ...].
+        
+        
+    Outputs:
+    -------
+    
+    ContourData : list of strings
+        Flat list of coordinates in Points converted from floats to strings.
+        
+        
+    Notes:
+    -----
+    
+    All coordinates are formatted in one string operation with 10 
+    significant digits, which keeps each value within the 16 character limit
+    of the Decimal String (DS) value representation.
+    """
+    
+    import numpy as np
+    
+    Flat = np.asarray(Points, dtype=float).ravel().tolist()
+    
+    if not Flat:
+        return []
+    
+    return ('%.10g\\'*len(Flat) % tuple(Flat))[:-1].split('\\')
+
+
+
+
+
+
+
 def ContourData2Points(ContourData):
     """
     Re-format a flat list of coordinates to a list of a list of [x, y, z]
@@ -500,20 +811,15 @@ def ContourData2Points(ContourData):
     Points : list of a list of floats
         List (for each point) of a list (for each dimension) of points,
         e.g. [[x0, y0, z0], [x1, y1, z1], ...].
-    """
-    
-    ContourData = [float(item) for item in ContourData]
-    
-    Points = []
-            
-    # Iterate for all points in threes:
-    for p in range(0, len(ContourData), 3):
-        point = [ContourData[p], ContourData[p+1], ContourData[p+2]]
         
-        Points.append(point)
         
-    return Points
-
+    Notes:
+    -----
+    
+    This is a list wrapper around CntData2Pts().
+    """
+    
+    return CntData2Pts(ContourData).tolist()
 
 
 
@@ -536,19 +842,297 @@ def Points2ContourData(Points):
     Outputs:
     -------
     
-    ContourData : list of strings
-        Flat list of coordinates in Points converted from floats to strings.
-    """
+    ContourData : list of strings
+        Flat list of coordinates in Points converted from floats to strings.
+        
+        
+    Notes:
+    -----
+    
+    This is a wrapper around Pts2CntData().
+    """
+        
+    return Pts2CntData(Points)
+
+
+
+
+
+
+
+def GetCrossingSign(xa, ya, xb, yb, EdgeInds, Rows, Cols):
+    """
+    Get the exact sign of the difference between the column at which each 
+    (non-horizontal) edge crosses a row and an integer column.
+    
+    Inputs:
+    ------
+    
+    xa, ya, xb, yb : Numpy arrays
+        The column (x) and row (y) indices of the end points of the edges.
+    
+    EdgeInds : Numpy array
+        The index of the edge for each crossing.
+    
+    Rows : Numpy array
+        The (integer) row of each crossing.
+    
+    Cols : Numpy array
+        The integer column to compare each crossing to.
+    
+    
+    Outputs:
+    -------
+    
+    Sign : Numpy array of ints
+        -1, 0 or +1 if the crossing is to the left of, on or to the right of
+        Cols.
+    
+    
+    Notes:
+    -----
+    
+    The crossing is to the right of Cols if 
+    (xa - Cols)*(yb - ya) + (Rows - ya)*(xb - xa) has the sign of (yb - ya).
+    The sign of each product is exact, so the sum is only evaluated exactly 
+    (using fractions) when the products have opposite signs, the vertices 
+    aren't integers and the sum is within the floating point error bound.
+    """
+    
+    import numpy as np
+    from fractions import Fraction
+    
+    xa, ya = xa[EdgeInds], ya[EdgeInds]
+    xb, yb = xb[EdgeInds], yb[EdgeInds]
+    
+    P1 = (xa - Cols)*(yb - ya)
+    P2 = (Rows - ya)*(xb - xa)
+    
+    Sum = P1 + P2
+    
+    # Integer vertices (of moderate size) give exact products and sums:
+    IsInt = np.ones(Sum.shape, dtype=bool)
+    
+    for Vals in [xa, ya, xb, yb]:
+        IsInt &= (Vals == np.round(Vals)) & (np.abs(Vals) < 2**20)
+    
+    Exact = IsInt | (np.sign(P1)*np.sign(P2) >= 0) \
+            | (np.abs(Sum) > 1e-15*(np.abs(P1) + np.abs(P2)))
+    
+    for i in np.flatnonzero(~Exact):
+        Xa, Ya, Xb, Yb, Row, Col = [Fraction(float(Val)) for Val in 
+                                    (xa[i], ya[i], xb[i], yb[i], Rows[i], 
+                                     Cols[i])]
+        
+        Sum[i] = np.sign(float((Xa - Col)*(Yb - Ya) + (Row - Ya)*(Xb - Xa)))
+    
+    return (np.sign(Sum)*np.sign(yb - ya)).astype(int)
+
+
+
+
+
+def PolygonBboxMask(Inds, NumOfRows, NumOfCols):
+    """
+    Fill a polygon defined by a list of indices using a vectorised even-odd
+    scanline fill, returning a mask cropped to the polygon's bounding box 
+    (clipped to the image).
+    
+    Inputs:
+    ------
+    
+    Inds : Numpy array or list of a list of integers/floats
+        A list (for all points) of a list (for each dimension) of indices, 
+        e.g. [[i0, j0, k0], [i1, j1, k1], ...].  Only the first two 
+        components (i, j) are used.
+        
+    NumOfRows : integer
+        The number of rows in the image.
+        
+    NumOfCols : integer
+        The number of columns in the image.
+        
+        
+    Outputs:
+    -------
+    
+    Mask : Numpy array of booleans
+        2D mask (cropped to the bounding box) of the pixels strictly inside 
+        the polygon.
+        
+    RowStart : integer
+        Row index (in the image) of the first row in Mask.
+        
+    ColStart : integer
+        Column index (in the image) of the first column in Mask.
+        
+        
+    Notes:
+    -----
+    
+    The inclusion semantics are those of shapely's Polygon.contains() for 
+    each integer pixel index (as previously used in Indices2Mask()), i.e. a 
+    pixel is included if it is strictly inside the polygon (even-odd rule) 
+    and excluded if it lies on an edge or vertex.
+    
+    For each edge the integer rows within the half-open interval of its 
+    end-point rows are found, and the column at which the edge crosses each 
+    row is computed.  The parity of the number of crossings to the left of 
+    each pixel (via a cumulative sum) gives the pixels inside the polygon.
+    Pixels that lie on an edge are then removed.
+    """
+    
+    import numpy as np
+    
+    Inds = np.asarray(Inds, dtype=float)
+    
+    # The column (x) and row (y) indices of the vertices:
+    X = Inds[:, 0]
+    Y = Inds[:, 1]
+    
+    # The bounding box clipped to the image:
+    RowStart = max(int(np.ceil(Y.min())), 0)
+    RowStop = min(int(np.floor(Y.max())), NumOfRows - 1) + 1
+    ColStart = max(int(np.ceil(X.min())), 0)
+    ColStop = min(int(np.floor(X.max())), NumOfCols - 1) + 1
+    
+    H = max(RowStop - RowStart, 0)
+    W = max(ColStop - ColStart, 0)
+    
+    if H == 0 or W == 0 or len(Inds) < 3:
+        return np.zeros((H, W), dtype=bool), RowStart, ColStart
+    
+    # The end points of the edges (closing the polygon):
+    Xa, Ya = X, Y
+    Xb, Yb = np.roll(X, -1), np.roll(Y, -1)
+    
+    def Repeat(Start, Count):
+        """ Get the edge indices and integer values Start, Start + 1, ...,
+        Start + Count - 1 for each edge. """
+        Count = np.maximum(Count, 0)
+        
+        EdgeInds = np.repeat(np.arange(len(Start)), Count)
+        
+        Offsets = np.arange(EdgeInds.size) \
+                  - np.repeat(np.cumsum(Count) - Count, Count)
+        
+        return EdgeInds, Start[EdgeInds] + Offsets
+    
+    # Non-horizontal edges:
+    NonHor = Ya != Yb
+    
+    xa, ya, xb, yb = Xa[NonHor], Ya[NonHor], Xb[NonHor], Yb[NonHor]
+    
+    # The integer rows in the half-open interval [min(ya, yb), max(ya, yb)):
+    Lo = np.ceil(np.minimum(ya, yb)).astype(int)
+    Hi = np.ceil(np.maximum(ya, yb)).astype(int)
+    
+    EdgeInds, Rows = Repeat(Lo, Hi - Lo)
+    
+    # The columns at which the edges cross the rows:
+    Cols = xa[EdgeInds] + (Rows - ya[EdgeInds])*(xb[EdgeInds] - xa[EdgeInds])\
+           /(yb[EdgeInds] - ya[EdgeInds])
+    
+    InBbox = (Rows >= RowStart) & (Rows < RowStop)
+    
+    EdgeInds = EdgeInds[InBbox]
+    Rows = Rows[InBbox]
+    Cols = Cols[InBbox]
+    
+    # The pixels left of each crossing (floor(Cols)), and whether the 
+    # crossing lies on a pixel.  Crossings close to an integer column C are 
+    # classified by the exact sign of (crossing - C) since rounding errors in
+    # Cols would otherwise include or exclude pixels that lie (just) off or 
+    # on an edge:
+    Floor = np.floor(Cols)
+    
+    Near = np.abs(Cols - np.round(Cols)) < 1e-6
+    
+    Sign = GetCrossingSign(xa, ya, xb, yb, EdgeInds[Near], Rows[Near], 
+                           np.round(Cols[Near]))
+    
+    Floor[Near] = np.round(Cols[Near]) - (Sign < 0)
+    
+    OnEdge = np.zeros(Cols.shape, dtype=bool)
+    OnEdge[Near] = Sign == 0
+    
+    Rows = Rows - RowStart
+    
+    # Each crossing toggles the parity of all pixels to its right:
+    Toggles = np.zeros((H, W + 1), dtype=np.int32)
+    
+    np.add.at(Toggles, (Rows, np.clip(Floor.astype(int) + 1 - ColStart, 
+                                      0, W)), 1)
+    
+    Mask = (np.cumsum(Toggles[:, :W], axis=1) % 2).astype(bool)
+    
+    # Remove pixels that lie on an edge.  Those on non-horizontal edges are 
+    # integer crossings or vertices:
+    IsIntVertex = (Y == np.round(Y)) & (X == np.round(X))
+    
+    BndRows = [Rows[OnEdge], np.round(Y[IsIntVertex]) - RowStart]
+    BndCols = [Floor[OnEdge] - ColStart, np.round(X[IsIntVertex]) - ColStart]
+    
+    # Those on horizontal edges (at integer rows):
+    Hor = (Ya == Yb) & (Ya == np.round(Ya))
+    
+    Lo = np.ceil(np.minimum(Xa[Hor], Xb[Hor])).astype(int)
+    Hi = np.floor(np.maximum(Xa[Hor], Xb[Hor])).astype(int) + 1
+    
+    EdgeInds, HorCols = Repeat(Lo, Hi - Lo)
+    
+    BndRows.append(np.round(Ya[Hor][EdgeInds]) - RowStart)
+    BndCols.append(HorCols - ColStart)
+    
+    BndRows = np.concatenate(BndRows).astype(int)
+    BndCols = np.concatenate(BndCols).astype(int)
+    
+    Keep = (BndRows >= 0) & (BndRows < H) & (BndCols >= 0) & (BndCols < W)
+    
+    Mask[BndRows[Keep], BndCols[Keep]] = False
+    
+    return Mask, RowStart, ColStart
+
+
+
+
+
+def FillPolygon(Inds, NumOfRows, NumOfCols):
+    """
+    Fill a polygon defined by a list of indices (see PolygonBboxMask()).
+    
+    Inputs:
+    ------
+    
+    Inds : Numpy array or list of a list of integers/floats
+        A list (for all points) of a list (for each dimension) of indices, 
+        e.g. [[i0, j0, k0], [i1, j1, k1], ...].
+        
+    NumOfRows : integer
+        The number of rows in the image.
+        
+    NumOfCols : integer
+        The number of columns in the image.
+        
+        
+    Outputs:
+    -------
+    
+    Mask : Numpy array of booleans
+        2D mask (NumOfRows x NumOfCols) of the pixels inside the polygon.
+    """
+    
+    import numpy as np
+    
+    Mask = np.zeros((NumOfRows, NumOfCols), dtype=bool)
+    
+    BboxMask, r0, c0 = PolygonBboxMask(Inds, NumOfRows, NumOfCols)
+    
+    H, W = BboxMask.shape
     
-    ContourData = []
+    Mask[r0:r0+H, c0:c0+W] = BboxMask
     
-    for point in Points:
-        point = [str(item) for item in point]
-        
-        ContourData.extend(point)
-        
-    return ContourData
-
+    return Mask
 
 
 
@@ -581,14 +1165,12 @@ def IndsByContour2PixArr(IndsByContour, RefImage):
     """
     
     import numpy as np
-    from shapely.geometry import Polygon, Point
-    from itertools import product
     
     ImSize = RefImage.GetSize()
     
     Ncontours = len(IndsByContour)
     
-    PixArr = np.zeros((Ncontours, ImSize[1], ImSize[0]))
+    PixArr = np.zeros((Ncontours, ImSize[1], ImSize[0]), dtype='uint8')
     
     # Note that IndsByContour are a list of indices for each contour:
     for c in range(Ncontours):
@@ -597,25 +1179,12 @@ def IndsByContour2PixArr(IndsByContour, RefImage):
         # Only proceed if there are at least 3 indices in this contour (the 
         # minimum number required to define a closed contour):
         if len(Indices) > 2:
-            # Convert list Indices to a Shapely Polygon:
-            Poly = Polygon(Indices)
-                
-            xMin, yMin, xMax, yMax = Poly.bounds
-         
-            points = [Point(x, y) for x, y in
-                      product(np.arange(int(xMin), np.ceil(xMax)),
-                              np.arange(int(yMin), np.ceil(yMax)))]
-                      
-            PointsInPoly = list(filter(Poly.contains, points))
+            # Fill the polygon within its bounding box:
+            Mask, r0, c0 = PolygonBboxMask(Indices, ImSize[1], ImSize[0])
             
-            for point in PointsInPoly:
-                xx, yy = point.xy
-                
-                x = int(xx[0])
-                y = int(yy[0])
-                
-                if 0 <= y < ImSize[1] and 0 <= x < ImSize[0]:
-                    PixArr[c, y, x] = 1
+            H, W = Mask.shape
+            
+            PixArr[c, r0:r0+H, c0:c0+W] = Mask
     
         
     return PixArr
@@ -627,6 +1196,92 @@ def IndsByContour2PixArr(IndsByContour, RefImage):
 
 
 
+def GetLabmapsByRoi(Rts, DicomDir, CStoSliceIndsByRoi=None):
+    """
+    Rasterise all contours of all ROIs in a RTS into 3D labelmaps (Numpy 
+    arrays) - one per ROI.
+    
+    Inputs:
+    ------
+    
+    Rts : Pydicom object
+        RTS object.
+    
+    DicomDir : string
+        Directory containing the corresponding DICOMs.
+    
+    CStoSliceIndsByRoi : list of a list of integers (optional; None by 
+    default)
+        List (for each ROI) of a list (for each contour) of slice numbers that 
+        correspond to each Referenced SOP instance UID in the Contour Sequence.
+        If None they will be obtained from the RTS and the DICOMs.
+    
+        
+    Outputs:
+    -------
+        
+    Labmaps : list of Numpy arrays
+        A list (for each ROI) of 3D labelmaps (uint8 arrays with shape 
+        (NumOfSlices, NumOfRows, NumOfCols)).
+        
+    
+    Notes:
+    -----
+    
+    Each contour is filled within its bounding box (see PolygonBboxMask()) 
+    and XOR-ed directly into the labelmap of its ROI, so that multiple 
+    contours on the same slice are combined, and contours enclosed by other
+    contours (on the same slice) become holes.  No per-contour full-size 
+    arrays are created.
+    """
+    
+    import numpy as np
+    from ImageTools import GetSeriesGeometry
+    from DicomTools import GetDicomSOPuids
+    from RtsTools import GetCStoSliceIndsByRoi
+    
+    # Get the (memoised) geometry:
+    Geometry = GetSeriesGeometry(DicomDir)
+    
+    C, R, S = Geometry.Size
+    
+    if CStoSliceIndsByRoi is None:
+        CStoSliceIndsByRoi = GetCStoSliceIndsByRoi(Rts, 
+                                                   GetDicomSOPuids(DicomDir))
+    
+    Labmaps = []
+    
+    for r in range(len(Rts.ROIContourSequence)):
+        Labmap = np.zeros((S, R, C), dtype=np.uint8)
+        
+        Sequences = Rts.ROIContourSequence[r].get('ContourSequence', [])
+        
+        for c in range(len(Sequences)):
+            Points = np.asarray(Sequences[c].ContourData, dtype=float)
+            
+            if Points.size < 9:
+                # A minimum of 3 points is required to define a closed contour:
+                continue
+            
+            Inds = Pts2Inds(Points, Rounding=True, Geometry=Geometry)
+            
+            Mask, r0, c0 = PolygonBboxMask(Inds, R, C)
+            
+            H, W = Mask.shape
+            
+            s = CStoSliceIndsByRoi[r][c]
+            
+            Labmap[s, r0:r0+H, c0:c0+W] ^= Mask
+        
+        Labmaps.append(Labmap)
+    
+    return Labmaps
+
+
+
+
+
+
 def GetLabmapImsByRoi(Rts, DicomDir, CStoSliceIndsByRoi, RefIm):
     """
     Get a list of 3D labelmap (SimpleITK) images - one per ROI.  
@@ -655,19 +1310,17 @@ def GetLabmapImsByRoi(Rts, DicomDir, CStoSliceIndsByRoi, RefIm):
         A list of 3D zero-padded labelmap (SimpleITK) images - one per ROI.
     """
     
-    from RtsTools import GetIndsByRoi
+    import SimpleITK as sitk
     
     LabmapIms = []
     
-    IndsByRoi = GetIndsByRoi(Rts, DicomDir)
-    
-    for RoiNum in range(len(IndsByRoi)):
-        PixArr = IndsByContour2PixArr(IndsByContour=IndsByRoi[RoiNum], 
-                                      RefImage=RefIm)
+    # Rasterise all ROIs in one pass:
+    Labmaps = GetLabmapsByRoi(Rts, DicomDir, CStoSliceIndsByRoi)
     
-        LabmapIm = PixArr2Labmap(PixArr=PixArr, 
-                                 NumOfSlices=RefIm.GetSize()[2], 
-                                 FrameToSliceInds=CStoSliceIndsByRoi[RoiNum])
+    for Labmap in Labmaps:
+        LabmapIm = sitk.GetImageFromArray(Labmap)
+        
+        LabmapIm.CopyInformation(RefIm)
         
         LabmapIms.append(LabmapIm)
     
@@ -679,7 +1332,6 @@ def GetLabmapImsByRoi(Rts, DicomDir, CStoSliceIndsByRoi, RefIm):
 
 
 
-
 def PixArr2Labmap(PixArr, NumOfSlices, FrameToSliceInds):
     """
     Convert a 3D SEG pixel array to a 3D SEG labelmap.  The labelmap will 
@@ -714,21 +1366,17 @@ def PixArr2Labmap(PixArr, NumOfSlices, FrameToSliceInds):
     
     # Initialise Labmap:
     #Labmap = np.zeros((NumOfSlices, NumOfRows, NumOfCols), dtype='bool')
-    Labmap = np.zeros((NumOfSlices, NumOfRows, NumOfCols), dtype='uint')
+    Labmap = np.zeros((NumOfSlices, NumOfRows, NumOfCols), dtype='uint8')
     
     #print(f'\nPixArr.shape = {PixArr.shape}')
     ##print(f'\n\nThe maximum value in PixArr is {PixArr.max()}')
     #print(f'FrameToSliceInds = {FrameToSliceInds}')
     #print(f'Labmap.shape = {Labmap.shape}')
     
-    # Over-write all frames in Labmap with non-zero 2D masks from PixArr:
-    for i in range(len(FrameToSliceInds)):
-        # The slice number for the i^th frame:
-        s = FrameToSliceInds[i]
-        
-        #print(f'\nThe slice number for the {i}^th frame is {s}')
-        
-        Labmap[s] = PixArr[i]
+    # Over-write all frames in Labmap with non-zero 2D masks from PixArr
+    # (the i^th frame goes to slice FrameToSliceInds[i]):
+    if len(FrameToSliceInds):
+        Labmap[np.asarray(FrameToSliceInds)] = PixArr[:len(FrameToSliceInds)]
         
     
     #print(f'\n\nThe maximum value in Labmap is {Labmap.max()}')
@@ -872,45 +1520,112 @@ def Image2PixArr(LabmapIm, Non0FrameInds=None):
     -------
         
     PixArr : Numpy array
-        The non-zero frames in LabmapIm as a Numpy array.
+        The non-zero frames in LabmapIm as a Numpy array (with the same pixel
+        type as LabmapIm).
                            
     Non0FrameInds : List of integers
         List of the indices of non-zero frames in LabelmapIm.  This should be
         equivalent to the PerFrameFunctionalGroupsSequence-to-slice 
         indices (PFFGStoSliceInds).
+        
+        
+    Notes:
+    -----
+    
+    The image buffer is accessed through a read-only view (no copy), the 
+    non-zero frames are found in a single vectorised pass, and the selected 
+    frames are gathered in one compact copy.  The view is only valid while 
+    LabmapIm is alive so the copy (rather than the view) is returned.
     """
     
     import SimpleITK as sitk
     import numpy as np
     
-    # Convert from SimpleITK image to a Numpy array:
-    Nda = sitk.GetArrayFromImage(LabmapIm)
+    # Get a read-only view of the SimpleITK image's buffer:
+    Nda = sitk.GetArrayViewFromImage(LabmapIm)
     
     if not Non0FrameInds:
-        Non0FrameInds = []
+        # The indices of frames with at least one non-zero pixel:
+        Non0FrameInds = np.flatnonzero(Nda.any(axis=(1, 2))).tolist()
+    
+    # Gather the non-zero frames (fancy indexing makes a single copy that 
+    # keeps the pixel type of LabmapIm):
+    PixArr = Nda[np.asarray(Non0FrameInds, dtype=int)]
+    
+    return PixArr, Non0FrameInds
         
-        #print('')
+
+
+
+
+
+
+
+
+
+
+def Mask2IndsByObj(Mask, Thresh=0.5):
+    """
+    Get the indices of the contours that define each object in a 2D mask.
+    
+    Inputs:
+    ------
+    
+    Mask : Numpy array
+        A RxC (rows x cols) mask.
         
-        # Loop through all frames in Nda and get the sum of all pixels:
-        for i in range(Nda.shape[0]):
-            Sum = np.amax(Nda[i])
-            
-            #print(f'i = {i}, Sum = {Sum}')
-            
-            if Sum:
-                # This is a non-zero frame:
-                Non0FrameInds.append(i)
+    Thresh : float (optional; 0.5 by default)
+        Threshold value used to binarise the labels in Mask.
+ 
+    
+    Outputs:
+    -------
     
-    # Initialise PixArr:
-    PixArr = np.zeros((len(Non0FrameInds), Nda.shape[1], Nda.shape[2]))
+    IndsByObj : list of Numpy arrays
+        A list (for each object) of a N x 2 array of floats of the [x, y] 
+        (i.e. column, row) indices of the contour that defines the object.
         
-    # Use Non0FrameInds to index the non-zero frames in Nda:
-    for i in range(len(Non0FrameInds)):
-        PixArr[i] = Nda[Non0FrameInds[i]]
         
+    Notes:
+    -----
     
-    return PixArr, Non0FrameInds
-        
+    find_contours is run on the bounding box of the pixels above Thresh, 
+    grown by one pixel (within Mask) and padded by one zero row and column on
+    each side (so that objects at the edges of Mask are closed), rather than 
+    on the whole (padded) frame.  Contours only pass between pixels above
+    Thresh and their neighbours, and the values of the neighbours (which
+    may be non-zero for non-binary masks) are taken from Mask, so the result
+    is the same as for the whole (padded) frame.
+    """
+    
+    import numpy as np
+    from skimage.measure import find_contours
+    
+    Above = Mask > Thresh
+    
+    Rows = np.flatnonzero(Above.any(axis=1))
+    
+    if not Rows.size:
+        return []
+    
+    Cols = np.flatnonzero(Above.any(axis=0))
+    
+    # The bounding box grown by one pixel (clipped to Mask):
+    r0, r1 = max(Rows[0] - 1, 0), min(Rows[-1] + 2, Mask.shape[0])
+    c0, c1 = max(Cols[0] - 1, 0), min(Cols[-1] + 2, Mask.shape[1])
+    
+    # Copy the bounding box into a zero-padded float array:
+    Cropped = np.zeros((r1 - r0 + 2, c1 - c0 + 2))
+    
+    Cropped[1:-1, 1:-1] = Mask[r0:r1, c0:c1]
+    
+    # find_contours is run on the transpose so that the indices are [x, y]:
+    IndsByObj = find_contours(Cropped.T, Thresh)
+    
+    # Shift the indices back to their locations in Mask:
+    Offset = np.array([c0 - 1, r0 - 1], dtype=float)
+    
+    return [Inds + Offset for Inds in IndsByObj]
 
 
 
@@ -918,13 +1633,79 @@ def Image2PixArr(LabmapIm, Non0FrameInds=None):
 
 
 
+def SharedFrames2IndsByObj(Item):
+    """
+    Get the indices of the contours that define each object in a subset of 
+    the frames of a 3D pixel array held in shared memory.  This is the 
+    function run by each process in PixArr2IndsByFrame when Processes=True.
+    
+    Inputs:
+    ------
+    
+    Item : tuple
+        A tuple of (ShmName, Shape, Dtype, FrameNums, Thresh) where ShmName is
+        the name of the SharedMemory block holding the pixel array, Shape and
+        Dtype are its shape and dtype (as a string), FrameNums is a list of the
+        frame numbers to process and Thresh is the threshold value used to 
+        binarise the labels.
+ 
+    
+    Outputs:
+    -------
+    
+    IndsByObjByFrame : list of a list of Numpy arrays
+        A list (for each frame in FrameNums) of the outputs of 
+        Mask2IndsByObj().
+    """
+    
+    import sys
+    import numpy as np
+    from multiprocessing import shared_memory
+    
+    ShmName, Shape, Dtype, FrameNums, Thresh = Item
+    
+    # Attach to the block without registering it with the resource tracker, 
+    # since the block is owned (and unlinked) by the parent process.  A 
+    # tracker that isn't shared with the parent would otherwise unlink the 
+    # block when this process exits, and unregistering it after attaching 
+    # would remove the parent's registration from a shared tracker:
+    if sys.version_info >= (3, 13):
+        Shm = shared_memory.SharedMemory(name=ShmName, track=False)
+    else:
+        from multiprocessing import resource_tracker
+        
+        Register = resource_tracker.register
+        
+        resource_tracker.register = lambda Name, Rtype: None
+        
+        try:
+            Shm = shared_memory.SharedMemory(name=ShmName)
+        finally:
+            resource_tracker.register = Register
+    
+    try:
+        PixArr = np.ndarray(Shape, dtype=Dtype, buffer=Shm.buf)
+        
+        IndsByObjByFrame = [Mask2IndsByObj(PixArr[f], Thresh) 
+                            for f in FrameNums]
+        
+        del PixArr
+    finally:
+        Shm.close()
+    
+    return IndsByObjByFrame
+
+
+
+
 
 
 
-def PixArr2IndsByFrame(PixArr, FrameToSliceInds, Thresh=0.5):
+def PixArr2IndsByFrame(PixArr, FrameToSliceInds, Thresh=0.5, Workers=None,
+                       Processes=False):
     """
-    Convert a 3D pixel array to a list (for each frame) of a list of indices
-    that define the equivalent contour for the mask in each frame.
+    Convert a 3D pixel array to a list (for each contour) of the indices
+    that define the contours of every object in each frame.
     
     Adapted from https://programtalk.com/vs2/python/7636/sima/sima/ROI.py/
  
@@ -942,103 +1723,110 @@ def PixArr2IndsByFrame(PixArr, FrameToSliceInds, Thresh=0.5):
         
     Thresh : float (optional; 0.5 by default)
         Threshold value used to binarise the labels in PixArr.
+        
+    Workers : integer (optional; None by default)
+        The number of threads (or processes) used to process the frames.  If 
+        None, 0 or 1 the frames will be processed sequentially.
+        
+    Processes : boolean (optional; False by default)
+        If True the frames will be processed by a pool of Workers processes.
+        PixArr is copied once into a shared memory block that the processes 
+        read from, so frames are not pickled.  Contour tracing holds the GIL 
+        so this is needed for the work to scale across cores.
  
     
     Outputs:
     -------
     
-    IndicesByFrame : list of floats
-        A list (for each contour/frame) of a flat list of [x, y, z] coordinates
-        of the polygons that define each frame in PixArr.
+    IndsByCnt : list of Numpy arrays
+        A list (for each contour) of a N x 3 array of floats of the [x, y, z] 
+        indices of the polygon that defines each object in each frame in 
+        PixArr.  A frame containing more than one object results in more than 
+        one contour.
+        
+    CntToSliceInds : list of integers
+        List of slice numbers that correspond to each contour.
         
-    PtsByCnt : list of a list of floats
-        A list (for each contour/frame) of a list (for each dimension) of the 
-        polygons that define each frame in PixArr.
         
-    #CntToSliceInds : list of integers
-    #    List of slice numbers that correspond to each contour.
+    Notes:
+    -----
+    
+    This previously returned a single list (for each non-empty frame) of the
+    indices of the (first) object in each frame.  Since a frame can contain 
+    several objects the output is now by contour, with CntToSliceInds giving
+    the slice number of each contour (there may be more contours than 
+    frames).  The only caller, PixArr2PtsByContour(), also returns 
+    CntToSliceInds, and its callers in RoiCopyTools use it in place of the 
+    frame-to-slice indices.
     """
     
     import numpy as np
     from scipy.sparse import issparse
-    from skimage.measure import find_contours
+    from GeneralTools import MapWithWorkers
     
-    IndsByFrame = []
+    if any([issparse(Mask) for Mask in PixArr]):
+        PixArr = np.array([np.asarray(Mask.todense()) if issparse(Mask) 
+                           else Mask for Mask in PixArr])
     
-    for FrameNum, Mask in enumerate(PixArr):
-        if issparse(Mask):
-            Mask = np.array(Mask.astype('byte').todense())
- 
-        if (Mask != 0).sum() == 0:
-            # If Mask is empty, just skip it
-            continue
- 
-        # Add an empty row and column at both sides of the mask to ensure that
-        # any masks near the edge are found:
-        ExpandedDims = (Mask.shape[0] + 2, Mask.shape[1] + 2)
-        
-        ExpandedMask = np.zeros(ExpandedDims, dtype=float)
+    PixArr = np.asarray(PixArr)
+    
+    F = PixArr.shape[0]
+    
+    # The frames that contain at least one pixel above Thresh:
+    Non0Frames = np.flatnonzero((PixArr > Thresh).reshape(F, -1).any(axis=1))
+    
+    if Processes and Workers and Workers > 1 and len(Non0Frames) > 1:
+        from multiprocessing import shared_memory
         
-        ExpandedMask[1:Mask.shape[0] + 1, 1:Mask.shape[1] + 1] = Mask
- 
-        # Get the indices that define contours in ExpandedMask:
-        """
-        I'm not sure how this will behave if there is more than one label (i.e.
-        more than one closed mask on any given frame).  Since the returned
-        item is a list of length 1, presummably a frame with multiple masks 
-        will result in a list of length > 1 for each mask.  This needs to be
-        tested and confirmed.
-        """
-        IndsByObj_2D = find_contours(ExpandedMask.T, Thresh)
-        
-        #print(f'\n\n\nFrameNum = {FrameNum}')
-        #print(f'\nlen(IndsByObj_2D) = {len(IndsByObj_2D)}')
-        #print(f'\nIndsByObj_2D = {IndsByObj_2D}')
- 
-        # Remove on row and column to shift the indices back to their original
-        # locations:
-        IndsByObj_2D = [np.subtract(x, 1).tolist() for x in IndsByObj_2D]
+        # Copy PixArr into shared memory:
+        Shm = shared_memory.SharedMemory(create=True, size=max(PixArr.nbytes, 
+                                                               1))
         
-        if len(IndsByObj_2D) > 1:
-            print(f'\nWarning: {len(IndsByObj_2D)} objects were found in',
-                  f'frame {FrameNum} in PixArr.')
+        try:
+            SharedPixArr = np.ndarray(PixArr.shape, dtype=PixArr.dtype, 
+                                      buffer=Shm.buf)
+            SharedPixArr[:] = PixArr
             
-            print(f'\nIndsByObj_2D = {IndsByObj_2D}')
+            # Split the frames into a few chunks per process:
+            Chunks = np.array_split(Non0Frames, 
+                                    min(len(Non0Frames), 4*Workers))
             
-            """
-            Consider what else needs to be done. 
-            e.g.
+            Items = [(Shm.name, PixArr.shape, PixArr.dtype.str, 
+                      Chunk.tolist(), Thresh) for Chunk in Chunks]
             
-            for IndsThisObj_2D in IndsByObj_2D:
-                ...
-            """
+            IndsByObjByChunk = MapWithWorkers(SharedFrames2IndsByObj, Items, 
+                                              Workers, Processes=True)
             
-        else:
-            """
-            Only one object was found. Reduce the level of nested lists to one
-            list of 2D indices.
-            """
-            Inds_2D = IndsByObj_2D[0]
-        
-        #print(f'\n\n\nFrameNum = {FrameNum}')
-        #print(f'\nlen(Inds_2D) = {len(Inds_2D)}')
-        #print(f'\nInds_2D = {Inds_2D}')
+            del SharedPixArr
+        finally:
+            Shm.close()
+            Shm.unlink()
         
+        IndsByObjByFrame = [IndsByObj for IndsByObjThisChunk in IndsByObjByChunk
+                            for IndsByObj in IndsByObjThisChunk]
+    else:
+        IndsByObjByFrame = MapWithWorkers(lambda f: Mask2IndsByObj(PixArr[f], 
+                                                                   Thresh), 
+                                          Non0Frames.tolist(), Workers)
+    
+    IndsByCnt = []
+    CntToSliceInds = []
+    
+    for FrameNum, IndsByObj in zip(Non0Frames, IndsByObjByFrame):
         SliceNum = FrameToSliceInds[FrameNum]
-            
-        # Add the index for the 3rd dimension:
-        Inds_3D = [Ind_2D + [SliceNum] for Ind_2D in Inds_2D]
-        
-        #print(f'\nlen(Inds_3D) = {len(Inds_3D)}')
-        #print(f'\nInds_3D = {Inds_3D}')
-        
-        IndsByFrame.append(Inds_3D)
         
-        
-    #print(f'\n\n\n\nlen(IndsByFrame) = {len(IndsByFrame)}')
-    #print(f'\nIndsByFrame = {IndsByFrame}')
- 
-    return IndsByFrame
+        for Inds_2D in IndsByObj:
+            # Add the index for the 3rd dimension:
+            Inds_3D = np.empty((Inds_2D.shape[0], 3))
+            Inds_3D[:, :2] = Inds_2D
+            Inds_3D[:, 2] = SliceNum
+            
+            IndsByCnt.append(Inds_3D)
+            
+            CntToSliceInds.append(SliceNum)
+            
+    return IndsByCnt, CntToSliceInds
+
 
 
 
@@ -1047,7 +1835,9 @@ def PixArr2IndsByFrame(PixArr, FrameToSliceInds, Thresh=0.5):
 
 
 
-def PixArr2PtsByContour(PixArr, FrameToSliceInds, DicomDir, Thresh=0.5):
+
+def PixArr2PtsByContour(PixArr, FrameToSliceInds, DicomDir, Thresh=0.5, 
+                        Workers=None, Processes=False):
     """
     Convert a 3D pixel array to a list (for each frame/contour) of a list (for 
     each point) of a list (for each dimension) of physical coordinates.
@@ -1069,52 +1859,260 @@ def PixArr2PtsByContour(PixArr, FrameToSliceInds, DicomDir, Thresh=0.5):
         
     Thresh : float (optional; 0.5 by default)
         Threshold value used to binarise the labels in PixArr.
+        
+    Workers : integer (optional; None by default)
+        The number of workers used to process the frames (see 
+        PixArr2IndsByFrame).
+        
+    Processes : boolean (optional; False by default)
+        If True the workers are processes rather than threads (see 
+        PixArr2IndsByFrame).
  
     
     Outputs:
     -------
     
-    PtsByCnt : list of a list of floats
-        A list (for each contour/frame) of a list (for each dimension) of the 
-        physical coordinates that define the mask in each frame in PixArr.
+    PtsByCnt : list of Numpy arrays
+        A list (for each contour/frame) of a N x 3 Numpy array of the physical 
+        coordinates that define the mask in each frame in PixArr.
         
     CntDataByCnt : list of a list of strings
         A list (for each contour/frame) of a flattened list of [x, y, z]
         physical coordinates that define the mask in each frame in PixArr as
         strings (format of ContourData tag in RTS).
+        
+    CntToSliceInds : list of integers
+        List of slice numbers that correspond to each contour.  A frame 
+        containing more than one object results in more than one contour.
     """
     
-    from ImageTools import GetImageAttributes
+    import numpy as np
+    from ImageTools import GetSeriesGeometry
     
-    # Convert the pixel array to a list of indices-by-frame:
-    IndsByFrame = PixArr2IndsByFrame(PixArr, FrameToSliceInds, Thresh=0.5)
+    # Convert the pixel array to a list of indices-by-contour:
+    IndsByCnt, CntToSliceInds = PixArr2IndsByFrame(PixArr, FrameToSliceInds, 
+                                                   Thresh, Workers, Processes)
     
-    Size, Spacings, ST,\
-    IPPs, Dirs = GetImageAttributes(DicomDir, Package='pydicom')
+    if not IndsByCnt:
+        return [], [], []
     
-    PtsByCnt = []
-    CntDataByCnt = []
+    # Get the (memoised) geometry:
+    Geometry = GetSeriesGeometry(DicomDir)
     
-    for Inds in IndsByFrame:
-        Pts = Indices2Points(Indices=Inds, Origin=IPPs[0], Directions=Dirs, 
-                             Spacings=Spacings)
-        
-        PtsByCnt.append(Pts)
-        
-        CntDataByCnt.append(Points2ContourData(Points=Pts))
+    # Convert the indices of all contours to points in one go, then split 
+    # them by contour:
+    Pts = Inds2Pts(np.concatenate(IndsByCnt), Geometry=Geometry)
     
+    Splits = np.cumsum([len(Inds) for Inds in IndsByCnt])[:-1]
     
-    #print(f'\n\n\nlen(PtsByCnt) = {len(PtsByCnt)}')
-    #print(f'\nlen(CntDataByCnt) = {len(CntDataByCnt)}')
-    #print(f'\nPtsByCnt = {PtsByCnt}')
-    #print(f'\nCntDataByCnt = {CntDataByCnt}')
- 
-    return PtsByCnt, CntDataByCnt
+    PtsByCnt = np.split(Pts, Splits)
+    
+    CntDataByCnt = [Pts2CntData(Pts) for Pts in PtsByCnt]
+    
+    return PtsByCnt, CntDataByCnt, CntToSliceInds
+
+
+
+
+
+
+
+
+
+
+def ClipPolygon(Points, Axis, Limit, Sign=1):
+    """
+    Clip a (closed) polygon to the half-space on one side of a plane of
+    constant coordinate (Sutherland-Hodgman clipping).
+    
+    Inputs:
+    ------
+    
+    Points : Numpy array
+        N x 3 array of the vertices of the polygon.
+    
+    Axis : integer
+        The axis (0, 1 or 2) of the coordinate that defines the plane.
+    
+    Limit : float
+        The value of the coordinate on the plane.
+    
+    Sign : integer (optional; 1 by default)
+        If 1 the part of the polygon where Points[:, Axis] >= Limit is kept.
+        If -1 the part where Points[:, Axis] <= Limit is kept.
+    
+    
+    Outputs:
+    -------
+    
+    ClippedPoints : Numpy array
+        M x 3 array of the vertices of the clipped polygon (M = 0 if the
+        polygon lies entirely outside the half-space).
+    """
+    
+    import numpy as np
+    
+    Dists = Sign*(Points[:, Axis] - Limit)
+    
+    Inside = Dists >= 0
+    
+    if Inside.all() or not Inside.any():
+        return Points[Inside]
+    
+    NextPoints = np.roll(Points, -1, axis=0)
+    NextDists = np.roll(Dists, -1)
+    
+    # The edges that cross the plane:
+    Crossing = Inside != np.roll(Inside, -1)
+    
+    Fracs = Dists[Crossing]/(Dists[Crossing] - NextDists[Crossing])
+    
+    # Each vertex is followed by the intersection of its edge with the plane
+    # (if any), then only the vertices inside and the intersections are kept:
+    Candidates = np.empty((len(Points), 2, 3))
+    Keep = np.zeros((len(Points), 2), dtype=bool)
+    
+    Candidates[:, 0] = Points
+    Candidates[Crossing, 1] = Points[Crossing] \
+                              + Fracs[:, np.newaxis]*(NextPoints[Crossing]
+                                                      - Points[Crossing])
+    
+    Keep[:, 0] = Inside
+    Keep[:, 1] = Crossing
+    
+    return Candidates[Keep]
 
 
 
 
 
+def TxPts2PtsByContour(Points, TxMatrix, SrcDicomDir, TrgDicomDir):
+    """
+    Transform the points of a contour from the Source to the Target domain
+    and form the contours on the Target slices that intersect it, without
+    converting the contour to a labelmap.
+    
+    Inputs:
+    ------
+    
+    Points : list of a list of floats or Numpy array
+        A list (for each point) of a list (for each dimension) of the
+        physical coordinates of the (closed planar) Source contour.
+    
+    TxMatrix : Numpy array
+        4x4 affine matrix that maps physical points in the Target (fixed)
+        domain to the Source (moving) domain (see
+        ImageTools.GetTxMatrixFromTxMap()).
+    
+    SrcDicomDir : string
+        Directory containing the Source DICOMs.
+    
+    TrgDicomDir : string
+        Directory containing the Target DICOMs.
+    
+    
+    Outputs:
+    -------
+    
+    PtsByCnt : list of Numpy arrays
+        A list (for each contour) of a N x 3 Numpy array of the physical
+        coordinates of the contours in the Target domain.
+    
+    CntDataByCnt : list of a list of strings
+        A list (for each contour) of a flattened list of [x, y, z] physical
+        coordinates as strings (format of ContourData tag in RTS).
+    
+    CntToSliceInds : list of integers
+        List of the Target slice numbers that correspond to each contour.
+    
+    
+    Notes:
+    -----
+    
+    The contour is treated as a slab with the thickness of the Source slice
+    (as it is when converted to a labelmap).  The transformed slab is
+    intersected with the plane of each Target slice that it reaches, which
+    amounts to clipping the transformed contour to the strip of the slab
+    that is within half the (transformed) slab thickness of the plane, and
+    projecting it onto the plane along the slab normal.  The contours are
+    also clipped to the extent of the Target image.  This gives the contours
+    that a nearest neighbour warp of the labelmap would yield, at a cost
+    proportional to the number of points rather than voxels and without the
+    loss of resolution of rasterising and re-tracing the contour.
+    """
+    
+    import numpy as np
+    from ImageTools import GetSeriesGeometry
+    
+    SrcGeometry = GetSeriesGeometry(SrcDicomDir)
+    TrgGeometry = GetSeriesGeometry(TrgDicomDir)
+    
+    # The matrix that maps points in the Source domain to indices in the
+    # Target image:
+    Pt2Ind = TrgGeometry.InvAffine @ np.linalg.inv(TxMatrix)
+    
+    Points = np.asarray(Points, dtype=float).reshape(-1, 3)
+    
+    Inds = Points @ Pt2Ind[:3, :3].T + Pt2Ind[:3, 3]
+    
+    # Half of the Source slice thickness vector (in Target indices):
+    Half = Pt2Ind[:3, :3] @ SrcGeometry.Affine[:3, 2]/2
+    
+    if abs(Half[2]) < 1e-6:
+        msg = 'The transformed Source slices are perpendicular to the Target '\
+              + 'slices.'
+        
+        raise Exception(msg)
+    
+    Cols, Rows, NumOfSlices = TrgGeometry.Size
+    
+    # The Target slices that the transformed slab reaches:
+    FirstSlice = max(int(np.ceil(Inds[:, 2].min() - abs(Half[2]))), 0)
+    LastSlice = min(int(np.floor(Inds[:, 2].max() + abs(Half[2]))),
+                    NumOfSlices - 1)
+    
+    IndsByCnt = []
+    CntToSliceInds = []
+    
+    for s in range(FirstSlice, LastSlice + 1):
+        Cnt = ClipPolygon(Inds, 2, s - abs(Half[2]), Sign=1)
+        Cnt = ClipPolygon(Cnt, 2, s + abs(Half[2]), Sign=-1)
+        
+        if len(Cnt) < 3:
+            continue
+        
+        # Project onto the plane of slice s along the slab normal:
+        Cnt = Cnt + ((s - Cnt[:, 2])/Half[2])[:, np.newaxis]*Half
+        
+        Cnt[:, 2] = s
+        
+        # Clip to the extent of the Target image:
+        Cnt = ClipPolygon(Cnt, 0, -0.5, Sign=1)
+        Cnt = ClipPolygon(Cnt, 0, Cols - 0.5, Sign=-1)
+        Cnt = ClipPolygon(Cnt, 1, -0.5, Sign=1)
+        Cnt = ClipPolygon(Cnt, 1, Rows - 0.5, Sign=-1)
+        
+        if len(Cnt) < 3:
+            continue
+        
+        IndsByCnt.append(Cnt)
+        CntToSliceInds.append(s)
+    
+    if not IndsByCnt:
+        return [], [], []
+    
+    # Convert the indices of all contours to points in one go, then split
+    # them by contour:
+    Pts = Inds2Pts(np.concatenate(IndsByCnt), Geometry=TrgGeometry)
+    
+    Splits = np.cumsum([len(Inds) for Inds in IndsByCnt])[:-1]
+    
+    PtsByCnt = np.split(Pts, Splits)
+    
+    CntDataByCnt = [Pts2CntData(Pts) for Pts in PtsByCnt]
+    
+    return PtsByCnt, CntDataByCnt, CntToSliceInds
+
 
 
 
@@ -1146,8 +2144,6 @@ def Indices2Mask(Inds, RefImage):
     """
     
     import numpy as np
-    from itertools import product
-    from shapely.geometry import Polygon, Point
     
     # Only proceed if there are at least 3 indices in this contour (the 
     # minimum number required to define a closed contour):
@@ -1158,31 +2154,12 @@ def Indices2Mask(Inds, RefImage):
     
     C, R, S = RefImage.GetSize()
     
-    Mask = np.zeros((1, R, C))
+    Mask = np.zeros((1, R, C), dtype='uint8')
     
     #print(f'\nMask.shape = {Mask.shape}')
     
-    # Convert Inds to a Shapely Polygon:
-    Poly = Polygon(Inds)
-        
-    xMin, yMin, xMax, yMax = Poly.bounds
- 
-    points = [Point(x, y) for x, y in 
-              product(np.arange(int(xMin), np.ceil(xMax)),
-                      np.arange(int(yMin), np.ceil(yMax)))]
-              
-    PointsInPoly = list(filter(Poly.contains, points))
-    
-    for point in PointsInPoly:
-        xx, yy = point.xy
-        
-        x = int(xx[0])
-        y = int(yy[0])
-        
-        if 0 <= y < R and 0 <= x < C:
-            #print(f'\n   Mask.shape = {Mask.shape}')
-            
-            Mask[0, y, x] = 1
+    # Fill the polygon (the pixels strictly inside it):
+    Mask[0] = FillPolygon(Inds, R, C)
     
         
     return Mask
@@ -1207,6 +2184,7 @@ def ConvertImagePixelType(Image, NewPixelType):
         the SimpleITK pixel types 
         (https://simpleitk.org/SimpleITK-Notebooks/01_Image_Basics.html):
             
+        - 'sitkUInt8' 	Unsigned 8 bit integer
         - 'sitkUInt32' 	Unsigned 32 bit integer
         - 'sitkFloat32' 	32 bit float
 
@@ -1228,14 +2206,18 @@ def ConvertImagePixelType(Image, NewPixelType):
     
     import SimpleITK as sitk
     
-    if NewPixelType == 'sitkUInt32':
+    if NewPixelType == 'sitkUInt8':
+        OutputPixelType = sitk.sitkUInt8
+        
+    elif NewPixelType == 'sitkUInt32':
         OutputPixelType = sitk.sitkUInt32
         
     elif NewPixelType == 'sitkFloat32':
         OutputPixelType = sitk.sitkFloat32
     
     else:
-        msg = '"NewPixelType" must be either "sitkUInt32" or "sitkFloat32".'
+        msg = '"NewPixelType" must be "sitkUInt8", "sitkUInt32" or '\
+              + '"sitkFloat32".'
         
         raise Exception(msg)
         
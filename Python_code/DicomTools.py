@@ -20,6 +20,36 @@ Created on Thu Oct 15 10:44:06 2020
 #from ImageTools import GetImageAttributes
 
 
+import os
+from collections import OrderedDict
+
+# Process-wide LRU cache of series metadata (see GetSeriesMetadata()), keyed 
+# by the absolute path of the DICOM directory.  The try/except ensures that 
+# the cache survives importlib.reload(DicomTools):
+try:
+    SeriesMetadataCache
+except NameError:
+    SeriesMetadataCache = OrderedDict()
+
+# The maximum number of series to keep in SeriesMetadataCache:
+SeriesMetadataCacheSize = 32
+
+# File path of the persistent (SQLite) index of DICOM headers consulted by 
+# GetSeriesMetadata() (see SetSeriesIndex()).  Disabled (None) unless the 
+# environment variable DICOM_SERIES_INDEX is set:
+try:
+    SeriesIndexFpath
+except NameError:
+    SeriesIndexFpath = os.environ.get('DICOM_SERIES_INDEX', None)
+
+# The default number of threads used to read DICOM files concurrently in 
+# ImportDicoms() and GetSeriesMetadata() (None = sequential reads):
+try:
+    DicomReadWorkers
+except NameError:
+    DicomReadWorkers = None
+
+
 
 """
 ******************************************************************************
@@ -30,7 +60,8 @@ GENERAL DICOM FUNCTIONS
 """
 
 
-def GetDicomFpaths(DicomDir, SortMethod='slices', LogToConsole=None):
+def GetDicomFpaths(DicomDir, SortMethod='slices', LogToConsole=None, 
+                   HeaderOnly=True):
     """
     Get a sorted list of full filepaths for all DICOM files in a directory
     
@@ -47,6 +78,19 @@ def GetDicomFpaths(DicomDir, SortMethod='slices', LogToConsole=None):
             -- 'natural' (or 'Natural') = using natsort to sort the filenames
             -- 'slices' (or 'Slices') = sorted along the slice direction 
     
+    LogToConsole : boolean (optional; None by default)
+        Denotes whether intermediate results will be logged to the console.
+    
+    HeaderOnly : boolean (optional; True by default)
+        If True, and if SortMethod = 'slices', the sorted file paths will be
+        obtained from the series metadata (see GetSeriesMetadata()), for which
+        only a handful of header tags are parsed from each file (reading stops 
+        before PixelData), and which is cached across calls.  If False, each 
+        file will be read in full.  Both give the same ordering.  The gain 
+        is from the caching: a first (uncached) call is no faster than 
+        reading the files in full when they are in the page cache (see 
+        benchmarks/BenchGetDicomFpaths.py).
+    
     
     Outputs:
     -------
@@ -63,7 +107,6 @@ def GetDicomFpaths(DicomDir, SortMethod='slices', LogToConsole=None):
     import os
     from natsort import natsorted
     from pydicom import read_file
-    import numpy as np
     
     #print('\nSortMethod (input for GetDicomFpaths()) =', SortMethod)
     
@@ -86,88 +129,750 @@ def GetDicomFpaths(DicomDir, SortMethod='slices', LogToConsole=None):
             FilePaths = natsorted(FilePaths)
             
         if SortMethod in ['slices', 'Slices']:
-            # Create an empty array to store the Positions:
-            Positions = []
+            if HeaderOnly:
+                # Get the sorted file paths from the (cached) series metadata:
+                Metadata = GetSeriesMetadata(DicomDir, LogToConsole)
+                
+                FilePaths = list(Metadata['FilePaths'])
             
-            for FilePath in FilePaths:
-                #print('\nFilePath =', FilePath)
+            else:
+                # Create an empty array to store the Positions:
+                Positions = []
                 
-                # Read in Dicom:
-                Dicom = read_file(FilePath)
+                for FilePath in FilePaths:
+                    # Read in Dicom:
+                    Dicom = read_file(FilePath)
+                    
+                    # Parse the Image Position (Patient):
+                    Position = [float(item) for item in Dicom.ImagePositionPatient]
+                    
+                    # Add Position for this Dicom to Positions:
+                    Positions.append(Position)
                 
-                # Parse the Image Position (Patient):
-                Position = [float(item) for item in Dicom.ImagePositionPatient]
+                SortInds = GetSliceSortInds(Positions, LogToConsole)
                 
-                # Add Position for this Dicom to Positions:
-                Positions.append(Position)
+                # Sort FilePaths with SortInds:
+                FilePaths = [FilePaths[i] for i in SortInds]
+        
+    
+    return FilePaths
+
+
+
+
+
+def GetSliceSortInds(Positions, LogToConsole=False):
+    """
+    Get the indices that sort a list of ImagePositionPatient along the axis
+    with the greatest change of position.
+    
+    Inputs:
+    ------
+    
+    Positions : list of list of floats
+        The ImagePositionPatient of each DICOM, 
+        e.g. [[x0, y0, z0], [x1, y1, z1], ...]
+        
+    LogToConsole : boolean (optional; False by default)
+        Denotes whether intermediate results will be logged to the console.
+    
+    
+    Outputs:
+    -------
+    
+    SortInds : Numpy array of integers
+        The indices that sort Positions in ascending order along the axis 
+        with the greatest change of position.
+    """
+    
+    import numpy as np
+    
+    # Convert to numpy array:
+    Positions = np.array(Positions)
+    
+    # Get the maximum change of Positions along x, y and z:
+    dPositions = np.max(Positions, axis=0) - np.min(Positions, axis=0)
+    
+    if LogToConsole:
+        print('\n   The maximum change of Positions along x, y and z',
+              f'= {dPositions}')
+
+    # Get the index of the axis with the greatest change of Position:
+    ind = np.where(dPositions==np.max(dPositions))[0][0]
+    
+    if LogToConsole:
+        print('\n   The index of the axis with the greatest change of',
+              f'Position = {ind}')
+    
+    # Convert ind to 'x', 'y' or 'z':
+    SortAxis = ['x', 'y', 'z'][ind]
+        
+    if LogToConsole:
+        print('\n   The DICOM filepaths will be sorted along the ' \
+              + SortAxis + '-axis.')
+    
+        print('\n   The pre-sorted ' + SortAxis + '-positions are:\n')
+        print([round(Positions[i][ind], 2) for i in range(len(Positions))])
+    
+    """
+    Solution on how to sort along a specific column:
+    
+    https://stackoverflow.com/questions/22698687/how-to-sort-2d-array-numpy-ndarray-based-to-the-second-column-in-python
+    
+    The following are equivalent:
+    
+    Positions[Positions[:, 2].argsort()]
+    Positions[np.argsort(Positions[:, 1])]
+    
+    """
+    
+    SortInds = Positions[:, ind].argsort()
+    
+    if LogToConsole:
+        print('\n   The sorted ' + SortAxis + '-positions are:\n')
+        print([round(Positions[i][ind], 2) for i in SortInds])
+    
+    return SortInds
+
+
+
+
+
+def GetDicomDirFingerprint(DicomDir):
+    """
+    Get the (unsorted) list of DICOM file paths in a directory and a 
+    fingerprint that changes whenever the directory or any of its DICOM files
+    are modified, added or removed.
+    
+    Inputs:
+    ------
+    
+    DicomDir : string
+        Path to directory containing DICOMs.
+    
+    
+    Outputs:
+    -------
+    
+    FilePaths : list of strings
+        List of the full filepaths of all DICOM files in DicomDir (unsorted).
+    
+    FileStats : list of tuples
+        List (for each file in FilePaths) of the file size (in bytes) and 
+        modification time (in ns).
+        
+    Fingerprint : string
+        SHA1 hex digest of the modification times of DicomDir (and any 
+        sub-directories) and the paths, sizes and modification times of the
+        DICOM files.
+    """
+    
+    import os
+    import hashlib
+    
+    FilePaths = []
+    
+    FileStats = []
+    
+    Stats = []
+    
+    for DirName, SubDirList, FileList in os.walk(DicomDir):
+        Stats.append((DirName, os.stat(DirName).st_mtime_ns))
+        
+        for FileName in FileList:
+            if '.dcm' in FileName.lower():  # check for Dicom files only
+                FilePath = os.path.join(DirName, FileName)
                 
-            # Convert to numpy array:
-            Positions = np.array(Positions)
-            
-            #print('Positions =', Positions)
+                Stat = os.stat(FilePath)
+                
+                FilePaths.append(FilePath)
+                
+                FileStats.append((Stat.st_size, Stat.st_mtime_ns))
+                
+                Stats.append((FilePath, Stat.st_size, Stat.st_mtime_ns))
     
-            # Get the maximum change of Positions along x, y and z:
-            dPositions = np.max(Positions, axis=0) - np.min(Positions, axis=0)
-            
-            if LogToConsole:
-                print('\n   The maximum change of Positions along x, y and z',
-                      f'= {dPositions}')
+    Fingerprint = hashlib.sha1(repr(sorted(Stats)).encode()).hexdigest()
     
-            # Get the index of the axis with the greatest change of Position:
-            ind = np.where(dPositions==np.max(dPositions))[0][0]
-            
-            if LogToConsole:
-                print('\n   The index of the axis with the greatest change of',
-                      f'Position = {ind}')
+    return FilePaths, FileStats, Fingerprint
+
+
+
+
+
+def ReadDicomHeader(FilePath):
+    """
+    Parse the header tags of a DICOM file that are required for the series 
+    metadata (see GetSeriesMetadata()), stopping before PixelData.
+    
+    Inputs:
+    ------
+    
+    FilePath : string
+        Full path of the DICOM file.
+    
+    
+    Outputs:
+    -------
+    
+    Header : dictionary
+        Dictionary containing the keys 'SOPuid', 'Studyuid', 'Seriesuid', 
+        'FORuid', 'SOPClassuid', 'Modality', 'IPP', 'IOP', 'PixelSpacing', 
+        'SliceThickness', 'Rows' and 'Columns'.  IPP, IOP and PixelSpacing are
+        lists of floats and SliceThickness is a string (as it may be empty).
+        
+        
+    Notes:
+    -----
+    
+    Only ImagePositionPatient (which is required to sort the files) and the 
+    UIDs are required.  IOP, PixelSpacing, Rows and Columns are None, and
+    SliceThickness is '', if they are missing (e.g. for some MR and derived 
+    series), since they are only required for the image geometry.
+    """
+    
+    from pydicom import read_file
+    
+    # The tags to parse:
+    Tags = ['SOPClassUID', 'SOPInstanceUID', 'Modality', 'StudyInstanceUID',
+            'SeriesInstanceUID', 'FrameOfReferenceUID', 'SliceThickness', 
+            'ImagePositionPatient', 'ImageOrientationPatient', 'Rows', 
+            'Columns', 'PixelSpacing']
+    
+    Dicom = read_file(FilePath, stop_before_pixels=True, specific_tags=Tags)
+    
+    Header = {'SOPuid' : str(Dicom.SOPInstanceUID),
+              'Studyuid' : str(Dicom.StudyInstanceUID),
+              'Seriesuid' : str(Dicom.SeriesInstanceUID),
+              'FORuid' : str(Dicom.get('FrameOfReferenceUID', '')),
+              'SOPClassuid' : str(Dicom.SOPClassUID),
+              'Modality' : str(Dicom.get('Modality', '')),
+              'IPP' : [float(item) for item in Dicom.ImagePositionPatient],
+              'IOP' : None,
+              'PixelSpacing' : None,
+              'SliceThickness' : '',
+              'Rows' : None,
+              'Columns' : None
+              }
+    
+    # The optional tags (an empty tag has the value None):
+    if Dicom.get('SliceThickness', None) is not None:
+        Header['SliceThickness'] = str(Dicom.SliceThickness)
+    
+    if Dicom.get('ImageOrientationPatient', None):
+        Header['IOP'] = [float(item) for item in Dicom.ImageOrientationPatient]
+    
+    if Dicom.get('PixelSpacing', None):
+        Header['PixelSpacing'] = [float(item) for item in Dicom.PixelSpacing]
+    
+    if Dicom.get('Rows', None) is not None:
+        Header['Rows'] = int(Dicom.Rows)
+    
+    if Dicom.get('Columns', None) is not None:
+        Header['Columns'] = int(Dicom.Columns)
+    
+    return Header
+
+
+
+
+
+def ReadDicomMemmap(FilePath):
+    """
+    Import a DICOM object with its PixelData memory-mapped from the file 
+    rather than read into memory.
+    
+    Inputs:
+    ------
+    
+    FilePath : string
+        Full path of the DICOM file.
+    
+    
+    Outputs:
+    -------
+    
+    Dicom : Pydicom object
+        DICOM object.  If the PixelData is uncompressed its value is a 
+        read-only Numpy memmap (of dtype uint8) of the PixelData bytes in the 
+        file, so only the parts of PixelData that are accessed are paged in.
+    
+    
+    Notes:
+    -----
+    
+    1) PixelData (and any other element larger than 1 KB) is deferred when the
+    file is parsed.  The offset of the value of PixelData in the file is then 
+    used to memory-map it.  
+    
+    2) Compressed (encapsulated) PixelData is left as a deferred element, and
+    will be read in full by Pydicom when it is accessed.
+    
+    3) The memmap supports the buffer protocol, so Dicom.pixel_array and 
+    dcmwrite() work as they would for a bytes value.  SEG frames can be 
+    unpacked directly from it using SegTools.GetSegFrames(), and the pixel 
+    arrays of images accessed using ImageTools.GetDicomPixArr().
+    """
+    
+    import numpy as np
+    from pydicom import read_file
+    from pydicom.dataelem import DataElement
+    
+    Dicom = read_file(FilePath, defer_size='1 KB')
+    
+    if not 'PixelData' in Dicom:
+        return Dicom
+    
+    if hasattr(Dicom, 'file_meta') and 'TransferSyntaxUID' in Dicom.file_meta:
+        if Dicom.file_meta.TransferSyntaxUID.is_compressed:
+            return Dicom
+    
+    # The raw (still deferred) PixelData element (Dicom.get_item() would read
+    # its value):
+    RawPixelData = dict(Dicom.items())[0x7FE00010]
+    
+    if not getattr(RawPixelData, 'value', b'') is None:
+        # PixelData was small enough to have been read already:
+        return Dicom
+    
+    Memmap = np.memmap(FilePath, dtype='uint8', mode='r', 
+                       offset=RawPixelData.value_tell, 
+                       shape=(RawPixelData.length,))
+    
+    # The VR is None for implicit VR transfer syntaxes:
+    VR = RawPixelData.VR
+    
+    if VR is None:
+        VR = 'OW' if int(Dicom.BitsAllocated) > 8 else 'OB'
+    
+    # Set the element directly (setting Dicom.PixelData pages in the entire 
+    # memmap):
+    Dicom[0x7FE00010] = DataElement(0x7FE00010, VR, Memmap)
+    
+    return Dicom
+
+
+
+
+
+def SetSeriesIndex(IndexFpath):
+    """
+    Set the file path of the persistent (SQLite) index of DICOM headers that
+    is consulted by GetSeriesMetadata().
+    
+    Inputs:
+    ------
+    
+    IndexFpath : string or None
+        Full path of the SQLite database file (created if it doesn't exist).
+        If None the index is disabled.
+    
+    
+    Outputs:
+    -------
+    
+    None
+    
+    
+    Notes:
+    -----
+    
+    The index can also be enabled by setting the environment variable 
+    DICOM_SERIES_INDEX prior to importing DicomTools.
+    """
+    
+    global SeriesIndexFpath
+    
+    SeriesIndexFpath = IndexFpath
+    
+    return
+
+
+
+
+
+def GetIndexedDicomHeaders(DicomDir, FilePaths, FileStats, 
+                           LogToConsole=False):
+    """
+    Get the DICOM headers (see ReadDicomHeader()) of a list of files from the
+    persistent index, parsing (and updating the index for) only those files 
+    that are not in the index or whose size or modification time has changed.
+    
+    Inputs:
+    ------
+    
+    DicomDir : string
+        Absolute path of the directory containing the DICOMs.
+    
+    FilePaths : list of strings
+        List of the full filepaths of the DICOM files in DicomDir.
+    
+    FileStats : list of tuples
+        List (for each file in FilePaths) of the file size and modification 
+        time (see GetDicomDirFingerprint()).
+        
+    LogToConsole : boolean (optional; False by default)
+        Denotes whether intermediate results will be logged to the console.
+    
+    
+    Outputs:
+    -------
+    
+    Headers : list of dictionaries
+        List (for each file in FilePaths) of the DICOM headers.
+    """
+    
+    import sqlite3
+    from GeneralTools import MapWithWorkers
+    
+    # Lists of floats are stored as backslash-delimited strings (and None as
+    # NULL):
+    def Join(Values):
+        if Values is None:
+            return None
+        
+        return '\\'.join([repr(float(item)) for item in Values])
+    
+    def Split(Values):
+        if Values is None:
+            return None
+        
+        return [float(item) for item in Values.split('\\')]
+    
+    Conn = sqlite3.connect(SeriesIndexFpath, timeout=60)
+    
+    try:
+        Conn.execute('CREATE TABLE IF NOT EXISTS DicomHeaders ('
+                     'FilePath TEXT PRIMARY KEY, DicomDir TEXT, Size INTEGER, '
+                     'Mtime INTEGER, SOPuid TEXT, Studyuid TEXT, '
+                     'Seriesuid TEXT, FORuid TEXT, SOPClassuid TEXT, '
+                     'Modality TEXT, IPP TEXT, IOP TEXT, PixelSpacing TEXT, '
+                     'SliceThickness TEXT, Rows INTEGER, Columns INTEGER)')
+        
+        Conn.execute('CREATE INDEX IF NOT EXISTS DicomHeadersByDir ON '
+                     'DicomHeaders (DicomDir)')
+        
+        # Read all entries for this directory in one query:
+        Rows = Conn.execute('SELECT * FROM DicomHeaders WHERE DicomDir = ?', 
+                            (DicomDir,)).fetchall()
+        
+        IndexedRows = dict((Row[0], Row) for Row in Rows)
+        
+        Headers = []
+        
+        # Indices of the files that need to be parsed:
+        NewInds = []
+        
+        for i, (FilePath, (Size, Mtime)) in enumerate(zip(FilePaths, FileStats)):
+            Row = IndexedRows.get(FilePath)
             
-            # Convert ind to 'x', 'y' or 'z':
-            if ind == 0:
-                SortAxis = 'x'
-            if ind == 1:
-                SortAxis = 'y'
-            if ind == 2:
-                SortAxis = 'z'
+            if Row is not None and Row[2] == Size and Row[3] == Mtime:
+                Header = {'SOPuid' : Row[4],
+                          'Studyuid' : Row[5],
+                          'Seriesuid' : Row[6],
+                          'FORuid' : Row[7],
+                          'SOPClassuid' : Row[8],
+                          'Modality' : Row[9],
+                          'IPP' : Split(Row[10]),
+                          'IOP' : Split(Row[11]),
+                          'PixelSpacing' : Split(Row[12]),
+                          'SliceThickness' : Row[13],
+                          'Rows' : Row[14],
+                          'Columns' : Row[15]
+                          }
+            else:
+                Header = None
                 
-            if LogToConsole:
-                print('\n   The DICOM filepaths will be sorted along the ' \
-                      + SortAxis + '-axis.')
-            
-                print('\n   The pre-sorted ' + SortAxis + '-positions are:\n')
-                print([round(Positions[i][ind], 2) for i in range(len(Positions))])
-            
-            """
-            Solution on how to sort along a specific column:
-            
-            https://stackoverflow.com/questions/22698687/how-to-sort-2d-array-numpy-ndarray-based-to-the-second-column-in-python
+                NewInds.append(i)
             
-            The following are equivalent:
-            
-            Positions[Positions[:, 2].argsort()]
-            Positions[np.argsort(Positions[:, 1])]
-            
-            """
-            
-            SortInds = Positions[:, ind].argsort()
-            
-            #PositionsSorted = Positions[SortInds]
+            Headers.append(Header)
+        
+        NewHeaders = MapWithWorkers(ReadDicomHeader, 
+                                    [FilePaths[i] for i in NewInds], 
+                                    DicomReadWorkers)
+        
+        NewRows = []
+        
+        for i, Header in zip(NewInds, NewHeaders):
+            Headers[i] = Header
             
-            if LogToConsole:
-                print('\n   The sorted ' + SortAxis + '-positions are:\n')
-                print([round(Positions[i][ind], 2) for i in SortInds])
+            Size, Mtime = FileStats[i]
             
-            # Sort FilePaths with SortInds:
-            #FilePaths = FilePaths[SortInds] # <-- TypeError: list indices must be 
-            # integers or slices, not list
-            FilePaths = [FilePaths[i] for i in SortInds]
+            NewRows.append((FilePaths[i], DicomDir, Size, Mtime, 
+                            Header['SOPuid'], Header['Studyuid'], 
+                            Header['Seriesuid'], Header['FORuid'], 
+                            Header['SOPClassuid'], Header['Modality'], 
+                            Join(Header['IPP']), Join(Header['IOP']), 
+                            Join(Header['PixelSpacing']), 
+                            Header['SliceThickness'], Header['Rows'], 
+                            Header['Columns']))
+        
+        # Entries for files that no longer exist:
+        OldFilePaths = set(IndexedRows.keys()).difference(FilePaths)
         
+        if LogToConsole:
+            print(f'\n   {len(FilePaths) - len(NewRows)} of {len(FilePaths)}',
+                  f'DICOM headers were read from the index {SeriesIndexFpath}',
+                  f'({len(NewRows)} added/updated, {len(OldFilePaths)}',
+                  'removed).')
+        
+        if NewRows or OldFilePaths:
+            with Conn:
+                Conn.executemany('DELETE FROM DicomHeaders WHERE FilePath = ?', 
+                                 [(FilePath,) for FilePath in OldFilePaths])
+                
+                Conn.executemany('INSERT OR REPLACE INTO DicomHeaders VALUES '
+                                 '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, '
+                                 '?, ?)', NewRows)
+    finally:
+        Conn.close()
     
-    return FilePaths
+    return Headers
+
+
+
+
+
+def GetSeriesMetadata(DicomDir, LogToConsole=False):
+    """
+    Get the metadata of a DICOM series from a process-wide LRU cache, parsing
+    the headers of the DICOM files only if the series is not in the cache or 
+    if the directory has changed since it was cached.  If a persistent index
+    has been set (see SetSeriesIndex()) the headers are read from the index, 
+    and only files that are new or have changed are parsed.
+    
+    Inputs:
+    ------
+    
+    DicomDir : string
+        Path to directory containing DICOMs.
+        
+    LogToConsole : boolean (optional; False by default)
+        Denotes whether intermediate results will be logged to the console.
+    
+    
+    Outputs:
+    -------
+    
+    Metadata : dictionary or None
+        Dictionary containing the keys:
+            -- 'DicomDir' : the absolute path of DicomDir
+            -- 'Fingerprint' : see GetDicomDirFingerprint()
+            -- 'FilePaths' : file paths sorted along the slice direction
+            -- 'SOPuids' : SOP Instance UIDs (sorted as FilePaths), i.e. the
+            slice index-to-SOP UID mapping
+            -- 'SliceIndBySOPuid' : dictionary mapping each SOP Instance UID 
+            to its slice index (the reverse of 'SOPuids')
+            -- 'Studyuid', 'Seriesuid', 'FORuid', 'SOPClassuid' and 'Modality'
+            -- 'Positions' : ImagePositionPatient (sorted as FilePaths)
+            -- 'IOP' : ImageOrientationPatient
+            -- 'PixelSpacing', 'SliceThickness', 'Rows' and 'Columns'
+            -- 'Size', 'Spacings' and 'Directions' : as returned by
+            GetImageAttributes(Package='pydicom')
+        None is returned if there are no DICOMs in DicomDir.  SliceThickness
+        is None if the tag is missing or empty.  IOP, PixelSpacing, 
+        Directions and Spacings are None (and the Rows and Columns in Size 
+        are None) if the corresponding tags are missing, since only the IPPs
+        are required to sort the files (see ReadDicomHeader()).
+        
+    
+    Notes:
+    -----
+    
+    The returned dictionary is shared by all callers so it must not be 
+    modified.  The cache holds up to SeriesMetadataCacheSize series and can be
+    emptied using ClearSeriesMetadataCache().
+    """
+    
+    import os
+    import numpy as np
+    from GeneralTools import ItemsUniqueToWithin, MapWithWorkers
+    
+    Key = os.path.abspath(DicomDir)
+    
+    FilePaths, FileStats, Fingerprint = GetDicomDirFingerprint(DicomDir)
+    
+    if FilePaths == []:
+        print('No DICOMs found.')
+        
+        return None
+    
+    Metadata = SeriesMetadataCache.get(Key)
+    
+    if Metadata is not None and Metadata['Fingerprint'] == Fingerprint:
+        # Mark as most recently used:
+        SeriesMetadataCache.move_to_end(Key)
+        
+        return Metadata
+    
+    if SeriesIndexFpath:
+        Headers = GetIndexedDicomHeaders(Key, FilePaths, FileStats, 
+                                         LogToConsole)
+    else:
+        if LogToConsole:
+            print(f'\n   Parsing the DICOM headers in {DicomDir}')
+        
+        Headers = MapWithWorkers(ReadDicomHeader, FilePaths, DicomReadWorkers)
+    
+    Positions = [Header['IPP'] for Header in Headers]
+    
+    SortInds = GetSliceSortInds(Positions, LogToConsole)
+    
+    FilePaths = [FilePaths[i] for i in SortInds]
+    Headers = [Headers[i] for i in SortInds]
+    Positions = [Positions[i] for i in SortInds]
+    
+    # Check if all IPPs are unique.
+    """
+    Some scans ("ep2ddiff3scantracep2") have repeated IPPs.
+    """
+    P = len(Positions)
+    U = len(set(tuple(p) for p in Positions))
+    
+    if U != P:
+        print(f'\nWarning:  There are only {U} unique IPPs within the',
+              f'list of {P} IPPs.\n')
+    
+    if Headers[0]['IOP'] is None:
+        IOP = None
+        
+        Directions = None
+    else:
+        IOP = list(Headers[0]['IOP'])
+        
+        # Get the direction vector along z using the cross product of the x 
+        # and y vectors:
+        zDir = np.cross(IOP[0:3], IOP[3:])
+        
+        Directions = IOP + list(zDir)
+    
+    if Headers[0]['PixelSpacing'] is None:
+        PixelSpacing = None
+    else:
+        PixelSpacing = list(Headers[0]['PixelSpacing'])
+    
+    # SliceThickness is optional (and may be empty):
+    if Headers[0]['SliceThickness'].strip():
+        SliceThick = float(Headers[0]['SliceThickness'])
+    else:
+        SliceThick = None
+    
+    """ 
+    Don't use SliceThickness for the z-component of the voxel spacing. 
+    Instead use the difference between slices from the IPP.
+    """
+    if P > 1:
+        # Compute the vector lengths of the IPP differences:
+        Vlengths = list(np.linalg.norm(np.diff(np.array(Positions), axis=0), 
+                                       axis=1))
+        
+        UniqueVlengths = ItemsUniqueToWithin(Vlengths)
+        
+        if len(UniqueVlengths) > 1:
+            print('\nWarning:')
+            print('    The voxel spacings along the scan direction are',
+                  'non-uniform with the following unique values:\n')
+            print('   ', UniqueVlengths, '\n')
+    else:
+        UniqueVlengths = [SliceThick]
+    
+    Rows = Headers[0]['Rows']
+    Columns = Headers[0]['Columns']
+    
+    SOPuids = [Header['SOPuid'] for Header in Headers]
+    
+    Metadata = {'DicomDir' : Key,
+                'Fingerprint' : Fingerprint,
+                'FilePaths' : FilePaths,
+                'SOPuids' : SOPuids,
+                'SliceIndBySOPuid' : {SOPuid : i for i, SOPuid in 
+                                      enumerate(SOPuids)},
+                'Studyuid' : Headers[0]['Studyuid'],
+                'Seriesuid' : Headers[0]['Seriesuid'],
+                'FORuid' : Headers[0]['FORuid'],
+                'SOPClassuid' : Headers[0]['SOPClassuid'],
+                'Modality' : Headers[0]['Modality'],
+                'Positions' : Positions,
+                'IOP' : IOP,
+                'PixelSpacing' : PixelSpacing,
+                'SliceThickness' : SliceThick,
+                'Rows' : Rows,
+                'Columns' : Columns,
+                'Size' : [Columns, Rows, P],
+                'Spacings' : None if PixelSpacing is None else \
+                             PixelSpacing + [UniqueVlengths[0]],
+                'Directions' : Directions
+                }
+    
+    SeriesMetadataCache[Key] = Metadata
+    SeriesMetadataCache.move_to_end(Key)
+    
+    # Evict the least recently used series:
+    while len(SeriesMetadataCache) > SeriesMetadataCacheSize:
+        SeriesMetadataCache.popitem(last=False)
+    
+    return Metadata
 
 
 
 
 
-def ImportDicoms(DicomDir, SortMethod='slices', LogToConsole=False):
+def GetSliceIndBySOPuid(SOPuids):
+    """
+    Get a dictionary that maps SOP Instance UIDs to slice indices, so that the
+    slice index of a referenced SOP Instance UID can be found without a linear
+    search of SOPuids.
+    
+    Inputs:
+    ------
+    
+    SOPuids : list of strings
+        List of the SOP UIDs of the DICOMs (e.g. from GetDicomSOPuids()).
+        
+    
+    Outputs:
+    -------
+    
+    SliceIndBySOPuid : dictionary
+        Dictionary with SOP UIDs as keys and slice indices as values.
+        
+    
+    Notes:
+    -----
+    
+    If SOPuids are those of a series in the series metadata cache (see 
+    GetSeriesMetadata()) the cached dictionary is returned, otherwise a new 
+    one is built.  The returned dictionary must not be modified.
+    """
+    
+    for Metadata in SeriesMetadataCache.values():
+        # The list comparison is cheap since the UID strings returned by 
+        # GetDicomSOPuids() are the same objects as in the cache:
+        if Metadata['SOPuids'] == SOPuids:
+            return Metadata['SliceIndBySOPuid']
+    
+    return {SOPuid : i for i, SOPuid in enumerate(SOPuids)}
+
+
+
+
+
+
+def ClearSeriesMetadataCache():
+    """
+    Empty the process-wide cache of series metadata used by 
+    GetSeriesMetadata().
+    """
+    
+    SeriesMetadataCache.clear()
+    
+    return
+
+
+
+
+
+def ImportDicoms(DicomDir, SortMethod='slices', LogToConsole=False, 
+                 HeaderOnly=False, Workers=None, MemoryMap=False):
     """
     Import DICOM objects from a directory containing DICOM files.
     
@@ -183,6 +888,21 @@ def ImportDicoms(DicomDir, SortMethod='slices', LogToConsole=False):
             -- 'none' (or 'None' or any other strings) = no sorting
             -- 'natural' (or 'Natural') = using natsort to sort the filenames
             -- 'slices' (or 'Slices') = sorted along the slice direction 
+    
+    LogToConsole : boolean (optional; False by default)
+        Denotes whether intermediate results will be logged to the console.
+    
+    HeaderOnly : boolean (optional; False by default)
+        If True the files will be read up to (but excluding) PixelData.
+    
+    Workers : integer (optional; DicomReadWorkers by default)
+        The number of threads used to read the files concurrently.  If None, 
+        0 or 1 the files will be read sequentially.  The order of the DICOMs 
+        is the same either way.
+    
+    MemoryMap : boolean (optional; False by default)
+        If True (and HeaderOnly is False) the PixelData of each file will be
+        memory-mapped rather than read into memory (see ReadDicomMemmap()).
         
     Outputs:
     -------
@@ -192,19 +912,22 @@ def ImportDicoms(DicomDir, SortMethod='slices', LogToConsole=False):
     """
     
     from pydicom import read_file
+    from GeneralTools import MapWithWorkers
     
     #print('\nSortMethod (input for GetDicoms()) =', SortMethod)
     
-    fpaths = GetDicomFpaths(DicomDir, SortMethod, LogToConsole)
+    if Workers is None:
+        Workers = DicomReadWorkers
     
-    Dicoms = []
+    fpaths = GetDicomFpaths(DicomDir, SortMethod, LogToConsole=LogToConsole)
     
-    for f in range(len(fpaths)):
-        fpath = fpaths[f]
-        
-        dicom = read_file(fpath)
+    def ReadFile(fpath):
+        if MemoryMap and not HeaderOnly:
+            return ReadDicomMemmap(fpath)
         
-        Dicoms.append(dicom)
+        return read_file(fpath, stop_before_pixels=HeaderOnly)
+    
+    Dicoms = MapWithWorkers(ReadFile, fpaths, Workers)
         
     return Dicoms
 
@@ -244,7 +967,7 @@ def ImportDicom(DicomDir, SortMethod='slices', InStackNum=0,
     
     from pydicom import read_file
     
-    fpaths = GetDicomFpaths(DicomDir, SortMethod, LogToConsole)
+    fpaths = GetDicomFpaths(DicomDir, SortMethod, LogToConsole=LogToConsole)
     
     if InStackNum < len(fpaths):
         Dicom = read_file(fpaths[InStackNum])
@@ -283,13 +1006,9 @@ def GetDicomSOPuids(DicomDir):
         List of the SOP UIDs of the DICOMs.
     """
     
-    Dicoms = ImportDicoms(DicomDir=DicomDir, SortMethod='slices', 
-                          LogToConsole=False)
+    Metadata = GetSeriesMetadata(DicomDir)
     
-    SOPuids = [] 
-    
-    for dicom in Dicoms:
-        SOPuids.append(dicom.SOPInstanceUID)
+    SOPuids = list(Metadata['SOPuids'])
         
     return SOPuids
 
@@ -326,17 +1045,13 @@ def GetDicomUids(DicomDir):
         List of the SOP UIDs of the DICOMs.
     """
     
-    Dicoms = ImportDicoms(DicomDir=DicomDir, SortMethod='slices', 
-                          LogToConsole=False)
-    
-    SOPuids = [] 
+    Metadata = GetSeriesMetadata(DicomDir)
     
-    for dicom in Dicoms:
-        SOPuids.append(dicom.SOPInstanceUID)
+    SOPuids = list(Metadata['SOPuids'])
         
-    Studyuid = Dicoms[0].StudyInstanceUID
-    Seriesuid = Dicoms[0].SeriesInstanceUID
-    FORuid = Dicoms[0].FrameOfReferenceUID
+    Studyuid = Metadata['Studyuid']
+    Seriesuid = Metadata['Seriesuid']
+    FORuid = Metadata['FORuid']
         
     return Studyuid, Seriesuid, FORuid, SOPuids
 
@@ -77,12 +77,12 @@ def UniqueItems(Items, IgnoreZero=False):
     """
     
     import numpy as np
-    from copy import deepcopy
     
-    OrigItems = deepcopy(Items)
+    # Items is not modified so there is no need to copy it:
+    ItemsIsList = isinstance(Items, list)
     
     # If Items is a list convert to a Numpy array:
-    if isinstance(Items, list):
+    if ItemsIsList:
         #Items = np.ndarray.flatten(Items)
         Items = np.array(Items)
     
@@ -97,7 +97,7 @@ def UniqueItems(Items, IgnoreZero=False):
     UniqueItems = np.unique(Items)
     
     # If Items was a list convert back to a list:
-    if isinstance(OrigItems, list):
+    if ItemsIsList:
         UniqueItems = list(UniqueItems) # 18/12/2020
         #UniqueItems = sorted(list(UniqueItems)) # 18/12/2020
         
@@ -133,9 +133,8 @@ def AppendItemToListAndSort(OrigList, ItemToAppend):
         OrigList with ItemToAppend appended to it and sorted. 
     """
     
-    from copy import deepcopy
-    
-    NewList = deepcopy(OrigList)
+    # A shallow copy is sufficient since OrigList itself is not modified:
+    NewList = list(OrigList)
 
     NewList.append(ItemToAppend)
     
@@ -549,7 +548,7 @@ def ShiftFrame(Frame, PixShift):
         raise Exception(msg)
     
     # Initialise ShiftedFrame:
-    ShiftedFrame = np.zeros((1, R, C), dtype='uint')
+    ShiftedFrame = np.zeros((1, R, C), dtype='uint8')
     #ShiftedFrame = np.empty_like(Frame, dtype='uint') # this creates 42,932
     # unique values for some reason!
     
@@ -672,7 +671,7 @@ def MeanPixArr(PixArr, binary=True):
     F, R, C = PixArr.shape
     
     # Initialise MeanPixArr:
-    MeanPixArr = np.zeros((1, R, C), dtype='uint')
+    MeanPixArr = np.zeros((1, R, C), dtype='uint8')
     
     
     result = np.mean(PixArr, axis=0)
@@ -726,4 +725,65 @@ def Distance(item0, item1):
     else:
         msg = "The inputs must both be 2D or 3D lists of points/indices."
         
-        raise Exception(msg)
\ No newline at end of file
+        raise Exception(msg)
+
+
+
+
+
+
+def MapWithWorkers(Func, Items, Workers=None, Processes=False):
+    """
+    Apply a function to each item in a list, optionally using a pool of 
+    threads or processes, preserving the order of the items.  
+    
+    Inputs:
+    ------
+    
+    Func : function
+        Function to apply to each item.
+    
+    Items : list
+        List of items (e.g. DICOM file paths).
+    
+    Workers : integer (optional; None by default)
+        The number of threads (or processes) to use.  If None, 0 or 1 the 
+        items will be processed sequentially.
+        
+    Processes : boolean (optional; False by default)
+        If True a pool of processes will be used instead of threads.  Func 
+        must then be a module-level function, and Items (and the outputs of 
+        Func) must be picklable.
+        
+        
+    Outputs:
+    -------
+    
+    Results : list
+        List (for each item in Items) of the outputs of Func.
+        
+        
+    Notes:
+    -----
+    
+    Threads are the default since the original use is for I/O-bound tasks 
+    such as reading DICOM files from network-mounted storage, for which the 
+    latency of each read, not the parsing, dominates.  CPU-bound tasks that 
+    hold the GIL (e.g. contour tracing) need Processes=True to scale.
+    """
+    
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    
+    if not Workers or Workers < 2 or len(Items) < 2:
+        return [Func(Item) for Item in Items]
+    
+    if Processes:
+        Executor = ProcessPoolExecutor(max_workers=Workers)
+    else:
+        Executor = ThreadPoolExecutor(max_workers=Workers)
+    
+    with Executor:
+        # Executor.map() returns the results in the order of Items:
+        Results = list(Executor.map(Func, Items))
+    
+    return Results
@@ -23,6 +23,38 @@ Created on Wed Nov 11 11:56:14 2020
 #from DicomTools import ImportDicoms
 
 
+import os
+from collections import namedtuple
+
+# Immutable geometry of a DICOM series (see GetSeriesGeometry()):
+SeriesGeometry = namedtuple('SeriesGeometry', ['Size', 'Spacings', 'Origin', 
+                                               'Directions', 'Positions', 
+                                               'Affine', 'InvAffine'])
+
+# Memoised SeriesGeometry objects keyed by the absolute path of the DICOM 
+# directory (the try/except ensures that it survives importlib.reload()):
+try:
+    SeriesGeometryCache
+except NameError:
+    SeriesGeometryCache = {}
+
+# Transform parameter maps from registrations (see GetRegTxMap()) keyed by
+# the fixed and moving SeriesInstanceUIDs, transformation type and a hash of
+# the registration parameter map:
+try:
+    TxMapCache
+except NameError:
+    TxMapCache = {}
+
+# Directory of the persistent (on disk) cache of transform parameter maps
+# consulted by GetRegTxMap() (see SetTxMapCacheDir()).  Disabled (None) unless
+# the environment variable REG_TXMAP_CACHE_DIR is set:
+try:
+    TxMapCacheDir
+except NameError:
+    TxMapCacheDir = os.environ.get('REG_TXMAP_CACHE_DIR', None)
+
+
 
 
 
@@ -113,6 +145,74 @@ def ImportImage(DicomDir):
 
 
 
+def GetDicomPixArr(Dicom):
+    """
+    Get the pixel array of a DICOM object in its native data type, without 
+    copying it if PixelData is memory-mapped.
+    
+    Inputs:
+    ------
+    
+    Dicom : Pydicom object
+        DICOM object, e.g. imported using DicomTools.ReadDicomMemmap() or 
+        DicomTools.ImportDicoms() with MemoryMap = True.
+    
+    
+    Outputs:
+    -------
+    
+    PixArr : Numpy array
+        Pixel array of shape (R, C) (or (F, R, C) for multi-frame DICOMs).  If
+        PixelData is a memmap PixArr is a view of it, so only the pixels that 
+        are accessed are paged in from disk.
+    
+    
+    Notes:
+    -----
+    
+    Only uncompressed, single-sample (e.g. MONOCHROME2) images with 8, 16 or 
+    32 BitsAllocated are viewed directly.  Otherwise Dicom.pixel_array is 
+    returned.
+    """
+    
+    import numpy as np
+    
+    PixelData = Dicom.PixelData
+    
+    Bits = int(Dicom.BitsAllocated)
+    
+    IsCompressed = False
+    
+    if hasattr(Dicom, 'file_meta') and 'TransferSyntaxUID' in Dicom.file_meta:
+        IsCompressed = Dicom.file_meta.TransferSyntaxUID.is_compressed
+    
+    if IsCompressed or not Bits in [8, 16, 32] \
+    or not int(Dicom.get('SamplesPerPixel', 1)) == 1 \
+    or not isinstance(PixelData, np.ndarray):
+        return Dicom.pixel_array
+    
+    R = int(Dicom.Rows)
+    C = int(Dicom.Columns)
+    
+    F = int(getattr(Dicom, 'NumberOfFrames', 1) or 1)
+    
+    # The native data type:
+    Dtype = np.dtype(f'{"i" if Dicom.PixelRepresentation else "u"}{Bits//8}')
+    
+    Dtype = Dtype.newbyteorder('<' if Dicom.is_little_endian else '>')
+    
+    # Ignore the trailing padding byte (if any):
+    PixArr = PixelData[:F*R*C*Dtype.itemsize].view(Dtype)
+    
+    if F > 1:
+        return PixArr.reshape((F, R, C))
+    else:
+        return PixArr.reshape((R, C))
+
+
+
+
+
 def GetImageAttributes(DicomDir, Package='pydicom', LogToConsole=False):
     """
     Get image size, voxel spacings, image positions (IPPs), and direction 
@@ -164,43 +264,77 @@ def GetImageAttributes(DicomDir, Package='pydicom', LogToConsole=False):
         
     3) When using Pydicom the Directions will not be correct for coronal or 
     sagittal image stacks.    
+    
+    4) Neither option reads any PixelData.  With 'sitk' the geometry that 
+    SimpleITK would give for the imported series is derived from the DICOM
+    headers (only a single-file series is read by SimpleITK, using 
+    ReadImageInformation()).
     """
     
     import numpy as np
-    from DicomTools import ImportDicoms
-    from GeneralTools import ItemsUniqueToWithin
+    import SimpleITK as sitk
+    from DicomTools import GetSeriesMetadata
     
     
     if Package=='sitk':
-        # Import the image:
-        SitkIm = ImportImage(DicomDir)
+        """
+        Rather than importing the image (which reads and casts every voxel), 
+        derive the geometry that SimpleITK's ImageSeriesReader would give 
+        from the (cached) series metadata.
+        """
+        Metadata = GetSeriesMetadata(DicomDir)
         
-        Size = SitkIm.GetSize()
+        CheckGeometryMetadata(Metadata)
         
-        Spacings = SitkIm.GetSpacing()
+        Size = tuple(int(item) for item in Metadata['Size'])
         
-        #Origin = SitkIm.GetOrigin() 
+        # The row and column direction cosines, and the slice normal:
+        IOP = np.array(Metadata['IOP'], dtype=float)
         
-        Positions = []
+        X = IOP[:3]
+        Y = IOP[3:]
+        Z = np.cross(X, Y)
         
-        for i in range(Size[2]):
-            Positions.append(SitkIm.TransformIndexToPhysicalPoint((0, 0, i)))
+        IPPs = np.array(Metadata['Positions'], dtype=float)
         
-        Directions = SitkIm.GetDirection() 
+        if len(IPPs) > 1:
+            # The files are ordered along the slice normal, so the origin is
+            # the IPP with the smallest projection along Z, and the slice 
+            # spacing is the distance between the first and last IPPs divided
+            # by the number of gaps:
+            Projs = IPPs @ Z
+            
+            First = IPPs[np.argmin(Projs)]
+            Last = IPPs[np.argmax(Projs)]
+            
+            Zspacing = float(np.linalg.norm(Last - First))/(len(IPPs) - 1)
+            
+            Origin = First
+            
+            # The direction matrix (in row-major order) has columns X, Y, Z:
+            Directions = tuple(float(item) for item in 
+                               np.stack((X, Y, Z), axis=1).ravel())
+        else:
+            # Read the geometry of the single file (without its PixelData):
+            Reader = sitk.ImageFileReader()
+            Reader.SetFileName(Metadata['FilePaths'][0])
+            Reader.ReadImageInformation()
+            
+            Zspacing = Reader.GetSpacing()[2]
+            
+            Origin = np.array(Reader.GetOrigin(), dtype=float)
+            
+            Directions = Reader.GetDirection()
+            
+            Z = np.array(Directions[2::3], dtype=float)
         
+        Spacings = (float(Metadata['PixelSpacing'][1]), 
+                    float(Metadata['PixelSpacing'][0]), Zspacing)
         
-        """
-        Since ImageSeriesReader() (invoked in ImportImage()) doesn't allow for
-        calling ReadImageInformation(), it's not straightforward to get 
-        metadata using sitk.  So instead get the FOR UID and SliceThickness 
-        using Pydicom.
-        """
-        # Import the DICOMs:
-        Dicoms = ImportDicoms(DicomDir=DicomDir, 
-                              SortMethod='slices', 
-                              LogToConsole=False)
+        Positions = [tuple(float(item) for item in Origin + i*Zspacing*Z) 
+                     for i in range(Size[2])]
         
-        SliceThick = float(Dicoms[0].SliceThickness)
+        SliceThick = Metadata['SliceThickness']
         
         
         
@@ -211,111 +345,173 @@ def GetImageAttributes(DicomDir, Package='pydicom', LogToConsole=False):
             The components need to be switched around the coronal or sagittal.
         """
         
-        # Import the DICOMs:
-        Dicoms = ImportDicoms(DicomDir=DicomDir, 
-                              SortMethod='slices', 
-                              LogToConsole=False)
+        # Get the (cached) series metadata, which also checks that the IPPs
+        # are unique and the slice spacings are uniform:
+        Metadata = GetSeriesMetadata(DicomDir)
         
+        CheckGeometryMetadata(Metadata)
         
-        Size = [int(Dicoms[0].Columns), int(Dicoms[0].Rows), len(Dicoms)]
+        Size = list(Metadata['Size'])
         
+        Positions = [list(Position) for Position in Metadata['Positions']]
         
-        #Origin = [float(item) for item in Dicoms[0].ImagePositionPatient]
+        Directions = list(Metadata['Directions'])
         
-        Positions = []
-    
-        for dicom in Dicoms:
-            Positions.append([float(item) for item in dicom.ImagePositionPatient])
-        
-        
-        # Check if all IPPs are unique.
-        """
-        Some scans ("ep2ddiff3scantracep2") have repeated IPPs.
+        """ 
+        Don't use SliceThickness for the z-component of the voxel spacing. 
+        Instead the difference between slices from the IPP is used.
         """
+        Spacings = list(Metadata['Spacings'])
         
-        # Get unique positions:
-        #UniquePositions = list(set(Positions))
-        #UniquePositions = np.unique(np.array(Positions))
-        UniquePositions = np.array(list(set(tuple(p) for p in Positions)))
+        SliceThick = Metadata['SliceThickness']
         
-        P = len(Positions)
-        U = len(UniquePositions)
         
-        if U != P:
-            print(f'\nWarning:  There are only {U} unique IPPs within the',
-                  f'list of {P} IPPs.\n')
         
+    if LogToConsole:
+        print(f'\nSize = {Size} \nSpacings = {Spacings}',
+              f'\nSliceThickness = {SliceThick} \nPositions = {Positions}',
+              f'\nDirections = {Directions}')
+    
+    
+    return Size, Spacings, SliceThick, Positions, Directions
+
+
+
+
+
+
+
+def CheckGeometryMetadata(Metadata):
+    """
+    Check that the series metadata (see DicomTools.GetSeriesMetadata()) has
+    the tags required for the image geometry.
+    
+    Inputs:
+    ------
         
-        IOP = [float(item) for item in Dicoms[0].ImageOrientationPatient]
-        
-        # Get the direction vector along z using the cross product of the x and 
-        # y vectors:
-        zDir = np.cross(IOP[0:3], IOP[3:])
-        
-        # Append zDir to IOP:
-        Directions = IOP
-        Directions.extend(zDir)
-        
-        
-        
-        Spacings = [float(item) for item in Dicoms[0].PixelSpacing]
-        
-        SliceThick = float(Dicoms[0].SliceThickness)
-        
-        """ 
-        Don't use SliceThickness for the z-component of the voxel spacing. 
-        Instead use the difference between slices from the IPP.
-        """
-        # Append SliceThick to Spacings:
-        #Spacings.append(SliceThick)
+    Metadata : dictionary
+        The series metadata.
         
-        # Compute the slice spacings along the z-direction:
-        #Dz = np.diff(np.array(Positions), axis=0)[:,2] # <-- WRONG since it doesn't account for IOP
         
-        ##UniqueDz = list(set(Dz))
-        #UniqueDz = ItemsUniqueToWithin(Dz)
+    Outputs:
+    -------
+    
+    None
+    
+    
+    Notes:
+    -----
+    
+    An exception is raised if ImageOrientationPatient, PixelSpacing, Rows or
+    Columns is missing, or if SliceThickness is missing for a single-file 
+    series (for which the slice spacing can't be obtained from the IPPs).
+    """
+    
+    Missing = []
+    
+    if Metadata['IOP'] is None:
+        Missing.append('ImageOrientationPatient')
+    
+    if Metadata['PixelSpacing'] is None:
+        Missing.append('PixelSpacing')
+    elif Metadata['Spacings'][2] is None:
+        Missing.append('SliceThickness')
+    
+    if Metadata['Rows'] is None:
+        Missing.append('Rows')
+    
+    if Metadata['Columns'] is None:
+        Missing.append('Columns')
+    
+    if Missing:
+        msg = f"The DICOMs in {Metadata['DicomDir']} don't have the tag(s) "\
+              + f"{', '.join(Missing)} required for the image geometry."
         
-        # Compute the vector lengths of the IPP differences:
-        Vlengths = []
+        raise Exception(msg)
+    
+    return
 
-        for i in range(len(Positions) - 1):
-            vector = np.array(Positions[i + 1]) - np.array(Positions[i])
-            
-            vectorL = (vector[0]**2 + vector[1]**2 + vector[2]**2)**0.5
-            
-            Vlengths.append(vectorL)
-            
-        UniqueVlengths = ItemsUniqueToWithin(Vlengths)
-        
-        # Append UniqueVlengths to Spacings:
-        Spacings.append(UniqueVlengths[0])
-        
-        if len(UniqueVlengths) > 1:
-            print('\nWarning:')
-            print('    The voxel spacings along the scan direction are',
-                  'non-uniform with the following unique values:\n')
-            print('   ', UniqueVlengths, '\n')
+
+
+
+
+def GetSeriesGeometry(DicomDir):
+    """
+    Get the (memoised) geometry of a DICOM series.
+    
+    Inputs:
+    ------
         
+    DicomDir : string
+        Directory containing DICOMs.
         
-        # Compare UniqueDz to SliceThickness:    
-        #epsilon = 1e-5
-        #
-        #if abs(SliceThick - UniqueDz[0]) > epsilon:
-        #    print('\nNote:')
-        #    print('    The slice thickness obtained from the IPPs do not',
-        #          'agree with the DICOM tag SliceThickness:')
-        #    print(f'      d(IPP[2])      = {UniqueDz[0]}')
-        #    print(f'      SliceThickness = {SliceThick}')
         
+    Outputs:
+    -------
     
-        
-    if LogToConsole:
-        print(f'\nSize = {Size} \nSpacings = {Spacings}',
-              f'\nSliceThickness = {SliceThick} \nPositions = {Positions}',
-              f'\nDirections = {Directions}')
+    Geometry : SeriesGeometry (namedtuple)
+        Immutable object with the attributes:
+            -- Size : tuple of integers [Columns, Rows, NumOfSlices]
+            -- Spacings : tuple of floats [di, dj, dk]
+            -- Origin : tuple of floats (the IPP of the first slice)
+            -- Directions : tuple of floats 
+            [Xx, Xy, Xz, Yx, Yy, Yz, Zx, Zy, Zz]
+            -- Positions : read-only Numpy array (NumOfSlices x 3) of the 
+            IPPs of all slices
+            -- Affine : read-only 4x4 Numpy array mapping indices to points
+            (see ConversionTools.GetInd2PtAffine())
+            -- InvAffine : read-only 4x4 Numpy array mapping points to indices
+        The attributes are the same as those returned by 
+        GetImageAttributes(Package='pydicom').
     
     
-    return Size, Spacings, SliceThick, Positions, Directions
+    Notes:
+    -----
+    
+    The geometry is built from the (cached) series metadata (see 
+    DicomTools.GetSeriesMetadata()) and memoised until the DICOM directory 
+    changes.  It can be passed as the Geometry argument of the conversion 
+    functions in ConversionTools in place of Origin, Directions and Spacings.
+    """
+    
+    import numpy as np
+    from DicomTools import GetSeriesMetadata
+    from ConversionTools import GetInd2PtAffine
+    
+    Metadata = GetSeriesMetadata(DicomDir)
+    
+    Key = Metadata['DicomDir']
+    
+    Cached = SeriesGeometryCache.get(Key)
+    
+    if Cached is not None and Cached[0] == Metadata['Fingerprint']:
+        return Cached[1]
+    
+    CheckGeometryMetadata(Metadata)
+    
+    Positions = np.array(Metadata['Positions'], dtype=float)
+    
+    Affine, InvAffine = GetInd2PtAffine(Origin=Positions[0], 
+                                        Directions=Metadata['Directions'], 
+                                        Spacings=Metadata['Spacings'])
+    
+    # Make the arrays read-only:
+    for Arr in [Positions, Affine, InvAffine]:
+        Arr.flags.writeable = False
+    
+    Geometry = SeriesGeometry(Size=tuple(Metadata['Size']), 
+                              Spacings=tuple(float(item) for item in 
+                                             Metadata['Spacings']), 
+                              Origin=tuple(Metadata['Positions'][0]), 
+                              Directions=tuple(float(item) for item in 
+                                               Metadata['Directions']), 
+                              Positions=Positions, 
+                              Affine=Affine, 
+                              InvAffine=InvAffine)
+    
+    SeriesGeometryCache[Key] = (Metadata['Fingerprint'], Geometry)
+    
+    return Geometry
 
 
 
@@ -527,7 +723,7 @@ def SumAllLabmapIms(LabmapIms):
 
 
 
-def ResampleImage(Image, RefImage, Interpolation):
+def ResampleImage(Image, RefImage, Interpolation, Crop=False):
     """
     Resample a 3D SimpleITK image.  The image can be a 3D DICOM image or a
     3D labelmap image.
@@ -549,6 +745,11 @@ def ResampleImage(Image, RefImage, Interpolation):
         'nearestneighbour')
         - 'Gaussian' (or 'gaussian')
     
+    Crop : boolean (optional; False by default)
+        If True only the part of RefImage's grid that intersects the bounding
+        box of the non-zero voxels in Image will be resampled (see Notes).  
+        This is ignored for BSpline interpolation.
+    
     
     Outputs:
     -------
@@ -562,15 +763,30 @@ def ResampleImage(Image, RefImage, Interpolation):
         While a linear (or BSpline) interpolator is appropriate for intensity 
         images, only a NearestNeighbor interpolator is appropriate for binary 
         images (e.g. segmentations) so that no new labels are introduced.
+        
+        Crop is intended for labelmaps with a small non-zero region (e.g. a 
+        single contour or segmentation), for which resampling the entire 
+        Target grid is wasteful.  The bounding box of the non-zero voxels 
+        (padded by the support of the interpolator) is mapped to RefImage's 
+        grid, only that sub-grid is resampled, and the result is pasted into
+        an (otherwise zero) image with the geometry of RefImage.  
+        
+        BSpline interpolation prefilters the entire image, so the ringing
+        about the non-zero voxels extends well beyond the support of the 
+        interpolator, and cropping would zero those values.  The entire grid 
+        is therefore resampled for BSpline interpolation even if Crop is 
+        True.
     """
 
     import SimpleITK as sitk
     
     # Define which interpolator to use:
-    if ('earest' and 'eighbo' or 'nn' or 'NN') in Interpolation:    
+    if 'earest' in Interpolation or Interpolation in ['nn', 'NN']:
         Interpolator = sitk.sitkNearestNeighbor
         
-        OutputPixelType = sitk.sitkUInt64
+        # Labelmaps are 8-bit (see PixArr2Labmap) so there is no need for a
+        # wider integer type:
+        OutputPixelType = sitk.sitkUInt8
     
     else:
         if 'inear' in Interpolation:
@@ -617,7 +833,73 @@ def ResampleImage(Image, RefImage, Interpolation):
     #Resampler.AddCommand(sitk.sitkProgressEvent, lambda: print("\rProgress: {0:03.1f}%...".format(100*Resampler.GetProgress()),end=''))
     #Resampler.AddCommand(sitk.sitkProgressEvent, lambda: sys.stdout.flush())
     
-    ResImage = Resampler.Execute(Image)
+    if not Crop or Interpolator == sitk.sitkBSpline:
+        ResImage = Resampler.Execute(Image)
+        
+        return ResImage
+    
+    import numpy as np
+    import itertools
+    
+    # An empty image with the geometry of RefImage:
+    ResImage = sitk.Image(RefImage.GetSize(), OutputPixelType)
+    
+    ResImage.CopyInformation(RefImage)
+    
+    # Get a read-only view of Image's buffer (indexed [k, j, i]):
+    Nda = sitk.GetArrayViewFromImage(Image)
+    
+    Non0FrameInds = np.flatnonzero(Nda.any(axis=(1, 2)))
+    
+    if not len(Non0FrameInds):
+        return ResImage
+    
+    Non0Frames = Nda[Non0FrameInds[0]:Non0FrameInds[-1] + 1] != 0
+    
+    Non0Rows = np.flatnonzero(Non0Frames.any(axis=(0, 2)))
+    Non0Cols = np.flatnonzero(Non0Frames.any(axis=(0, 1)))
+    
+    # The support (in voxels) of the interpolator:
+    Margin = {sitk.sitkNearestNeighbor : 0.5, 
+              sitk.sitkLinear : 1, 
+              sitk.sitkLabelGaussian : 4}[Interpolator]
+    
+    # The (padded) bounding box of the non-zero voxels in Image (as [i, j, k]
+    # continuous indices):
+    Mins = [Non0Cols[0] - Margin, Non0Rows[0] - Margin, 
+            Non0FrameInds[0] - Margin]
+    Maxs = [Non0Cols[-1] + Margin, Non0Rows[-1] + Margin, 
+            Non0FrameInds[-1] + Margin]
+    
+    # Map the corners of the bounding box to indices in RefImage:
+    Corners = [RefImage.TransformPhysicalPointToContinuousIndex(
+                   Image.TransformContinuousIndexToPhysicalPoint(
+                       [float(item) for item in Corner]
+                       )
+                   ) for Corner in itertools.product(*zip(Mins, Maxs))]
+    
+    Corners = np.array(Corners)
+    
+    Start = np.maximum(np.floor(Corners.min(axis=0)), 0).astype(int)
+    End = np.minimum(np.ceil(Corners.max(axis=0)), 
+                     np.array(RefImage.GetSize()) - 1).astype(int)
+    
+    if (End < Start).any():
+        return ResImage
+    
+    Size = [int(item) for item in End - Start + 1]
+    Start = [int(item) for item in Start]
+    End = [int(item) for item in End]
+    
+    # Resample the sub-grid of RefImage:
+    Resampler.SetSize(Size)
+    Resampler.SetOutputOrigin(RefImage.TransformIndexToPhysicalPoint(Start))
+    
+    CroppedResImage = Resampler.Execute(Image)
+    
+    # Paste it into ResImage (in place):
+    ResImage[Start[0]:End[0] + 1, Start[1]:End[1] + 1, 
+             Start[2]:End[2] + 1] = CroppedResImage
     
     #sitk.Show(ResImage)
 
@@ -629,6 +911,48 @@ def ResampleImage(Image, RefImage, Interpolation):
 
 
 
+def GetRegParamMap(Tx='affine'):
+    """
+    Get the Elastix parameter map used by RegisterImages().
+    
+    Inputs:
+    ------
+    
+    Tx : string (optional; 'affine' by default)
+        Denotes type of transformation to use for registration.  Acceptable
+        values include:
+        - 'rigid'
+        - 'affine'
+        - 'bspline' (i.e. deformable)
+    
+    
+    Returns:
+    -------
+    
+    ParamMap : SimpleITK parameter map
+        The default parameter map for Tx with some re-assigned parameters.
+    """
+    
+    import SimpleITK as sitk
+    
+    # Get the default parameter map template for the chosen transformation:
+    ParamMap = sitk.GetDefaultParameterMap(Tx)
+    
+    # Re-assign some parameters:
+    ParamMap['AutomaticTransformInitialization'] = ['true']
+    ParamMap['AutomaticTransformInitializationMethod'] = ['GeometricalCenter']
+    ParamMap['WriteIterationInfo'] = ['true']
+    ParamMap['MaximumNumberOfIterations'] = ['512']
+    ParamMap['UseDirectionCosines'] = ['true']
+    """ 29/05: Trying this instead of trying to change it for Transformix """
+    #ElastixParamMap['FinalBSplineInterpolationOrder'] = ['0']
+    
+    return ParamMap
+
+
+
+
+
 def RegisterImages(FixIm, MovIm, Tx='affine', LogToConsole=False):
     """
     Register two 3D SimpleITK images using SimpleElastix.
@@ -680,19 +1004,10 @@ def RegisterImages(FixIm, MovIm, Tx='affine', LogToConsole=False):
     RegImFilt.SetFixedImage(FixIm)
     RegImFilt.SetMovingImage(MovIm)
     
-    # Get the default parameter map template for the chosen transformation:
+    # Get the parameter map for the chosen transformation:
     #RegImFilt.SetParameterMap(sitk.GetDefaultParameterMap('affine'))
     #ParamMap = sitk.GetDefaultParameterMap('affine')
-    ParamMap = sitk.GetDefaultParameterMap(Tx)
-    
-    # Re-assign some parameters:
-    ParamMap['AutomaticTransformInitialization'] = ['true']
-    ParamMap['AutomaticTransformInitializationMethod'] = ['GeometricalCenter']
-    ParamMap['WriteIterationInfo'] = ['true']
-    ParamMap['MaximumNumberOfIterations'] = ['512']
-    ParamMap['UseDirectionCosines'] = ['true']
-    """ 29/05: Trying this instead of trying to change it for Transformix """
-    #ElastixParamMap['FinalBSplineInterpolationOrder'] = ['0'] 
+    ParamMap = GetRegParamMap(Tx)
     
     # Print the parameters:
     #for keys,values in ElastixParamMap.items():
@@ -721,7 +1036,265 @@ def RegisterImages(FixIm, MovIm, Tx='affine', LogToConsole=False):
 
 
 
-def TransformImage(Im, RegImFilt, Interpolation='Default'):
+def SetTxMapCacheDir(CacheDir):
+    """
+    Set the directory of the persistent cache of transform parameter maps
+    that is consulted by GetRegTxMap().
+    
+    Inputs:
+    ------
+    
+    CacheDir : string or None
+        Directory in which the transform parameter maps will be stored
+        (created if it doesn't exist).  If None the persistent cache is
+        disabled (the transform parameter maps are still cached in memory).
+    
+    
+    Outputs:
+    -------
+    
+    None
+    
+    
+    Notes:
+    -----
+    
+    The cache can also be enabled by setting the environment variable
+    REG_TXMAP_CACHE_DIR prior to importing ImageTools.
+    """
+    
+    global TxMapCacheDir
+    
+    TxMapCacheDir = CacheDir
+    
+    return
+
+
+
+
+
+def GetRegTxMap(FixDicomDir, MovDicomDir, FixIm=None, MovIm=None,
+                Tx='affine', LogToConsole=False):
+    """
+    Get the transform parameter map that registers the image of one DICOM
+    series to that of another, re-using the result of any previous
+    registration of the same pair of series.
+    
+    Inputs:
+    ------
+    
+    FixDicomDir : string
+        Directory containing the DICOMs of the fixed image.
+    
+    MovDicomDir : string
+        Directory containing the DICOMs of the moving image.
+    
+    FixIm : SimpleITK image (optional; None by default)
+        The 3D fixed image.  If None and a registration is required it will
+        be imported from FixDicomDir.
+    
+    MovIm : SimpleITK image (optional; None by default)
+        The 3D moving image.  If None and a registration is required it will
+        be imported from MovDicomDir.
+    
+    Tx : string (optional; 'affine' by default)
+        Denotes type of transformation to use for registration (see
+        RegisterImages()).
+    
+    LogToConsole : boolean (optional; False by default)
+        Denotes whether intermediate results will be logged to the console.
+    
+    
+    Returns:
+    -------
+    
+    TxMap : tuple of SimpleITK parameter maps
+        The transform parameter map (as returned by the
+        GetTransformParameterMap() method of the Elastix image filter), which
+        can be passed to TransformImage().
+    
+    
+    Notes:
+    -----
+    
+    The transform parameter maps are cached (in TxMapCache, and as JSON files
+    in TxMapCacheDir if it has been set) keyed by the SeriesInstanceUIDs of
+    the fixed and moving series, Tx and a hash of the registration parameter
+    map (see GetRegParamMap()), so repeated copies between the same pair of
+    series skip the registration entirely.
+    """
+    
+    import SimpleITK as sitk
+    import hashlib
+    import json
+    from DicomTools import GetSeriesMetadata
+    
+    # A hash of the registration parameter map:
+    ParamMap = GetRegParamMap(Tx)
+    
+    ParamMapStr = json.dumps(sorted((Name, list(Value)) for Name, Value
+                                    in ParamMap.items()))
+    
+    ParamMapHash = hashlib.sha1(ParamMapStr.encode()).hexdigest()
+    
+    FixSeriesuid = GetSeriesMetadata(FixDicomDir)['Seriesuid']
+    MovSeriesuid = GetSeriesMetadata(MovDicomDir)['Seriesuid']
+    
+    Key = (FixSeriesuid, MovSeriesuid, Tx, ParamMapHash)
+    
+    # The file name of the cached transform parameter map in TxMapCacheDir:
+    Fname = hashlib.sha1('_'.join(Key).encode()).hexdigest() + '.json'
+    
+    TxMap = TxMapCache.get(Key, None)
+    
+    if TxMap is None and TxMapCacheDir:
+        Fpath = os.path.join(TxMapCacheDir, Fname)
+        
+        if os.path.isfile(Fpath):
+            with open(Fpath, 'r') as File:
+                TxMap = tuple(json.load(File)['TxMap'])
+            
+            if LogToConsole:
+                print(f'\nThe transform parameter map was read from {Fpath}')
+    
+    if TxMap is None:
+        if FixIm is None:
+            FixIm = ImportImage(FixDicomDir)
+        
+        if MovIm is None:
+            MovIm = ImportImage(MovDicomDir)
+        
+        RegIm, RegImFilt = RegisterImages(FixIm=FixIm, MovIm=MovIm, Tx=Tx,
+                                          LogToConsole=LogToConsole)
+        
+        # Store the transform parameter map as a tuple of dictionaries (of
+        # lists of strings):
+        TxMap = tuple(dict((Name, list(Value)) for Name, Value in Map.items())
+                      for Map in RegImFilt.GetTransformParameterMap())
+        
+        if TxMapCacheDir:
+            os.makedirs(TxMapCacheDir, exist_ok=True)
+            
+            Fpath = os.path.join(TxMapCacheDir, Fname)
+            
+            # Write to a temporary file first so that a partially written
+            # file is never read:
+            with open(Fpath + '.tmp', 'w') as File:
+                json.dump({'Key' : list(Key), 'TxMap' : list(TxMap)}, File)
+            
+            os.replace(Fpath + '.tmp', Fpath)
+    
+    elif LogToConsole:
+        print('\nRe-using the transform parameter map from a previous',
+              'registration of the same series.')
+    
+    TxMapCache[Key] = TxMap
+    
+    # Return new SimpleITK parameter maps (so that the cached maps can't be
+    # modified, e.g. by TransformImage()):
+    NewTxMap = []
+    
+    for Map in TxMap:
+        NewMap = sitk.ParameterMap()
+        
+        for Name, Value in Map.items():
+            NewMap[Name] = list(Value)
+        
+        NewTxMap.append(NewMap)
+    
+    return tuple(NewTxMap)
+
+
+
+
+
+def GetTxMatrixFromTxMap(TxMap):
+    """
+    Get the 4x4 affine matrix of the transformation described by a transform
+    parameter map.
+    
+    Inputs:
+    ------
+    
+    TxMap : tuple of SimpleITK parameter maps
+        The transform parameter map (e.g. from GetRegTxMap(), or the
+        GetTransformParameterMap() method of the Elastix image filter).
+    
+    
+    Returns:
+    -------
+    
+    TxMatrix : Numpy array or None
+        4x4 array A such that [x', y', z', 1] = A.[x, y, z, 1], where [x, y, z]
+        is a physical point in the fixed image domain and [x', y', z'] is the
+        corresponding point in the moving image domain.  None if TxMap is not
+        a single 'TranslationTransform', 'EulerTransform' or 'AffineTransform'
+        (e.g. a B-spline transform), i.e. if the transformation can't be
+        described by a matrix.
+    
+    
+    Notes:
+    -----
+    
+    The transforms are of the form T(x) = R.(x - c) + c + t, where R is the
+    rotation (or affine) matrix, c is the CenterOfRotationPoint and t is the
+    translation (as in ITK's MatrixOffsetTransformBase).
+    """
+    
+    import numpy as np
+    
+    if len(TxMap) != 1:
+        return None
+    
+    Map = TxMap[0]
+    
+    Transform = Map['Transform'][0]
+    
+    Params = np.array(Map['TransformParameters'], dtype=float)
+    
+    if 'CenterOfRotationPoint' in Map.keys():
+        Centre = np.array(Map['CenterOfRotationPoint'], dtype=float)
+    else:
+        Centre = np.zeros(3)
+    
+    if Transform == 'TranslationTransform':
+        R = np.eye(3)
+        t = Params[0:3]
+    
+    elif Transform == 'EulerTransform':
+        cx, cy, cz = np.cos(Params[0:3])
+        sx, sy, sz = np.sin(Params[0:3])
+        
+        Rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+        Ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+        Rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+        
+        if 'ComputeZYX' in Map.keys() and Map['ComputeZYX'][0] == 'true':
+            R = Rz @ Ry @ Rx
+        else:
+            R = Rz @ Rx @ Ry
+        
+        t = Params[3:6]
+    
+    elif Transform == 'AffineTransform':
+        R = Params[0:9].reshape(3, 3)
+        t = Params[9:12]
+    
+    else:
+        return None
+    
+    TxMatrix = np.eye(4)
+    
+    TxMatrix[:3, :3] = R
+    TxMatrix[:3, 3] = Centre + t - R @ Centre
+    
+    return TxMatrix
+
+
+
+
+
+def TransformImage(Im, RegImFilt=None, Interpolation='Default', TxMap=None):
     """
     Transform a 3D SimpleITK image using SimpleElastix.
     
@@ -739,9 +1312,13 @@ def TransformImage(Im, RegImFilt, Interpolation='Default'):
         accepatable values are:
         - 'Default' (or 'default') which leaves unchanged whatever interpolator
         has been set in RegImFilt
-        - 'NearestNeighbor' (or 'NearestNeighbour' or 'nearestneighbor' or 
+        - 'NearestNeighbor' (or 'NearestNeighbour' or 'nearestneighbor' or
         'nearestneighbour')
-        
+    
+    TxMap : tuple of SimpleITK parameter maps (optional; None by default)
+        The transform parameter map (e.g. from GetRegTxMap()).  If None the
+        transform parameter map of RegImFilt will be used.
+
         
     Returns:
     -------
@@ -773,7 +1350,8 @@ def TransformImage(Im, RegImFilt, Interpolation='Default'):
     
     # Set the parameter map:
     #TxImFilt.SetTransformParameterMap(RegImFilt.GetTransformParameterMap())
-    TxMap = RegImFilt.GetTransformParameterMap()
+    if TxMap is None:
+        TxMap = RegImFilt.GetTransformParameterMap()
     
     #print(f'\nTxMap[0]["ResampleInterpolator"] = {TxMap[0]["ResampleInterpolator"]}')
     
@@ -796,6 +1374,126 @@ def TransformImage(Im, RegImFilt, Interpolation='Default'):
 
 
 
+def TransformLabmapIms(LabmapIms, RegImFilt=None, TxMap=None,
+                       LogToConsole=False):
+    """
+    Transform a list of 3D labelmap (SimpleITK) images (e.g. one per ROI or
+    segment) using SimpleElastix, warping all of the labelmaps in a single
+    pass.
+    
+    Inputs:
+    ------
+    
+    LabmapIms : list of SimpleITK images
+        The 3D binary labelmap images to be transformed (all of which must
+        share the same geometry).
+    
+    RegImFilt : SimpleITK image filter (optional; None by default)
+        Elastix image transformation filter used to perform image
+        registration.  Not required if TxMap is provided.
+    
+    TxMap : tuple of SimpleITK parameter maps (optional; None by default)
+        The transform parameter map (e.g. from GetRegTxMap()).  If None the
+        transform parameter map of RegImFilt will be used.
+    
+    LogToConsole : boolean (optional; False by default)
+        Denotes whether intermediate results will be logged to the console.
+    
+    
+    Returns:
+    -------
+    
+    TxLabmapIms : list of SimpleITK images
+        The 3D transformed (uint8) labelmap images - one per labelmap in
+        LabmapIms.
+    
+    
+    Notes:
+    -----
+    
+    Each labelmap is assigned a bit in a uint32 image (so overlapping
+    labelmaps are preserved), which is transformed once using a nearest
+    neighbour interpolator.  The transformed labelmaps are then recovered
+    from the bit planes of the result.  
+    
+    Transformix casts the result to float32, whose 24-bit significand 
+    represents the integers up to 2**24 exactly, so up to 24 labelmaps are 
+    packed into each image.  The labelmaps are therefore transformed in 
+    chunks of 24, i.e. in ceil(len(LabmapIms)/24) warps (one for up to 24 
+    ROIs or segments) rather than one per labelmap.  The cost of each warp 
+    doesn't depend on the number of labelmaps packed into it, and the 
+    packing and unpacking are a few vectorised operations per labelmap.
+    """
+    
+    import SimpleITK as sitk
+    import numpy as np
+    
+    # The number of labelmaps that will be packed into each image (the 
+    # number of bits in the significand of a float32):
+    BitsPerIm = 24
+    
+    TxLabmapIms = []
+    
+    for a in range(0, len(LabmapIms), BitsPerIm):
+        Ims = LabmapIms[a:a+BitsPerIm]
+        
+        # Pack the labelmaps into the bit planes of a single image:
+        PackedArr = np.zeros(sitk.GetArrayViewFromImage(Ims[0]).shape,
+                             dtype=np.uint32)
+        
+        for i in range(len(Ims)):
+            Arr = sitk.GetArrayViewFromImage(Ims[i])
+            
+            PackedArr |= (Arr > 0).astype(np.uint32) << np.uint32(i)
+        
+        PackedIm = sitk.GetImageFromArray(PackedArr)
+        
+        PackedIm.CopyInformation(Ims[0])
+        
+        if TxMap is not None:
+            # Copy TxMap since TransformImage() changes the interpolator:
+            NewTxMap = []
+            
+            for Map in TxMap:
+                NewMap = sitk.ParameterMap()
+                
+                for Name, Value in Map.items():
+                    NewMap[Name] = list(Value)
+                
+                NewTxMap.append(NewMap)
+        else:
+            NewTxMap = None
+        
+        TxPackedIm = TransformImage(Im=PackedIm, RegImFilt=RegImFilt,
+                                    Interpolation='NearestNeighbor',
+                                    TxMap=NewTxMap)
+        
+        # The result may have been cast to float by Elastix:
+        TxPackedArr = np.rint(sitk.GetArrayViewFromImage(TxPackedIm))
+        
+        TxPackedArr = TxPackedArr.astype(np.uint32)
+        
+        # Split the bit planes into labelmaps (one at a time, rather than
+        # broadcasting, so that only one unpacked labelmap is held at once):
+        for i in range(len(Ims)):
+            TxArr = ((TxPackedArr >> np.uint32(i)) & 1).astype(np.uint8)
+            
+            TxLabmapIm = sitk.GetImageFromArray(TxArr)
+            
+            TxLabmapIm.CopyInformation(TxPackedIm)
+            
+            TxLabmapIms.append(TxLabmapIm)
+    
+    if LogToConsole:
+        print(f'\n{len(LabmapIms)} labelmaps were transformed in',
+              f'{-(-len(LabmapIms)//BitsPerIm)} pass(es).')
+    
+    return TxLabmapIms
+
+
+
+
+
 def BinaryThresholdImage(Im, Thresh=0.5):
     """
     Binary threshold a 3D SimpleITK image.
@@ -272,28 +272,30 @@ def PlotImagesAndContours(Image, ImageType, DicomDir, RtsFpath,
 def PlotDicomsAndSegments(DicomDir, SegFpath, ExportPlot, ExportDir, 
                           LogToConsole):
     
-    from pydicom import dcmread
     import numpy as np
     import os
     import matplotlib.pyplot as plt
     from DicomTools import ImportDicoms
     from DicomTools import GetDicomSOPuids
     from SegTools import GetPFFGStoSliceInds
+    from SegTools import GetSegFrames
+    from SegTools import ImportSeg
+    from ImageTools import GetDicomPixArr
     
-    # Import the DICOMs:
-    Dicoms = ImportDicoms(DicomDir=DicomDir)
+    # Import the DICOMs (with memory-mapped PixelData):
+    Dicoms = ImportDicoms(DicomDir=DicomDir, MemoryMap=True)
     
     # Get the DICOM SOP UIDs:
     SOPuids = GetDicomSOPuids(DicomDir=DicomDir)
     
     # Import the SEG ROI:
-    SegRoi = dcmread(SegFpath)
+    SegRoi = ImportSeg(SegFpath)
     
     # Get the Per-frameFunctionalGroupsSequence-to-slice indices:
     PFFGStoSliceInds = GetPFFGStoSliceInds(SegRoi, SOPuids)
     
-    # The 3D labelmap:
-    SegNpa = SegRoi.pixel_array
+    # The 3D labelmap (unpacked frame-by-frame from PixelData):
+    SegNpa = GetSegFrames(SegRoi, range(len(PFFGStoSliceInds)))
     
     if LogToConsole:
         print(f'Segments exist on slices {PFFGStoSliceInds}')
@@ -344,11 +346,11 @@ def PlotDicomsAndSegments(DicomDir, SegFpath, ExportPlot, ExportDir,
         #ax = plt.subplot(Nrows, Ncols, n, aspect=AR)
           
         # Plot the DICOM pixel array:
-        ax.imshow(Dicoms[s].pixel_array, cmap=plt.cm.Greys_r)
+        ax.imshow(GetDicomPixArr(Dicoms[s]), cmap=plt.cm.Greys_r)
         #ax.set_aspect(ar)
         
         if LogToConsole:
-            print(f'\nShape of Dicoms[{s}] = {Dicoms[s].pixel_array.shape}')
+            print(f'\nShape of Dicoms[{s}] = {GetDicomPixArr(Dicoms[s]).shape}')
             print(f'\nShape of SegNpa[{i}] = {SegNpa[i].shape}')
         
         # Plot the segment pixel array:
@@ -329,7 +329,7 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         hence the default value None.
     
     AddText : string (optional, '' by default)
-        Sting of text to pass to ModifyRts/ModifySeg to be used when generating
+        Sting of text to pass to CreateRts to be used when generating
         a filename for the new Target RTS/SEG.
                            
     LogToConsole : boolean (default False)
@@ -361,8 +361,7 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
     from GeneralTools import GetPixelShiftBetweenSlices
     from GeneralTools import ShiftFrame
     from GeneralTools import MeanPixArr
-    from RtsTools import InitialiseRts
-    from RtsTools import ModifyRts
+    from RtsTools import CreateRts
     
     # Set the threshold level for binarising of the transformed labelmap (for
     # UseCase 5):
@@ -396,8 +395,9 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
     
     if 'a' in UseCase:
         from RtsTools import GetPtsInRoi
+        from RtsTools import GetCntDataInRoi
         from RtsTools import AddCopiedPtsByCnt
-        from ImageTools import GetImageAttributes
+        from ImageTools import GetSeriesGeometry
         from ConversionTools import Contour2Indices
         from GeneralTools import ChangeZinds
         from ConversionTools import Indices2Points
@@ -411,14 +411,12 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         shifting pixels).
         """
         
-        SrcSize, SrcSpacings, SrcST,\
-        SrcIPPs, SrcDirs = GetImageAttributes(DicomDir=SrcDcmDir)
+        # Get the (memoised) geometry of the Source series:
+        SrcGeometry = GetSeriesGeometry(SrcDcmDir)
         
         # Convert PtsToCopy to indices:
-        IndsToCopy = Contour2Indices(Points=PtsToCopy, Origin=SrcIPPs[0], 
-                                     Directions=SrcDirs, 
-                                     Spacings=SrcSpacings, 
-                                     Rounding=False)
+        IndsToCopy = Contour2Indices(Points=PtsToCopy, Rounding=False, 
+                                     Geometry=SrcGeometry)
         
         if LogToConsole:
             print(f'\n\nIndsToCopy prior to changing z-index = {IndsToCopy[:6]}...')
@@ -432,8 +430,7 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
             print(f'\n\nPtsToCopy prior to changing z-index = {PtsToCopy[:6]}...')
         
         # Convert back to physical points:
-        PtsToCopy = Indices2Points(Indices=IndsToCopy, Origin=SrcIPPs[0], 
-                                   Directions=SrcDirs, Spacings=SrcSpacings)
+        PtsToCopy = Indices2Points(Indices=IndsToCopy, Geometry=SrcGeometry)
         
         if LogToConsole:
             print(f'\n\nPtsToCopy after changing z-index = {PtsToCopy[:6]}...')
@@ -482,6 +479,8 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                                              OrigCStoSliceInds=TrgCStoSliceIndsInRoi, 
                                              PtsToAddByCnt=[PtsToCopy], 
                                              CStoSliceIndsToAddByCnt=[ToSliceNum],
+                                             OrigCntDataByCnt=GetCntDataInRoi(TrgRts, 
+                                                                              FromSearchString),
                                              LogToConsole=LogToConsole)
         
     
@@ -507,7 +506,22 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         
         
     
-    if UseCase in ['3a', '3b', '4', '5']:
+    if UseCase == '5':
+        from ImageTools import GetRegTxMap
+        from ImageTools import GetTxMatrixFromTxMap
+        
+        # Register the images using an affine transformation (or re-use the 
+        # transform parameter map from a previous registration of the same 
+        # pair of series):
+        TxMap = GetRegTxMap(FixDicomDir=TrgDcmDir, MovDicomDir=SrcDcmDir,
+                            Tx='affine', LogToConsole=LogToConsole)
+        
+        # Get the affine matrix of the registration transformation (None if
+        # it can't be described by a matrix):
+        TxMatrix = GetTxMatrixFromTxMap(TxMap)
+        
+    
+    if UseCase in ['3a', '3b', '4'] or (UseCase == '5' and TxMatrix is None):
         from ImageTools import ImportImage
         from ImageTools import ResampleImage
         from ImageTools import GaussianBlurImage
@@ -521,9 +535,13 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         from ConversionTools import PixArr2PtsByContour
         
         
-        # Import the 3D images:
+        # Import the 3D images (the Target image isn't needed for UseCase 5 
+        # since the registration has been done, and the output grid of the 
+        # transformation is in TxMap):
         SrcIm = ImportImage(SrcDcmDir)
-        TrgIm = ImportImage(TrgDcmDir)
+        
+        if UseCase != '5':
+            TrgIm = ImportImage(TrgDcmDir)
         
         
         """
@@ -560,7 +578,8 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         # Resample LabmapImToCopy to the Target image's grid:
         ResLabmapImToCopy = ResampleImage(Image=LabmapImToCopy, 
                                           RefImage=TrgIm, 
-                                          Interpolation=interp)
+                                          Interpolation=interp,
+                                          Crop=True)
         
         #print(f'\nResLabmapImToCopy.GetSize() = {ResLabmapImToCopy.GetSize()}')
         
@@ -610,7 +629,7 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
             print('\nThe resampled image has no non-zero frames (e.g. due to',
                   f'aliasing).  \nTry workaround #{Workaround}.')
             
-            # Convert LabmapImToCopy from 32-bit unsigned integer to a float:
+            # Convert LabmapImToCopy from 8-bit unsigned integer to a float:
             LabmapImToCopy = ConvertImagePixelType(Image=LabmapImToCopy, 
                                                    NewPixelType='sitkFloat32')
             
@@ -631,7 +650,8 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                 # Resample LabmapImToCopy to the Target image's grid:
                 ResLabmapImToCopy = ResampleImage(Image=LabmapImToCopy, 
                                                   RefImage=TrgIm, 
-                                                  Interpolation=interp)
+                                                  Interpolation=interp,
+                                                  Crop=True)
                 
                 if True:#LogToConsole:
                     print('\nAfter resampling:')
@@ -670,7 +690,8 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                 # Resample LabmapImToCopy to the Target image's grid:
                 ResLabmapImToCopy = ResampleImage(Image=LabmapImToCopy, 
                                                   RefImage=TrgIm, 
-                                                  Interpolation=interp)
+                                                  Interpolation=interp,
+                                                  Crop=True)
                 
                 if True:#LogToConsole:
                     print('\nAfter resampling:')
@@ -703,17 +724,17 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         
         
         
-        """ Ensure that ResLabmapImToCopy is a 32-bit unsigned integer. """
-        if not PixID == 5:
+        """ Ensure that ResLabmapImToCopy is an 8-bit unsigned integer. """
+        if not PixID == 1:
             print(f'\nPixelID = {PixID} ({PixIDTypeAsStr})). Converting to',
-                  f'unsigned 32-bit integer (sitkUInt32)..')
+                  f'unsigned 8-bit integer (sitkUInt8)..')
             
-            # Convert ResLabmapImToCopy from float to 32-bit unsigned integer:
+            # Convert ResLabmapImToCopy from float to 8-bit unsigned integer:
             ResLabmapImToCopy = ConvertImagePixelType(Image=ResLabmapImToCopy, 
-                                                      NewPixelType='sitkUInt32')
+                                                      NewPixelType='sitkUInt8')
             
             if True:#LogToConsole:
-                print('\nAfter converting to 32-bit unsigned int:')
+                print('\nAfter converting to 8-bit unsigned int:')
                 PixID, PixIDTypeAsStr, UniqueVals,\
                 F2Sinds = GetImageInfo(ResLabmapImToCopy, 
                                        LogToConsole=True)
@@ -786,9 +807,10 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         # list of points by contour: 
         #TrgCntDataByCnt, TrgPtsByCnt = PixArr2Contours(PixArr=ResPixArrToCopy)
         TrgPtsByCnt,\
-        TrgCntDataByCnt = PixArr2PtsByContour(PixArr=ResPixArrToCopy,
-                                              FrameToSliceInds=TrgCStoSliceInds,
-                                              DicomDir=TrgDcmDir)
+        TrgCntDataByCnt,\
+        TrgCStoSliceInds = PixArr2PtsByContour(PixArr=ResPixArrToCopy,
+                                               FrameToSliceInds=TrgCStoSliceInds,
+                                               DicomDir=TrgDcmDir)
         
         """
         03/12/20: The z-coordinates are suspiciously all the same.  Should look
@@ -834,6 +856,8 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                                                  OrigCStoSliceInds=TrgCStoSliceIndsInRoi, 
                                                  PtsToAddByCnt=TrgPtsByCnt, 
                                                  CStoSliceIndsToAddByCnt=TrgCStoSliceInds,
+                                                 OrigCntDataByCnt=GetCntDataInRoi(TrgRts, 
+                                                                                  FromSearchString),
                                                  LogToConsole=LogToConsole)
         else:
             """
@@ -848,20 +872,31 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
     #if UseCase == '4':
     
     
-    if UseCase == '5':
-        from ImageTools import RegisterImages
-        from ImageTools import TransformImage
-        from ImageTools import BinaryThresholdImage
+    if UseCase == '5' and TxMatrix is not None:
+        from ConversionTools import TxPts2PtsByContour
+        
+        # Transform the points in the contour to be copied and form the 
+        # contours on the Target slices that they intersect:
+        TrgPtsByCnt,\
+        TrgCntDataByCnt,\
+        TrgCStoSliceInds = TxPts2PtsByContour(Points=PtsToCopy, 
+                                              TxMatrix=TxMatrix,
+                                              SrcDicomDir=SrcDcmDir, 
+                                              TrgDicomDir=TrgDcmDir)
+        
+        print(f'\nThe contour on slice {FromSliceNum} has been registered',
+              f'to {len(TrgCStoSliceInds)} contours: {TrgCStoSliceInds}.')
+        
     
-        # Register the images using an affine transformation:
-        RegSrcIm, RegImFilt = RegisterImages(FixIm=TrgIm, MovIm=SrcIm, 
-                                             Tx='affine',
-                                             LogToConsole=LogToConsole)
+    if UseCase == '5' and TxMatrix is None:
+        from ImageTools import TransformLabmapIms
+        from ImageTools import BinaryThresholdImage
         
-        # Transform LabmapImToCopy using RegImFilt:
-        TxLabmapImToCopy = TransformImage(Im=LabmapImToCopy, 
-                                          RegImFilt=RegImFilt,
-                                          Interpolation='Nearestneighbor')
+        # Transform LabmapImToCopy using TxMap (with a nearest neighbour
+        # interpolator):
+        TxLabmapImToCopy = TransformLabmapIms(LabmapIms=[LabmapImToCopy], 
+                                              TxMap=TxMap, 
+                                              LogToConsole=LogToConsole)[0]
         
         """ This isn't required: """
         if False:
@@ -906,6 +941,10 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
               'after binary thresholding TxLabmapImToCopy')
         """
         
+        # Convert TxLabmapImToCopy to a pixel array:
+        TxPixArrToCopy,\
+        TrgCStoSliceInds = Image2PixArr(LabmapIm=TxLabmapImToCopy)
+        
         F = TxPixArrToCopy.shape[0]
         
         print(f'\nThe segmentation (from the contour) on slice {FromSliceNum}',
@@ -947,9 +986,10 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         # list of points by contour: 
         #TrgCntDataByCnt, TrgPtsByCnt = PixArr2Contours(PixArr=TxPixArrToCopy)
         TrgPtsByCnt,\
-        TrgCntDataByCnt = PixArr2PtsByContour(PixArr=TxPixArrToCopy,
-                                              FrameToSliceInds=TrgCStoSliceInds,
-                                              DicomDir=TrgDcmDir)
+        TrgCntDataByCnt,\
+        TrgCStoSliceInds = PixArr2PtsByContour(PixArr=TxPixArrToCopy,
+                                               FrameToSliceInds=TrgCStoSliceInds,
+                                               DicomDir=TrgDcmDir)
     
     
     
@@ -978,36 +1018,28 @@ def CopyRts(SrcRts, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
     #                           DicomDir=TrgDcmDir, LogToConsole=LogToConsole)
     
     if LogToConsole:
-        print('\n\nInputs to InitialiseRts:')
+        print('\n\nInputs to CreateRts:')
         print(f'   FromRoiNum = {FromRoiNum}')
-        print(f'   TrgCStoSliceInds = {TrgCStoSliceInds}')
-    
-    
-    if TrgRts:
-        """ Use TrgRts to initialise the Target RTS. """
-        TrgRts = InitialiseRts(RtsTemplate=TrgRts, RoiNum=FromRoiNum,
-                               CStoSliceInds=TrgCStoSliceInds, 
-                               DicomDir=TrgDcmDir, NamePrefix=AddText,
-                               LogToConsole=LogToConsole)
-    else:
-        """ Use SrcRts to initialise the Target RTS. """
-        TrgRts = InitialiseRts(RtsTemplate=SrcRts, RoiNum=FromRoiNum,
-                               CStoSliceInds=TrgCStoSliceInds, 
-                               DicomDir=TrgDcmDir, NamePrefix=AddText,
-                               LogToConsole=LogToConsole)
-    
-    if LogToConsole:
-        print('\n\nInputs to ModifyRts:')
         print(f'   len(TrgCntDataByCnt) = {len(TrgCntDataByCnt)}')
         [print(f'   len(TrgCntDataByCnt[{i}]) = {len(TrgCntDataByCnt[i])}') for i in range(len(TrgCntDataByCnt))]
         print(f'   len(TrgPtsByCnt) = {len(TrgPtsByCnt)}')
         [print(f'   len(TrgPtsByCnt[{i}]) = {len(TrgPtsByCnt[i])}') for i in range(len(TrgPtsByCnt))]
         print(f'   TrgCStoSliceInds = {TrgCStoSliceInds}')
     
-    # Modify the tags in TrgRts:
-    TrgRts = ModifyRts(Rts=TrgRts, CntDataByCnt=TrgCntDataByCnt, 
-                       PtsByCnt=TrgPtsByCnt, CStoSliceInds=TrgCStoSliceInds,
-                       DicomDir=TrgDcmDir, LogToConsole=LogToConsole)
+    
+    if TrgRts:
+        """ Use TrgRts as the template for the Target RTS. """
+        RtsTemplate = TrgRts
+    else:
+        """ Use SrcRts as the template for the Target RTS. """
+        RtsTemplate = SrcRts
+    
+    # Create the Target RTS (rather than deep-copying the template using 
+    # InitialiseRts() and modifying the copy using ModifyRts()):
+    TrgRts = CreateRts(RtsTemplate=RtsTemplate, RoiNum=FromRoiNum, 
+                       CntDataByCnt=TrgCntDataByCnt, PtsByCnt=TrgPtsByCnt, 
+                       CStoSliceInds=TrgCStoSliceInds, DicomDir=TrgDcmDir, 
+                       NamePrefix=AddText, LogToConsole=LogToConsole)
     
     
     return TrgRts
@@ -1158,6 +1190,11 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
     #    """
     #    
     #    TrgPFFGStoSliceInds = [FromSliceNum] # moved to end
+    
+    # The frame numbers in TrgSeg's pixel array of the frames in TrgPixArr 
+    # that are preserved from TrgSeg (so that ModifySeg() only needs to pack 
+    # the copied frames).  Only applicable for Direct copies to a TrgSeg:
+    TrgOrigFrameNums = None
         
     
     if 'a' in UseCase:
@@ -1171,6 +1208,7 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         from GeneralTools import ShiftFrame
         from SegTools import GetPixArrInSeg
         from SegTools import AddCopiedPixArr
+        from SegTools import GetOrigFrameNums
         
         print(f'\nCopying slice {FromSliceNum} from Source SEG to slice',
               f'{ToSliceNum} in Target SEG..')
@@ -1219,18 +1257,24 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                                                   PixArrToAdd=PixArrToCopy, 
                                                   PFFGStoSliceIndsToAdd=[ToSliceNum])
             
+            TrgOrigFrameNums = GetOrigFrameNums(Seg=TrgSeg, 
+                                                SearchString=FromSearchString,
+                                                DicomDir=TrgDcmDir, 
+                                                PFFGStoSliceInds=TrgPFFGStoSliceInds, 
+                                                ModifiedSliceInds=[ToSliceNum])
+            
         else:
             """
             A Target SEG was not provided.
             """
-            TrgPixArr = deepcopy(PixArrToCopy)
+            TrgPixArr = PixArrToCopy
             
             TrgPFFGStoSliceInds = deepcopy([ToSliceNum]) # 15/12 verify?
     
     
     if UseCase in ['1b', '2b']:
         
-        TrgPixArr = deepcopy(PixArrToCopy)
+        TrgPixArr = PixArrToCopy
         
         TrgPFFGStoSliceInds = deepcopy([FromSliceNum]) # 04/12 verify?
     
@@ -1244,10 +1288,14 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         from ImageTools import BinaryThresholdImage
         from ConversionTools import ConvertImagePixelType
         
-        # Import the 3D images:
+        # Import the 3D images (for UseCase 5 the Target image is only needed
+        # for the registration, so GetRegTxMap() will import it if the 
+        # transform parameter map isn't cached):
         if not 'a' in UseCase:
             SrcIm = ImportImage(SrcDcmDir)
-            TrgIm = ImportImage(TrgDcmDir)
+            
+            if UseCase != '5':
+                TrgIm = ImportImage(TrgDcmDir)
         
         # Convert PixArrToCopy to a labelmap image:
         LabmapImToCopy = PixArr2Image(PixArr=PixArrToCopy,
@@ -1286,7 +1334,8 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
         # Resample LabmapImToCopy to the Target image's grid:
         ResLabmapImToCopy = ResampleImage(Image=LabmapImToCopy, 
                                           RefImage=TrgIm, 
-                                          Interpolation=interp)
+                                          Interpolation=interp,
+                                          Crop=True)
         
         if True:#LogToConsole:
             print('\nAfter resampling:')
@@ -1335,7 +1384,7 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
             print('\nThe resampled image has no non-zero frames (e.g. due to',
                   f'aliasing).  \nTry workaround #{Workaround}.')
             
-            # Convert LabmapImToCopy from 32-bit unsigned integer to a float:
+            # Convert LabmapImToCopy from 8-bit unsigned integer to a float:
             LabmapImToCopy = ConvertImagePixelType(Image=LabmapImToCopy, 
                                                    NewPixelType='sitkFloat32')
             
@@ -1356,7 +1405,8 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                 # Resample LabmapImToCopy to the Target image's grid:
                 ResLabmapImToCopy = ResampleImage(Image=LabmapImToCopy, 
                                                   RefImage=TrgIm, 
-                                                  Interpolation=interp)
+                                                  Interpolation=interp,
+                                                  Crop=True)
                 
                 if True:#LogToConsole:
                     print('\nAfter resampling:')
@@ -1395,7 +1445,8 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                 # Resample LabmapImToCopy to the Target image's grid:
                 ResLabmapImToCopy = ResampleImage(Image=LabmapImToCopy, 
                                                   RefImage=TrgIm, 
-                                                  Interpolation=interp)
+                                                  Interpolation=interp,
+                                                  Crop=True)
                 
                 if True:#LogToConsole:
                     print('\nAfter resampling:')
@@ -1478,18 +1529,18 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
             
         
         
-        """ Ensure that ResLabmapImToCopy is a 32-bit unsigned integer. """
-        if not PixID == 5:
+        """ Ensure that ResLabmapImToCopy is an 8-bit unsigned integer. """
+        if not PixID == 1:
             print(f'\nPixelID = {PixID} ({PixIDTypeAsStr})). Converting to',
-                  f'unsigned 32-bit integer (sitkUInt32)..')
+                  f'unsigned 8-bit integer (sitkUInt8)..')
             
-            # Convert ResLabmapImToCopy from float to 32-bit unsigned 
+            # Convert ResLabmapImToCopy from float to 8-bit unsigned 
             # integer:
             ResLabmapImToCopy = ConvertImagePixelType(Image=ResLabmapImToCopy, 
-                                                      NewPixelType='sitkUInt32')
+                                                      NewPixelType='sitkUInt8')
             
             if True:#LogToConsole:
-                print('\nAfter converting to 32-bit unsigned int:')
+                print('\nAfter converting to 8-bit unsigned int:')
                 PixID, PixIDTypeAsStr, UniqueVals,\
                 F2Sinds = GetImageInfo(ResLabmapImToCopy, 
                                        LogToConsole=True)
@@ -1579,18 +1630,24 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
                                                   OrigPFFGStoSliceInds=TrgPFFGStoSliceIndsInSeg, 
                                                   PixArrToAdd=ResPixArrToCopy, 
                                                   PFFGStoSliceIndsToAdd=[ToSliceNum])
+            
+            TrgOrigFrameNums = GetOrigFrameNums(Seg=TrgSeg, 
+                                                SearchString=FromSearchString,
+                                                DicomDir=TrgDcmDir, 
+                                                PFFGStoSliceInds=TrgPFFGStoSliceInds, 
+                                                ModifiedSliceInds=[ToSliceNum])
         else:
             """
             A Target SEG was not provided.
             """
-            TrgPixArr = deepcopy(ResPixArrToCopy)
+            TrgPixArr = ResPixArrToCopy
             
             TrgPFFGStoSliceInds = deepcopy([ToSliceNum]) # 04/12 verify?
             
     
     
     if UseCase == '3b':
-        TrgPixArr = deepcopy(ResPixArrToCopy)
+        TrgPixArr = ResPixArrToCopy
         
         TrgPFFGStoSliceInds = deepcopy(PFFGStoSliceIndsToCopy)
         
@@ -1600,19 +1657,22 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
     
         
     if UseCase == '5':
-        from ImageTools import RegisterImages
-        from ImageTools import TransformImage
+        from ImageTools import GetRegTxMap
+        from ImageTools import TransformLabmapIms
         from ImageTools import BinaryThresholdImage
     
-        # Register the images using an affine transformation:
-        RegSrcIm, RegImFilt = RegisterImages(FixIm=TrgIm, MovIm=SrcIm, 
-                                             Tx='affine',
-                                             LogToConsole=LogToConsole)
+        # Register the images using an affine transformation (or re-use the 
+        # transform parameter map from a previous registration of the same 
+        # pair of series):
+        TxMap = GetRegTxMap(FixDicomDir=TrgDcmDir, MovDicomDir=SrcDcmDir,
+                            MovIm=SrcIm, Tx='affine', 
+                            LogToConsole=LogToConsole)
         
-        # Transform LabmapImToCopy using RegImFilt:
-        TxLabmapImToCopy = TransformImage(Im=LabmapImToCopy, 
-                                          RegImFilt=RegImFilt,
-                                          Interpolation='Nearestneighbor')
+        # Transform LabmapImToCopy using TxMap (with a nearest neighbour
+        # interpolator):
+        TxLabmapImToCopy = TransformLabmapIms(LabmapIms=[LabmapImToCopy], 
+                                              TxMap=TxMap, 
+                                              LogToConsole=LogToConsole)[0]
         
         if True:#LogToConsole:
                 print('\nAfter transforming LabmapImToCopy by the registration',
@@ -1726,7 +1786,8 @@ def CopySeg(SrcSeg, FromSearchString, SrcDcmDir, FromSliceNum, TrgDcmDir,
     # Modify the tags in TrgSeg:
     TrgSeg = ModifySeg(Seg=TrgSeg, PixArr=TrgPixArr,
                        PFFGStoSliceInds=TrgPFFGStoSliceInds, 
-                       DicomDir=TrgDcmDir, LogToConsole=LogToConsole)
+                       DicomDir=TrgDcmDir, OrigFrameNums=TrgOrigFrameNums,
+                       LogToConsole=LogToConsole)
     
     
     """ Had 1040 lines of code. Now 207. """
@@ -1887,8 +1948,7 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     import GeneralTools
     importlib.reload(GeneralTools)
     
-    from copy import deepcopy
-    from DicomTools import GetDicomSOPuids
+    from DicomTools import GetDicomSOPuids, GetSliceIndBySOPuid
     from DicomTools import ImportDicom
     from ImageTools import GetImageAttributes
     from GeneralTools import AreItemsEqualToWithinEpsilon
@@ -1896,6 +1956,9 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     
     SOPuids = GetDicomSOPuids(DicomDir)
     
+    # The (cached) SOP UID-to-slice index map for O(1) look-ups:
+    SliceIndBySOPuid = GetSliceIndBySOPuid(SOPuids)
+    
     Dicom = ImportDicom(DicomDir)
     
     #Size, Spacings, ST,\
@@ -1903,12 +1966,14 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     Size, Spacings, ST,\
     IPPs, Dirs = GetImageAttributes(DicomDir=DicomDir, Package='pydicom')
     
-    # The number of frames, rows and columns in the SEG's pixel array:
-    if len(Seg.pixel_array.shape) > 2:
-        PixArrF, PixArrR, PixArrC = Seg.pixel_array.shape
-    else:
-        PixArrR, PixArrC = Seg.pixel_array.shape
-        PixArrF = 1
+    # The number of frames, rows and columns in the SEG's pixel array.  The 
+    # number of frames is obtained from the length of PixelData rather than by
+    # decoding the pixel array (which would read all of a memory-mapped 
+    # PixelData, and as for Seg.pixel_array, the rows and columns are those 
+    # in the header):
+    PixArrR = int(Seg.Rows)
+    PixArrC = int(Seg.Columns)
+    PixArrF = len(Seg.PixelData)*8//(PixArrR*PixArrC*int(Seg.BitsAllocated))
     
     #NumOfDicoms = len(SOPuids)
     
@@ -1916,8 +1981,8 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     
     
     """Determine whether MediaStorageSOPInstanceUID matches SOPInstanceUID."""
-    MSSOPuid = deepcopy(Seg.file_meta.MediaStorageSOPInstanceUID)
-    SOPuid = deepcopy(Seg.SOPInstanceUID)
+    MSSOPuid = Seg.file_meta.MediaStorageSOPInstanceUID
+    SOPuid = Seg.SOPInstanceUID
     
     if not MSSOPuid == SOPuid:
         msg = f'"MediaStorageSOPInstanceUID" ({MSSOPuid}) does not match '\
@@ -1932,8 +1997,8 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     """Determine whether the number of sequences in 
     ReferencedInstanceSequence matches the number of DICOMs."""
     
-    RIS = deepcopy(Seg.ReferencedSeriesSequence[0]\
-                      .ReferencedInstanceSequence)
+    RIS = Seg.ReferencedSeriesSequence[0]\
+             .ReferencedInstanceSequence
     
     if len(SOPuids) != len(RIS):
         msg = f'The number of "SOPInstanceUID"s ({len(SOPuids)}) does not'\
@@ -1951,7 +2016,7 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     RefSOPuidsInRIS = [RIS[i].ReferencedSOPInstanceUID for i in range(len(RIS))]
     
     # Determine whether the Ref SOP UIDs match the SOP UIDs:
-    IsMatch = [RefSOPuid in SOPuids for RefSOPuid in RefSOPuidsInRIS]
+    IsMatch = [RefSOPuid in SliceIndBySOPuid for RefSOPuid in RefSOPuidsInRIS]
     
     NumOfMatches = IsMatch.count(True)
     
@@ -1979,7 +2044,9 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     ReferencedSOPInstanceUIDs."""        
     
     # Determine whether the SOP UIDs match the Referenced SOP UIDs:
-    IsMatch = [SOPuid in RefSOPuidsInRIS for SOPuid in SOPuids]
+    RefSOPuidsInRISset = set(RefSOPuidsInRIS)
+    
+    IsMatch = [SOPuid in RefSOPuidsInRISset for SOPuid in SOPuids]
     
     NumOfMatches = IsMatch.count(True)
     
@@ -2105,7 +2172,7 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     
     
     """Verify that the SegmentNumber in SegmentSequence is 1."""
-    N = deepcopy(Seg.SegmentSequence[0].SegmentNumber)
+    N = Seg.SegmentSequence[0].SegmentNumber
     
     if N != 1:
         msg = '"SegmentNumber" in "SegmentSequence" is {N}.  It should be 1.'
@@ -2118,9 +2185,9 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     
             
     """Check various tags in SharedFunctionalGroupsSequence."""
-    SegIOP = deepcopy(Seg.SharedFunctionalGroupsSequence[0]\
-                         .PlaneOrientationSequence[0]\
-                         .ImageOrientationPatient)
+    SegIOP = Seg.SharedFunctionalGroupsSequence[0]\
+                .PlaneOrientationSequence[0]\
+                .ImageOrientationPatient
     
     SegIOP = [float(item) for item in SegIOP]
     
@@ -2138,9 +2205,9 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
             print('\n' + msg)
        
     
-    SegST = deepcopy(Seg.SharedFunctionalGroupsSequence[0]\
-                        .PixelMeasuresSequence[0]\
-                        .SliceThickness)
+    SegST = Seg.SharedFunctionalGroupsSequence[0]\
+               .PixelMeasuresSequence[0]\
+               .SliceThickness
     
     """ The SliceThickness appears to be the z-Spacing rather than the
     SliceThickness from the DICOM metadata. """
@@ -2160,9 +2227,9 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
             print('\n' + msg)
     
     
-    SegSBS = deepcopy(Seg.SharedFunctionalGroupsSequence[0]\
-                         .PixelMeasuresSequence[0]\
-                         .SpacingBetweenSlices)
+    SegSBS = Seg.SharedFunctionalGroupsSequence[0]\
+                .PixelMeasuresSequence[0]\
+                .SpacingBetweenSlices
     
     #if float(SegSBS) != Spacings[2]:
     if not AreItemsEqualToWithinEpsilon(float(SegSBS), Spacings[2], epsilon=1e-05):
@@ -2179,9 +2246,9 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
             print('\n' + msg)
 
     
-    SegPS = deepcopy(Seg.SharedFunctionalGroupsSequence[0]\
-                        .PixelMeasuresSequence[0]\
-                        .PixelSpacing)
+    SegPS = Seg.SharedFunctionalGroupsSequence[0]\
+               .PixelMeasuresSequence[0]\
+               .PixelSpacing
     
     SegPS = [float(item) for item in SegPS]
     
@@ -2201,7 +2268,7 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     
     """Verify that the number of sequences in PerFrameFunctionalGroupsSequence
     is equal to NumberOfFrames."""
-    PFFGS = deepcopy(Seg.PerFrameFunctionalGroupsSequence)
+    PFFGS = Seg.PerFrameFunctionalGroupsSequence
     
     if len(PFFGS) != int(Seg.NumberOfFrames):
         msg = f'The number of sequences in "PerFrameFunctionGroupsSequence" '\
@@ -2221,7 +2288,7 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
                                  .ReferencedSOPInstanceUID for i in range(len(PFFGS))]
     
     # Determine whether the Ref SOP UIDs match the SOP UIDs:
-    IsMatch = [RefSOPuid in SOPuids for RefSOPuid in RefSOPuidsInPFFGS]
+    IsMatch = [RefSOPuid in SliceIndBySOPuid for RefSOPuid in RefSOPuidsInPFFGS]
     
     NumOfMatches = IsMatch.count(True)
     
@@ -2326,7 +2393,7 @@ def ErrorCheckSeg(Seg, DicomDir, LogToConsole=False):
     IPPsInPFFGS = [[float(item) for item in IPP] for IPP in IPPsInPFFGS]
     
     for i in range(len(IPPsInPFFGS)):
-        ind = SOPuids.index(RefSOPuidsInPFFGS[i])
+        ind = SliceIndBySOPuid[RefSOPuidsInPFFGS[i]]
         
         IPP = IPPs[ind]
         
@@ -2420,13 +2487,15 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
         errors are found an empty list ([]) will be returned.
     """        
     
-    from copy import deepcopy
-    from DicomTools import GetDicomSOPuids
+    from DicomTools import GetDicomSOPuids, GetSliceIndBySOPuid
     from DicomTools import ImportDicom
     from ImageTools import GetImageAttributes
     
     SOPuids = GetDicomSOPuids(DicomDir)
     
+    # The (cached) SOP UID-to-slice index map for O(1) look-ups:
+    SliceIndBySOPuid = GetSliceIndBySOPuid(SOPuids)
+    
     Dicom = ImportDicom(DicomDir)
     
     Size, Spacings, ST,\
@@ -2436,8 +2505,8 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
     ErrorList = []
     
     """Determine whether MediaStorageSOPInstanceUID matches SOPInstanceUID."""
-    MSSOPuid = deepcopy(Rts.file_meta.MediaStorageSOPInstanceUID)
-    SOPuid = deepcopy(Rts.SOPInstanceUID)
+    MSSOPuid = Rts.file_meta.MediaStorageSOPInstanceUID
+    SOPuid = Rts.SOPInstanceUID
     
     if not MSSOPuid == SOPuid:
         msg = f'"MediaStorageSOPInstanceUID" ({MSSOPuid}) does not match '\
@@ -2498,9 +2567,9 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
             
       
     
-    RFORS = deepcopy(Rts.ReferencedFrameOfReferenceSequence[0])
+    RFORS = Rts.ReferencedFrameOfReferenceSequence[0]
     
-    FORuidInRFORS = deepcopy(RFORS.FrameOfReferenceUID)
+    FORuidInRFORS = RFORS.FrameOfReferenceUID
     
     if FORuidInRFORS != Dicom.FrameOfReferenceUID:
         msg = '"FrameOfReferenceUID" in "ReferencedFrameOfReferenceSequence" '\
@@ -2530,9 +2599,9 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
     
     """Verify that the SeriesInstanceUID in ReferencedFrameOfReferenceSequence
     matches the DICOM SeriesInstanceUID."""
-    RtsSeriesuid = deepcopy(RFORS.RTReferencedStudySequence[0]\
-                                 .RTReferencedSeriesSequence[0]\
-                                 .SeriesInstanceUID)
+    RtsSeriesuid = RFORS.RTReferencedStudySequence[0]\
+                        .RTReferencedSeriesSequence[0]\
+                        .SeriesInstanceUID
     
     if RtsSeriesuid != Dicom.SeriesInstanceUID:
         msg = '"SeriesInstanceUID" in "ReferencedFrameOfReferenceSequence" '\
@@ -2548,14 +2617,14 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
     
     """Verify that the ReferencedSOPInstanceUIDs in 
     ReferencedFrameOfReferenceSequence match the DICOM SOPInstanceUIDs."""
-    CIS = deepcopy(RFORS.RTReferencedStudySequence[0]\
-                        .RTReferencedSeriesSequence[0]\
-                        .ContourImageSequence)
+    CIS = RFORS.RTReferencedStudySequence[0]\
+               .RTReferencedSeriesSequence[0]\
+               .ContourImageSequence
     
     RefSOPuidsInRFORS = [CIS[i].ReferencedSOPInstanceUID for i in range(len(CIS))]
     
     # Determine whether the Ref SOP UIDs match the SOP UIDs:
-    IsMatch = [RefSOPuid in SOPuids for RefSOPuid in RefSOPuidsInRFORS]
+    IsMatch = [RefSOPuid in SliceIndBySOPuid for RefSOPuid in RefSOPuidsInRFORS]
     
     NumOfMatches = IsMatch.count(True)
     
@@ -2593,7 +2662,7 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
             
     
     """Verify that the ROINumber in StructureSetROISequence is 1."""
-    N = int(deepcopy(Rts.StructureSetROISequence[0].ROINumber))
+    N = int(Rts.StructureSetROISequence[0].ROINumber)
     
     if N != 1:
         msg = f'"ROINumber" in "StructureSetROISequence" is {N}.  It should '\
@@ -2607,8 +2676,8 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
     
     """Verify that the ReferencedFrameOfReferenceUID in StructureSetROISequence
     matches the DICOM FrameOfReferenceUID."""
-    RefFORuidInSSRS = deepcopy(Rts.StructureSetROISequence[0]\
-                                  .ReferencedFrameOfReferenceUID)
+    RefFORuidInSSRS = Rts.StructureSetROISequence[0]\
+                         .ReferencedFrameOfReferenceUID
     
     if RefFORuidInSSRS != Dicom.FrameOfReferenceUID:
         msg = '"ReferencedFrameOfReferenceUID" in "StructureSetROISequence" '\
@@ -2637,7 +2706,7 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
 
     """Verify that the number of sequences in ContourSequence matches the
     number of sequences in ContourImageSequence."""
-    CS = deepcopy(Rts.ROIContourSequence[0].ContourSequence)
+    CS = Rts.ROIContourSequence[0].ContourSequence
     
     if len(CS) != len(CIS):
         msg = f'The number of sequences in "ContourSequence" ({len(CS)}) does'\
@@ -2655,7 +2724,9 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
     RefSOPuidsInRCS = [CS[i].ContourImageSequence[0].ReferencedSOPInstanceUID for i in range(len(CS))]
     
     # Determine whether the Ref SOP UIDs match the SOP UIDs:
-    IsMatch = [uid in RefSOPuidsInRFORS for uid in RefSOPuidsInRCS]
+    RefSOPuidsInRFORSset = set(RefSOPuidsInRFORS)
+    
+    IsMatch = [uid in RefSOPuidsInRFORSset for uid in RefSOPuidsInRCS]
     
     NumOfMatches = IsMatch.count(True)
     
@@ -2734,7 +2805,7 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
     
     
     """Verify that the ReferencedROINumber in ROIContourSequence is 1."""
-    N = int(deepcopy(Rts.ROIContourSequence[0].ReferencedROINumber))
+    N = int(Rts.ROIContourSequence[0].ReferencedROINumber)
     
     if N != 1:
         msg = f'"ReferencedROINumber" in "ROIContourSequence" is {N}.  It '\
@@ -2763,7 +2834,7 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
 
     
     """Verify that the ObservationNumber is 1."""
-    N = int(deepcopy(Rts.RTROIObservationsSequence[0].ObservationNumber))
+    N = int(Rts.RTROIObservationsSequence[0].ObservationNumber)
     
     if N != 1:
         msg = f'"ObservationNumber" in "RTROIObservationsSequence" is {N}. '\
@@ -2777,7 +2848,7 @@ def ErrorCheckRts(Rts, DicomDir, LogToConsole=False):
             
             
     """Verify that the ReferencedROINumber is 1."""
-    N = int(deepcopy(Rts.RTROIObservationsSequence[0].ReferencedROINumber))
+    N = int(Rts.RTROIObservationsSequence[0].ReferencedROINumber)
     
     if N != 1:
         msg = f'"ReferencedROINumber" in "RTROIObservationsSequence" is {N}. '\
@@ -221,14 +221,18 @@ def GetCIStoSliceInds(Rts, SOPuids):
         ContourImageSequence.
     """
     
+    from DicomTools import GetSliceIndBySOPuid
+    
     # Get the ReferencedSOPInstanceUIDs from ContourImageSequence:
     RSOPuids = GetRSOPuidsInCIS(Rts)
     
+    SliceIndBySOPuid = GetSliceIndBySOPuid(SOPuids)
+    
     CIStoSliceInds = [] 
     
     for RefUid in RSOPuids:
         # Find the matching index of RefUid in SOPuids:
-        CIStoSliceInds.append(SOPuids.index(RefUid))
+        CIStoSliceInds.append(SliceIndBySOPuid[RefUid])
         
     return CIStoSliceInds
 
@@ -312,9 +316,13 @@ def GetCStoSliceIndsByRoi(Rts, SOPuids):
         correspond to each sequence in ContourSequence.
     """
     
+    from DicomTools import GetSliceIndBySOPuid
+    
     # Get the ReferencedSOPInstanceUIDs from the ContourSequence by ROI:
     RSOPuidsByRoi = GetRSOPuidsInCSByRoi(Rts)
     
+    SliceIndBySOPuid = GetSliceIndBySOPuid(SOPuids)
+    
     CStoSliceIndsByRoi = [] 
     
     # Loop through each list of ReferencedSOPInstanceUIDs:
@@ -323,7 +331,7 @@ def GetCStoSliceIndsByRoi(Rts, SOPuids):
     
         for RefUid in RSOPuidsByRoi[i]:
             # Find the matching index of RefUid in SOPuids:
-            inds.append(SOPuids.index(RefUid))
+            inds.append(SliceIndBySOPuid[RefUid])
             
         CStoSliceIndsByRoi.append(inds)
         
@@ -424,10 +432,10 @@ def AddToCS(Rts):
 
 
 
-def GetPtsByRoi(Rts, DicomDir):
+def GetContourStore(Rts, DicomDir, RoiNum=None):
     """
     Get the physical points (i.e. in the Patient Coordinate System) in all 
-    contours for all ROIs.
+    contours for all ROIs (or for a single ROI) as a compact contour store.
     
     Inputs:
     ------
@@ -437,100 +445,185 @@ def GetPtsByRoi(Rts, DicomDir):
         
     DicomDir : string 
         Directory containing the corresponding DICOMs.
+        
+    RoiNum : integer (optional; None by default)
+        The index of the ROI of interest.  If None all ROIs will be stored.
                        
                             
     Outputs:
     -------
     
-    PtsByRoi : list of list of a list of floats
-        List (for each ROI) of a list (for all contours) of a list (for each 
-        dimension) of points.
+    Store : dictionary
+        Dictionary with the following keys:
+            
+        - 'Coords' : N x 3 Numpy array of floats of the points of all contours
+          (of all ROIs) concatenated
+        - 'CntOffsets' : Numpy array of integers of length C + 1 (C = total
+          number of contours) such that the points in the c^th contour are 
+          Coords[CntOffsets[c]:CntOffsets[c+1]]
+        - 'RoiOffsets' : Numpy array of integers of length R + 1 (R = number 
+          of ROIs) such that the contours in the r^th ROI are 
+          RoiOffsets[r] to RoiOffsets[r+1] - 1
+        - 'CntToSliceInds' : Numpy array of integers of length C of the slice
+          numbers that correspond to each contour
         
-    CStoSliceIndsByRoi : list of a list of integers
-        List (for each ROI) of a list (for each contour) of slice numbers that 
-        correspond to each list in PtsByRoi. 
-    """
-    
-    from copy import deepcopy
-    from DicomTools import GetDicomSOPuids
-    from ConversionTools import ContourData2Points
-    
-    # Get the DICOM SOPInstanceUIDs:
-    SopUids = GetDicomSOPuids(DicomDir)
+        
+    Notes:
+    -----
     
-    # Get the ContourImageSequence-to-slice indices:
-    #CIStoSliceInds = GetCIStoSliceInds(Rts, SopUids)
+    The ContourSequences are read in place (not copied).  The raw values of 
+    ContourData are joined and parsed in a single step, so no per-point 
+    Python objects are created.
+    """
     
-    # Get the ContourSequence-to-slice indices by ROI:
-    CStoSliceIndsByRoi = GetCStoSliceIndsByRoi(Rts, SopUids)
+    import numpy as np
+    from DicomTools import GetDicomSOPuids, GetSliceIndBySOPuid
     
-    Nrois = len(CStoSliceIndsByRoi)
+    # Get the DICOM SOPInstanceUIDs and the (cached) UID-to-slice index map:
+    SliceIndBySOPuid = GetSliceIndBySOPuid(GetDicomSOPuids(DicomDir))
     
-    if False:
-        print(f'\nCStoSliceIndsByRoi = {CStoSliceIndsByRoi}')
-        print(f'Nrois = {Nrois}')
+    if RoiNum is None:
+        RoiNums = list(range(len(Rts.ROIContourSequence)))
+    else:
+        RoiNums = [RoiNum]
     
-    PtsByRoi = []
+    CntDataStrs = []
+    CntLengths = []
+    NumOfCntsByRoi = []
+    CntToSliceInds = []
     
-    for r in range(Nrois):
-        # Number of contours in this ROI:
-        NumCS2Sinds = len(CStoSliceIndsByRoi[r])
-        
-        # Get a list of the ContourSequences in this ROI:
-        ContourSequences = deepcopy(Rts.ROIContourSequence[r].ContourSequence)
+    for r in RoiNums:
+        ContourSequence = Rts.ROIContourSequence[r].ContourSequence
         
-        NumCS = len(ContourSequences)
+        NumOfCntsByRoi.append(len(ContourSequence))
         
-        if NumCS2Sinds != NumCS:
-            msg = f'The number of contour-sequence-to-slice-indices '\
-                  + f'({NumCS2Sinds}) must be equal to the number of '\
-                  + f'sequences in ROIContourSequence[{r}].ContourSequence '\
-                  + f'({NumCS}).'
+        for Contour in ContourSequence:
+            # Use the raw value of ContourData if it has not yet been 
+            # converted by pydicom:
+            ContourData = Contour.get_item('ContourData').value
             
-            raise Exception(msg)
-        
-        # Get a list of all ReferencedSOPInstanceUIDs from ContourSequences:
-        #RefSopUids = [sequence.ContourImageSequence[0]\
-        #              .ReferencedSOPInstanceUID for sequence in ContourSequences]
+            if isinstance(ContourData, bytes):
+                ContourData = ContourData.decode('ascii')
+            else:
+                ContourData = '\\'.join([str(Item) for Item in ContourData])
+            
+            CntDataStrs.append(ContourData)
+            
+            # The number of points in this contour:
+            CntLengths.append((ContourData.count('\\') + 1)//3)
+            
+            RefUid = Contour.ContourImageSequence[0].ReferencedSOPInstanceUID
+            
+            CntToSliceInds.append(SliceIndBySOPuid[RefUid])
+    
+    if CntDataStrs:
+        Coords = np.array('\\'.join(CntDataStrs).split('\\'), 
+                          dtype=float).reshape(-1, 3)
+    else:
+        Coords = np.zeros((0, 3))
+    
+    Store = {'Coords' : Coords,
+             'CntOffsets' : np.concatenate(([0], np.cumsum(CntLengths)))\
+                              .astype(int),
+             'RoiOffsets' : np.concatenate(([0], np.cumsum(NumOfCntsByRoi)))\
+                              .astype(int),
+             'CntToSliceInds' : np.array(CntToSliceInds, dtype=int)
+             }
+    
+    return Store
+
+
+
+
+
+
+
+
+
+def GetPtsByCntInStore(Store, RoiNum=0):
+    """
+    Get the points by contour for a ROI in a contour store.
+    
+    Inputs:
+    ------
+    
+    Store : dictionary
+        Contour store (see GetContourStore()).
         
-        if False:
-            print(f'   r = {r}')
-            print(f'   NumCS2Sinds = {NumCS2Sinds}')
-            print(f'   NumCS = NumCS')
+    RoiNum : integer (optional; 0 by default)
+        The index of the ROI in Store.
+                            
+                            
+    Outputs:
+    -------
+    
+    PtsByCnt : list of Numpy arrays
+        List (for each contour) of a N x 3 array of the points in the contour.
+        The arrays are views into Store['Coords'] (not copies).
         
+    CStoSliceInds : list of integers
+        List (for each contour) of slice numbers that correspond to each 
+        contour in PtsByCnt.
+    """
+    
+    Coords = Store['Coords']
+    CntOffsets = Store['CntOffsets']
+    
+    c0 = Store['RoiOffsets'][RoiNum]
+    c1 = Store['RoiOffsets'][RoiNum + 1]
+    
+    PtsByCnt = [Coords[CntOffsets[c]:CntOffsets[c + 1]] for c in range(c0, c1)]
+    
+    CStoSliceInds = Store['CntToSliceInds'][c0:c1].tolist()
+    
+    return PtsByCnt, CStoSliceInds
+
+
+
+
+
+
+
+
+
+def GetPtsByRoi(Rts, DicomDir):
+    """
+    Get the physical points (i.e. in the Patient Coordinate System) in all 
+    contours for all ROIs.
+    
+    Inputs:
+    ------
+    
+    Rts : Pydicom object
+        ROI object from an RTSTRUCT file.
         
-        PtsByContour = []
+    DicomDir : string 
+        Directory containing the corresponding DICOMs.
+                       
+                            
+    Outputs:
+    -------
+    
+    PtsByRoi : list of list of Numpy arrays
+        List (for each ROI) of a list (for all contours) of a N x 3 array of 
+        points.  The arrays are views into a single contour store (see 
+        GetContourStore()).
         
+    CStoSliceIndsByRoi : list of a list of integers
+        List (for each ROI) of a list (for each contour) of slice numbers that 
+        correspond to each list in PtsByRoi. 
+    """
+    
+    Store = GetContourStore(Rts, DicomDir)
+    
+    PtsByRoi = []
+    CStoSliceIndsByRoi = []
+    
+    for r in range(len(Store['RoiOffsets']) - 1):
+        PtsByCnt, CStoSliceInds = GetPtsByCntInStore(Store, r)
         
-        # Loop through each contour sequence:
-        for c in range(NumCS):
-            
-            # Get the indeces of all matching RefSopUids:
-            #ind = RefSopUids.index(SopUid) # this will only find the first 
-            # match, and there may be more than one!
-            #inds = [i for i, e in enumerate(RefSopUids) if e==SopUid]
-            
-            # Iterate for each index in inds:
-            #for ind in inds:
-            
-            #ContourSequence = deepcopy(ContourSequences[c])
-            
-            #ContourData = [float(item) for item in ContourSequence.ContourData]
-            
-            ContourData = Rts.ROIContourSequence[r]\
-                             .ContourSequence[c]\
-                             .ContourData
-            
-            Pts = ContourData2Points(ContourData)
-            
-            PtsByContour.append(Pts)
-            
-            if False:
-                print(f'      c = {c}')
-                print(f'      len(Pts) = {len(Pts)}')
-            
-            
-        PtsByRoi.append(PtsByContour)
+        PtsByRoi.append(PtsByCnt)
+        CStoSliceIndsByRoi.append(CStoSliceInds)
 
     return PtsByRoi, CStoSliceIndsByRoi
 
@@ -655,9 +748,9 @@ def GetPtsInRoi(Rts, DicomDir, SearchString):
     Outputs:
     -------
     
-    PointsByContour : list of a list of a list of floats
-        List (for each contour) of a list (for each point) of a list (for each 
-        dimension) of coordinates. 
+    PointsByContour : list of Numpy arrays
+        List (for each contour) of a N x 3 array of coordinates.  The arrays 
+        are views into a contour store (see GetContourStore()).
         
     CStoSliceInds : list of integers
         List (for each contour) of slice numbers that correspond to each 
@@ -666,13 +759,12 @@ def GetPtsInRoi(Rts, DicomDir, SearchString):
     
     from DicomTools import GetRoiNum
     
-    PtsByRoi, CStoSliceIndsByRoi = GetPtsByRoi(Rts, DicomDir)
-    
     RoiNum = GetRoiNum(Rts, SearchString)
     
-    PointsByContour = PtsByRoi[RoiNum]
+    # Only the ROI of interest is read:
+    Store = GetContourStore(Rts, DicomDir, RoiNum)
     
-    CStoSliceInds = CStoSliceIndsByRoi[RoiNum]
+    PointsByContour, CStoSliceInds = GetPtsByCntInStore(Store)
     
     #print('\n\nResults of GetPtsInRoi:')
     #print(f'   len(PtsByRoi) = {len(PtsByRoi)}')
@@ -694,6 +786,53 @@ def GetPtsInRoi(Rts, DicomDir, SearchString):
 
 
 
+def GetCntDataInRoi(Rts, SearchString):
+    """
+    Get the ContourData (by contour) in a RTS that belong to a ROI with 
+    specified label.
+    
+    Inputs:
+    ------
+    
+    Rts : Pydicom object
+        RTS object.
+        
+    SearchString : string
+        All or part of the ROI name of the ROI of interest.
+        
+        
+    Outputs:
+    -------
+    
+    CntDataByCnt : list of a list of DS values
+        List (for each contour) of the ContourData (a flat list of [x, y, z]
+        coordinates) in the ROI.
+        
+        
+    Notes:
+    -----
+    
+    The values are not copied, so they can be re-used (e.g. by 
+    AddCopiedPtsByCnt()) for contours that are preserved unchanged, rather 
+    than re-formatting their points.
+    """
+    
+    from DicomTools import GetRoiNum
+    
+    RoiNum = GetRoiNum(Rts, SearchString)
+    
+    return [Cnt.ContourData for Cnt in Rts.ROIContourSequence[RoiNum]\
+                                          .ContourSequence]
+
+
+
+
+
+
+
+
+
+
 def GetPtsInContour(Rts, SearchString, SliceNum, DicomDir):
     """
     Get the physical points (i.e. in the Patient Coordinate System) in a 
@@ -728,12 +867,12 @@ def GetPtsInContour(Rts, SearchString, SliceNum, DicomDir):
         number that corresponds to Points. 
     """
     
-    from copy import deepcopy
-    from DicomTools import GetDicomSOPuids
+    from DicomTools import GetDicomSOPuids, GetSliceIndBySOPuid
     from DicomTools import GetRoiNum
     from ConversionTools import ContourData2Points
     
-    RoiContourSequence = deepcopy(Rts.ROIContourSequence)
+    # The sequences are only read (not modified) so they are not copied:
+    RoiContourSequence = Rts.ROIContourSequence
     
     NumOfRois = len(RoiContourSequence)
     
@@ -743,12 +882,15 @@ def GetPtsInContour(Rts, SearchString, SliceNum, DicomDir):
         raise Exception(f"There are only {NumOfRois} ROIs in the RTS.\n",
                         f"RoiNum = {RoiNum} > {NumOfRois}.")
     
-    SopUids = GetDicomSOPuids(DicomDir)
+    SliceIndBySOPuid = GetSliceIndBySOPuid(GetDicomSOPuids(DicomDir))
     
-    # Get the ContourSequence-to-slice indices by ROI:
-    CStoSliceIndsByRoi = GetCStoSliceIndsByRoi(Rts, SopUids)
+    # The ContourSequences in the ROI of interest:
+    ContourSequence = RoiContourSequence[RoiNum].ContourSequence
     
-    CStoSliceInds = CStoSliceIndsByRoi[RoiNum]
+    # Get the ContourSequence-to-slice indices for the ROI of interest only:
+    CStoSliceInds = [SliceIndBySOPuid[Contour.ContourImageSequence[0]\
+                                             .ReferencedSOPInstanceUID] 
+                     for Contour in ContourSequence]
     
     if not SliceNum in CStoSliceInds:
         raise Exception(f"There is no contour on slice {SliceNum} in the RTS.")
@@ -756,18 +898,16 @@ def GetPtsInContour(Rts, SearchString, SliceNum, DicomDir):
     # The contour number of interest:
     ContourNum = CStoSliceInds.index(SliceNum)
     
-    # The ContourSequences in the ROI of interest:
-    #ContourSequence = deepcopy(Rts.ROIContourSequence[RoiNum].ContourSequence)
-    ContourSequence = deepcopy(RoiContourSequence[RoiNum].ContourSequence)
-    
     # The number of contours in this ROI:
     NumOfContours = len(ContourSequence)
     
     if ContourNum > NumOfContours - 1:
         raise Exception(f"There are only {NumOfContours} contours in the RTS.",
                         f"\nContourNum = {ContourNum} > {NumOfContours}.")
-        
-    ContourData = deepcopy(ContourSequence[ContourNum].ContourData)
+    
+    # Use the raw value of ContourData if it has not yet been converted by
+    # pydicom:
+    ContourData = ContourSequence[ContourNum].get_item('ContourData').value
     
     Points = ContourData2Points(ContourData)
     
@@ -777,16 +917,13 @@ def GetPtsInContour(Rts, SearchString, SliceNum, DicomDir):
         print(f'\n\nResults of GetPtsInContour:')
         print(f'   NumOfRois = {NumOfRois}')
         print(f'   RoiNum = {RoiNum}')
-        print(f'   CStoSliceIndsByRoi = {CStoSliceIndsByRoi}')
-        print(f'   CStoSliceInds = CStoSliceIndsByRoi[RoiNum={RoiNum}] =',
-              f'{CStoSliceInds}')
         print(f'   ContourNum = {ContourNum}')
         print(f'   len(Points) = {len(Points)}')
         print(f'   CStoSliceInds = {CStoSliceInds}')
         
         numofpts = []
         for c in range(NumOfContours):
-            contourdata = deepcopy(ContourSequence[c].ContourData)
+            contourdata = ContourSequence[c].ContourData
         
             pts = ContourData2Points(contourdata)
             
@@ -851,9 +988,9 @@ def AddCopiedPts(OrigPtsByCnt, PtsToAdd, CStoSliceInds, SliceNum):
         OrigPtsByCnt.
         """
         
-        from copy import deepcopy
-        
-        NewPtsByCnt = deepcopy(OrigPtsByCnt)
+        # Only the list is copied (not the points) since only one item is
+        # replaced:
+        NewPtsByCnt = list(OrigPtsByCnt)
         
         ind = CStoSliceInds.index(SliceNum)
         
@@ -901,7 +1038,7 @@ def AddCopiedPts(OrigPtsByCnt, PtsToAdd, CStoSliceInds, SliceNum):
     
 def AddCopiedPtsByCnt(OrigPtsByCnt, OrigCStoSliceInds, 
                       PtsToAddByCnt, CStoSliceIndsToAddByCnt,
-                      LogToConsole=False):
+                      OrigCntDataByCnt=None, LogToConsole=False):
     """
     Add points in a contour to an existing list of points-by-contour.
        
@@ -909,15 +1046,17 @@ def AddCopiedPtsByCnt(OrigPtsByCnt, OrigCStoSliceInds,
     Inputs:
     ------
     
-    OrigPtsByCnt : list of a list of a list of floats
+    OrigPtsByCnt : list of a list of a list of floats or list of Numpy arrays
         List (for each contour) of a list (for each point) of a list (for each 
-        dimension) of coordinates in the original list of points-by-contour. 
+        dimension) of coordinates in the original list of points-by-contour,
+        or a list (for each contour) of N x 3 arrays (e.g. the views into a
+        contour store returned by GetPtsInRoi()). 
         
     OrigCStoSliceInds : list of integers
         List (for each contour) of slice numbers that correspond to each 
         sequence in ContourSequence in the original list of points-by-contour.
         
-    PtsToAddByCnt : list of a list of a list of floats
+    PtsToAddByCnt : list of a list of a list of floats or list of Numpy arrays
         List (for each contour) of a list (for each point) of a list (for each 
         dimension) of coordinates in the list of points-by-contour to be added. 
         
@@ -925,6 +1064,12 @@ def AddCopiedPtsByCnt(OrigPtsByCnt, OrigCStoSliceInds,
         List (for each contour) of slice numbers that correspond to each 
         contour in PtsToAddByCnt.
         
+    OrigCntDataByCnt : list of a list of strings (optional; None by default)
+        List (for each contour) of the ContourData that corresponds to 
+        OrigPtsByCnt (e.g. from GetCntDataInRoi()).  If provided, preserved 
+        contours will re-use their ContourData rather than re-formatting 
+        their points.
+        
     LogToConsole : boolean (optional; False by default)
         Denotes whether intermediate results will be logged to the console.
         
@@ -936,10 +1081,10 @@ def AddCopiedPtsByCnt(OrigPtsByCnt, OrigCStoSliceInds,
         Modfied list (for each contour) of a flat list of [x, y, z] coordinates
         of the polygons that define each contour including PtsToAdd.
         
-    NewPtsByCnt : list of a list of a list of floats
+    NewPtsByCnt : list of a list of a list of floats or list of Numpy arrays
         Modified list (for each contour) of a list (for each point) of a list 
         (for each dimension) of the polygons that define each contour including 
-        PtsToAdd.
+        PtsToAdd (the items of OrigPtsByCnt and PtsToAddByCnt are not copied).
         
     NewCStoSliceInds : list of integers
         Modified list (for each contour) of slice numbers that correspond to  
@@ -1016,7 +1161,10 @@ def AddCopiedPtsByCnt(OrigPtsByCnt, OrigCStoSliceInds,
             
             NewPtsByCnt.append(OrigPtsByCnt[ind])
             
-            NewCntDataByCnt.append(Points2ContourData(OrigPtsByCnt[ind]))
+            if OrigCntDataByCnt is None:
+                NewCntDataByCnt.append(Points2ContourData(OrigPtsByCnt[ind]))
+            else:
+                NewCntDataByCnt.append(OrigCntDataByCnt[ind])
         
         if LogToConsole:
             print(f'      len(NewPtsByCnt[-1]) = {len(NewPtsByCnt[-1])}')
@@ -1059,12 +1207,13 @@ def GetIndsByRoi(Rts, DicomDir):
         dimension) of indices.
     """
     
-    from ImageTools import GetImageAttributes
-    from ConversionTools import ContourToIndices
+    from ImageTools import GetSeriesGeometry
+    from ConversionTools import Contour2Indices
     
-    PtsByRoi = GetPtsByRoi(Rts, DicomDir)
+    PtsByRoi, CStoSliceIndsByRoi = GetPtsByRoi(Rts, DicomDir)
     
-    Size, Spacings, ST, IPPs, Dirs = GetImageAttributes(DicomDir)
+    # Get the (memoised) geometry:
+    Geometry = GetSeriesGeometry(DicomDir)
     
     
     Nrois = len(PtsByRoi)
@@ -1078,7 +1227,7 @@ def GetIndsByRoi(Rts, DicomDir):
         PtsByContour = PtsByRoi[r]
         
         for contour in PtsByContour:
-            Indices = ContourToIndices(contour, IPPs[0], Dirs, Spacings)
+            Indices = Contour2Indices(contour, Geometry=Geometry)
                 
             IndsByContour.append(Indices)
             
@@ -1133,11 +1282,12 @@ def GetMaskFromRts(Rts, SearchString, SliceNum, DicomDir, RefImage):
     #import ConversionTools
     #importlib.reload(ConversionTools)
     
-    from ImageTools import GetImageAttributes
-    from ConversionTools import Point2Index
+    from ImageTools import GetSeriesGeometry
+    from ConversionTools import Contour2Indices
     from ConversionTools import Indices2Mask
     
-    Size, Spacings, ST, IPPs, Dirs = GetImageAttributes(DicomDir)
+    # Get the (memoised) geometry:
+    Geometry = GetSeriesGeometry(DicomDir)
     
     # Get the contour points (in the Patient Coordinate System):
     #Points, CStoSliceInds = GetPtsInContour(Rts, SearchString, SliceNum, 
@@ -1147,19 +1297,9 @@ def GetMaskFromRts(Rts, SearchString, SliceNum, DicomDir, RefImage):
     #print(f'\nlen(Points) = {len(Points)}')
     #print(f'\nPoints = {Points}')
     
-    # Convert the points to indices (i.e. the Image Coordinate System):
-    Inds = []
-            
-    for point in Points:
-        #print(f'\nlen(point) = {len(point)}')
-        
-        inds = Point2Index(Point=point, Origin=IPPs[0], 
-                           Directions=Dirs, Spacings=Spacings)
-        
-        # Convert fractional indices to integers:
-        inds = [int(round(item)) for item in inds]
-        
-        Inds.append(inds)
+    # Convert the points to (rounded) indices (i.e. the Image Coordinate 
+    # System):
+    Inds = Contour2Indices(Points, Rounding=True, Geometry=Geometry)
     
     
     Mask = Indices2Mask(Inds, RefImage)
@@ -1462,9 +1602,10 @@ def ModifyRts(Rts, CntDataByCnt, PtsByCnt, CStoSliceInds, DicomDir,
         A list (for each contour) of a flat list of [x, y, z] coordinates
         of the polygons that define each contour as strings.
         
-    PtsByCnt : list of a list of a list of floats
+    PtsByCnt : list of a list of a list of floats or list of Numpy arrays
         A list (for each contour) of a list (for each point) of a list (for 
-        each dimension) of the polygons that define each contour.
+        each dimension), or of a N x 3 array, of the polygons that define each
+        contour.
     
     CStoSliceInds : List of integers
         List (for each contour) of slice numbers that correspond to each 
@@ -1483,9 +1624,13 @@ def ModifyRts(Rts, CntDataByCnt, PtsByCnt, CStoSliceInds, DicomDir,
     Rts : Pydicom object
         Modified RTS ROI object.
     """
-    from DicomTools import ImportDicoms
+    from DicomTools import GetSeriesMetadata
     
-    Dicoms = ImportDicoms(DicomDir)
+    # Get the SOP Instance UIDs and FOR UID from the (cached) series metadata
+    # rather than importing the DICOMs:
+    Metadata = GetSeriesMetadata(DicomDir)
+    
+    SOPuids = Metadata['SOPuids']
     
     if False:
         CIS = Rts.ReferencedFrameOfReferenceSequence[0]\
@@ -1500,7 +1645,7 @@ def ModifyRts(Rts, CntDataByCnt, PtsByCnt, CStoSliceInds, DicomDir,
     if LogToConsole:
         print('\n\nRunning ModifyRts:')
         print(f'   CStoSliceInds = {CStoSliceInds}')
-        print(f'   len(Dicoms) = {len(Dicoms)}')
+        print(f'   len(SOPuids) = {len(SOPuids)}')
     
     for i in range(len(CStoSliceInds)):
         # The DICOM slice index for this sequence:
@@ -1515,13 +1660,13 @@ def ModifyRts(Rts, CntDataByCnt, PtsByCnt, CStoSliceInds, DicomDir,
            .RTReferencedStudySequence[0]\
            .RTReferencedSeriesSequence[0]\
            .ContourImageSequence[i]\
-           .ReferencedSOPInstanceUID = Dicoms[s].SOPInstanceUID
+           .ReferencedSOPInstanceUID = SOPuids[s]
         
         # Modify the ReferencedSOPInstanceUID in ROIContourSequence:
         Rts.ROIContourSequence[0]\
            .ContourSequence[i]\
            .ContourImageSequence[0]\
-           .ReferencedSOPInstanceUID = Dicoms[s].SOPInstanceUID
+           .ReferencedSOPInstanceUID = SOPuids[s]
         
         # The contour points for this contour:
         Points = PtsByCnt[i]
@@ -1561,7 +1706,7 @@ def ModifyRts(Rts, CntDataByCnt, PtsByCnt, CStoSliceInds, DicomDir,
     Rts.StructureSetROISequence[0].RoiNumber = f"1"
         
     Rts.StructureSetROISequence[0]\
-       .ReferencedFrameOfReferenceUID = Dicoms[0].FrameOfReferenceUID
+       .ReferencedFrameOfReferenceUID = Metadata['FORuid']
        
     # Modify ROIContourSequence:
     Rts.ObservationNumber = f"{1}"
@@ -1583,6 +1728,294 @@ def ModifyRts(Rts, CntDataByCnt, PtsByCnt, CStoSliceInds, DicomDir,
 
 
 
+def CreateRts(RtsTemplate, RoiNum, CntDataByCnt, PtsByCnt, CStoSliceInds, 
+              DicomDir, NamePrefix='', LogToConsole=False):
+    """
+    Create a new RTS object containing a single ROI directly from the series 
+    metadata and the contours, copying only the header elements (and the 
+    elements of the ROI of interest) from an existing RTS object.  This 
+    replaces the use of InitialiseRts() followed by ModifyRts().
+         
+    
+    Inputs:
+    ------
+                              
+    RtsTemplate : Pydicom object
+        RTS object whose header elements will be copied to the new object.
+    
+    RoiNum : integer
+        The index of the ROI in RtsTemplate that contains the contour to be 
+        copied (counting from 0).
+    
+    CntDataByCnt : list of a list of strings or None
+        A list (for each contour) of a flat list of [x, y, z] coordinates
+        of the polygons that define each contour as strings (or as the DS 
+        values of the ContourData of existing contours).  If None the
+        contour data will be obtained from PtsByCnt.
+        
+    PtsByCnt : list of a list of a list of floats or list of Numpy arrays
+        A list (for each contour) of a list (for each point) of a list (for 
+        each dimension), or of a N x 3 array, of the polygons that define each
+        contour (e.g. views of a contour store obtained using 
+        GetPtsByCntInStore()).
+    
+    CStoSliceInds : List of integers
+        List (for each contour) of slice numbers that correspond to each 
+        contour in PtsByCnt.
+    
+    DicomDir : string
+        Directory containing the corresponding DICOMs.
+    
+    NamePrefix : string (optional; '' by default)
+        Prefix to be added to the assigned filename (after the DateTime stamp), 
+        e.g. 'Case3b-i'.
+    
+    LogToConsole : boolean (optional; False by default)
+        Denotes whether intermediate results will be logged to the console.
+        
+        
+    Output:
+    ------
+        
+    Rts : Pydicom object
+        New RTS object.
+    
+    
+    Notes:
+    -----
+    
+    1) Unlike InitialiseRts() the template is not deep-copied, so the cost is 
+    linear in the number of contours to be written rather than in the size of
+    RtsTemplate.  The contour sequences are built from new items, and the
+    StructureSetROISequence, ROIContourSequence and RTROIObservationsSequence
+    items are those of the ROI of interest (InitialiseRts() kept the items of
+    the first ROI and only changed the ROIName), renumbered as ROI 1.
+    
+    2) The ContourData of each contour is stored as a raw (encoded) data 
+    element, so Pydicom doesn't create a DS object for each coordinate.  The
+    element is written to file as is and converted by Pydicom if accessed.
+    """
+    
+    from copy import deepcopy
+    import time
+    from pydicom import read_file
+    from pydicom.dataelem import RawDataElement
+    from pydicom.dataset import Dataset, FileDataset
+    from pydicom.sequence import Sequence
+    from pydicom.tag import Tag
+    from pydicom.uid import generate_uid
+    from DicomTools import GetSeriesMetadata
+    from ConversionTools import Pts2CntData
+    
+    Metadata = GetSeriesMetadata(DicomDir)
+    
+    SOPuids = Metadata['SOPuids']
+    
+    # Read the patient and study tags from the first DICOM (stopping before 
+    # PixelData):
+    Dicom = read_file(Metadata['FilePaths'][0], stop_before_pixels=True)
+    
+    # The items for the ROI of interest in the StructureSetROISequence, 
+    # ROIContourSequence and RTROIObservationsSequence of RtsTemplate:
+    SSROI = RtsTemplate.StructureSetROISequence[RoiNum]
+    
+    RoiNumber = SSROI.ROINumber
+    
+    ROIC = RtsTemplate.ROIContourSequence[RoiNum]
+    
+    for Item in RtsTemplate.ROIContourSequence:
+        if Item.ReferencedROINumber == RoiNumber:
+            ROIC = Item
+    
+    Obs = None
+    
+    for Item in RtsTemplate.get('RTROIObservationsSequence', []):
+        if Item.ReferencedROINumber == RoiNumber:
+            Obs = Item
+    
+    # Elements that will be created rather than copied from RtsTemplate:
+    RoiKeywords = ['ReferencedFrameOfReferenceSequence', 
+                   'StructureSetROISequence', 'ROIContourSequence', 
+                   'RTROIObservationsSequence']
+    
+    FileMeta = deepcopy(RtsTemplate.file_meta)
+    
+    Preamble = getattr(RtsTemplate, 'preamble', None) or b'\x00'*128
+    
+    Rts = FileDataset('', Dataset(), file_meta=FileMeta, preamble=Preamble)
+    
+    Rts.is_little_endian = RtsTemplate.is_little_endian
+    Rts.is_implicit_VR = RtsTemplate.is_implicit_VR
+    
+    # Copy the header elements:
+    for Elem in RtsTemplate:
+        if not Elem.keyword in RoiKeywords:
+            Rts.add(deepcopy(Elem))
+    
+    # Generate a new SOPInstanceUID:
+    Rts.SOPInstanceUID = generate_uid()
+    
+    Rts.file_meta.MediaStorageSOPInstanceUID = Rts.SOPInstanceUID
+    
+    Rts.StudyDate = Dicom.StudyDate
+    Rts.StudyTime = Dicom.StudyTime
+    Rts.SeriesDate = Dicom.SeriesDate
+    Rts.PatientName = Dicom.PatientName
+    Rts.PatientID = Dicom.PatientID
+    Rts.PatientBirthDate = Dicom.PatientBirthDate
+    Rts.PatientSex = Dicom.PatientSex
+    Rts.StudyInstanceUID = Metadata['Studyuid']
+    
+    # Generate a new SeriesInstanceUID:
+    Rts.SeriesInstanceUID = generate_uid()
+    
+    Rts.StudyID = Dicom.get('StudyID', '')
+    Rts.FrameOfReferenceUID = Metadata['FORuid']
+    
+    Rts.StructureSetLabel = NamePrefix
+    
+    # Modify the Structure Set Date and Time to the present:
+    Rts.StructureSetDate = time.strftime("%Y%m%d", time.gmtime())
+    Rts.StructureSetTime = time.strftime("%H%M%S", time.gmtime())
+    
+    
+    """ 
+    ReferencedFrameOfReferenceSequence, with one ContourImageSequence item 
+    for each contour.
+    """
+    TemplateRFOR = RtsTemplate.ReferencedFrameOfReferenceSequence[0]
+    TemplateRTRS = TemplateRFOR.RTReferencedStudySequence[0]
+    TemplateRTRSe = TemplateRTRS.RTReferencedSeriesSequence[0]
+    
+    def CopyNonSequences(Item):
+        """ Copy the non-sequence elements of a sequence item. """
+        NewItem = Dataset()
+        
+        for Elem in Item:
+            if not Elem.VR == 'SQ':
+                NewItem.add(deepcopy(Elem))
+        
+        return NewItem
+    
+    def ContourImageItem(SOPuid):
+        """ Create a ContourImageSequence item. """
+        Item = Dataset()
+        Item.ReferencedSOPClassUID = Metadata['SOPClassuid']
+        Item.ReferencedSOPInstanceUID = SOPuid
+        
+        return Item
+    
+    RTRSe = CopyNonSequences(TemplateRTRSe)
+    RTRSe.SeriesInstanceUID = Metadata['Seriesuid']
+    RTRSe.ContourImageSequence = Sequence([ContourImageItem(SOPuids[s]) 
+                                           for s in CStoSliceInds])
+    
+    RTRS = CopyNonSequences(TemplateRTRS)
+    RTRS.ReferencedSOPInstanceUID = Metadata['Studyuid']
+    RTRS.RTReferencedSeriesSequence = Sequence([RTRSe])
+    
+    RFOR = CopyNonSequences(TemplateRFOR)
+    RFOR.FrameOfReferenceUID = Metadata['FORuid']
+    RFOR.RTReferencedStudySequence = Sequence([RTRS])
+    
+    Rts.ReferencedFrameOfReferenceSequence = Sequence([RFOR])
+    
+    
+    """ StructureSetROISequence with the ROI of interest. """
+    NewSSROI = CopyNonSequences(SSROI)
+    NewSSROI.ROINumber = "1"
+    NewSSROI.ReferencedFrameOfReferenceUID = Metadata['FORuid']
+    
+    Rts.StructureSetROISequence = Sequence([NewSSROI])
+    
+    
+    """ ROIContourSequence with a ContourSequence item for each contour. """
+    # Elements of the first contour of the ROI of interest in RtsTemplate 
+    # (e.g. ContourGeometricType) that will be copied to each contour:
+    CntElems = []
+    
+    if 'ContourSequence' in ROIC and len(ROIC.ContourSequence):
+        for Elem in ROIC.ContourSequence[0]:
+            if not Elem.keyword in ['ContourImageSequence', 'ContourData',
+                                    'NumberOfContourPoints', 'ContourNumber']:
+                CntElems.append(Elem)
+    
+    HasCntNumber = 'ContourSequence' in ROIC and len(ROIC.ContourSequence) \
+                   and 'ContourNumber' in ROIC.ContourSequence[0]
+    
+    ContourDataTag = Tag('ContourData')
+    
+    ContourSequence = []
+    
+    for i in range(len(CStoSliceInds)):
+        if CntDataByCnt is None:
+            CntData = Pts2CntData(PtsByCnt[i])
+        else:
+            CntData = CntDataByCnt[i]
+        
+        Contour = Dataset()
+        
+        Contour.ContourImageSequence\
+        = Sequence([ContourImageItem(SOPuids[CStoSliceInds[i]])])
+        
+        for Elem in CntElems:
+            Contour.add(deepcopy(Elem))
+        
+        if not 'ContourGeometricType' in Contour:
+            Contour.ContourGeometricType = 'CLOSED_PLANAR'
+        
+        Contour.NumberOfContourPoints = f"{len(PtsByCnt[i])}"
+        
+        if HasCntNumber:
+            Contour.ContourNumber = f"{i + 1}"
+        
+        # The encoded ContourData (padded to an even length).  CntData may be
+        # the ContourData of an existing contour (e.g. from GetCntDataInRoi())
+        # whose values are DS objects (whose str is their original string):
+        Value = '\\'.join([str(Val) for Val in CntData]).encode()
+        
+        if len(Value) % 2:
+            Value += b' '
+        
+        Contour[ContourDataTag] = RawDataElement(ContourDataTag, 'DS', 
+                                                 len(Value), Value, 0, 
+                                                 Rts.is_implicit_VR, 
+                                                 Rts.is_little_endian)
+        
+        ContourSequence.append(Contour)
+    
+    NewROIC = CopyNonSequences(ROIC)
+    NewROIC.ReferencedROINumber = "1"
+    NewROIC.ContourSequence = Sequence(ContourSequence)
+    
+    Rts.ROIContourSequence = Sequence([NewROIC])
+    
+    
+    """ RTROIObservationsSequence with the ROI of interest. """
+    if Obs is not None:
+        NewObs = deepcopy(Obs)
+        NewObs.ObservationNumber = "1"
+        NewObs.ReferencedROINumber = "1"
+        
+        Rts.RTROIObservationsSequence = Sequence([NewObs])
+    
+    
+    if LogToConsole:
+        print('\n\nResults of CreateRts:')
+        print(f'   ROIName = {NewSSROI.ROIName}')
+        print(f'   CStoSliceInds = {CStoSliceInds}')
+        print(f'   There are {len(ContourSequence)} sequences in',
+              'ContourSequence and ContourImageSequence.')
+    
+    return Rts
+
+
+
+
+
+
+
+
 def CentroidOfContour(Contour):
     """
     Compute the centroid of a list of points (or indices).  
@@ -30,6 +30,23 @@ SEGMENT FUNCTIONS
 """      
 
 
+from collections import OrderedDict
+
+# Process-wide LRU cache of frames unpacked from the PixelData of SEGs (see
+# GetSegFrames()), keyed by SOPInstanceUID.  The try/except ensures that the
+# cache survives importlib.reload(SegTools):
+try:
+    SegFrameCache
+except NameError:
+    SegFrameCache = OrderedDict()
+
+# The maximum number of bytes held by SegFrameCache (the unpacked frames, and
+# the PixelData that can't be weakly referenced):
+SegFrameCacheBytes = 256*2**20
+
+
+
+
 def GetFrameNums(Seg, SearchString, DicomDir):
     """
     Get the frame number(s) in a SEG's pixel array that matches the segment 
@@ -181,14 +198,18 @@ def GetRIStoSliceInds(Seg, SOPuids):
         Seg.
     """
     
+    from DicomTools import GetSliceIndBySOPuid
+    
     # Get the list of Referenced SOP Instance UIDs:
     RSOPuids = GetRSOPuidsInRIS(Seg)
     
+    SliceIndBySOPuid = GetSliceIndBySOPuid(SOPuids)
+    
     RIStoSliceInds = [] 
     
     for Ruid in RSOPuids:
         # Find the matching index of Ruid in SOPuids:
-        RIStoSliceInds.append(SOPuids.index(Ruid))
+        RIStoSliceInds.append(SliceIndBySOPuid[Ruid])
         
     return RIStoSliceInds
 
@@ -255,14 +276,18 @@ def GetPFFGStoSliceInds(Seg, SOPuids):
         Per-FrameFunctionalGroupsSequence in Seg.
     """
     
+    from DicomTools import GetSliceIndBySOPuid
+    
     # Get the list of Referenced SOP Instance UIDs:
     RSOPuids = GetRSOPuidsInPFFGS(Seg)
     
+    SliceIndBySOPuid = GetSliceIndBySOPuid(SOPuids)
+    
     PFFGStoSliceInds = [] 
     
     for Ruid in RSOPuids:
         # Find the matching index of Ruid in SOPuids:
-        PFFGStoSliceInds.append(SOPuids.index(Ruid))
+        PFFGStoSliceInds.append(SliceIndBySOPuid[Ruid])
         
     return PFFGStoSliceInds
 
@@ -623,6 +648,251 @@ def ChangeNumOfSegSequences(Seg, Dicoms, NumOfFrames, LogToConsole=False):
 
 
 
+def ImportSeg(SegFpath, MemoryMap=True):
+    """
+    Import a SEG, optionally with its PixelData memory-mapped from the file.
+    
+    Inputs:
+    ------
+    
+    SegFpath : string
+        Full path of the SEG file.
+    
+    MemoryMap : boolean (optional; True by default)
+        If True the (packed) PixelData will be memory-mapped rather than read
+        into memory (see DicomTools.ReadDicomMemmap()).
+    
+    
+    Outputs:
+    -------
+    
+    Seg : Pydicom object
+        SEG object.
+    
+    
+    Notes:
+    -----
+    
+    With MemoryMap = True frames extracted using GetSegFrames() (e.g. via 
+    GetFrameFromPixArr() or GetPixArrInSeg()) only page in the bytes of the
+    file that they span, so the memory used doesn't scale with the size of the
+    SEG.
+    """
+    
+    from pydicom import dcmread
+    from DicomTools import ReadDicomMemmap
+    
+    if MemoryMap:
+        Seg = ReadDicomMemmap(SegFpath)
+    else:
+        Seg = dcmread(SegFpath)
+    
+    return Seg
+
+
+
+
+
+
+
+
+def GetSegFrames(Seg, FrameNums):
+    """
+    Get selected frames from a SEG's pixel array without decoding the entire
+    pixel array.
+    
+    Inputs:
+    ------
+    
+    Seg : Pydicom object
+        SEG object.
+    
+    FrameNums : list of integers
+        Frame numbers (counting from 0) of the frames to be extracted.
+    
+    
+    Outputs:
+    -------
+    
+    Frames : Numpy array
+        Array of shape (len(FrameNums), R, C) containing the requested frames
+        (in the order given by FrameNums).
+    
+    
+    Notes:
+    -----
+    
+    For uncompressed SEGs with BitsAllocated = 1 (BINARY) only the bytes of 
+    PixelData that span the requested frames are unpacked, so extracting one
+    frame from a SEG with thousands of frames costs one frame rather than the
+    whole volume.  Frames need not start on a byte boundary (i.e. R*C need not
+    be a multiple of 8).  Uncompressed SEGs with BitsAllocated = 8 
+    (FRACTIONAL) are read directly from PixelData.  Compressed SEGs fall back 
+    to Seg.pixel_array.
+    
+    If the SEG was imported using ImportSeg() with MemoryMap = True, 
+    PixelData is a memmap and only the pages spanning the requested frames 
+    are read from disk.
+    
+    The unpacked frames are kept in SegFrameCache.  A SEG's entry is discarded
+    if its PixelData is replaced (e.g. by ModifySeg()).  The entry only holds
+    a weak reference to PixelData if it is a Numpy array (e.g. a memmap), so
+    the entry is also discarded once the PixelData is garbage collected.  
+    bytes can't be weakly referenced so the entry holds PixelData, whose size
+    is then counted towards SegFrameCacheBytes along with the frames.  The 
+    least recently used entries are discarded to keep the total within
+    SegFrameCacheBytes.
+    """
+    
+    import weakref
+    import numpy as np
+    
+    R = int(Seg.Rows)
+    C = int(Seg.Columns)
+    
+    AllF = int(getattr(Seg, 'NumberOfFrames', 1) or 1)
+    
+    FrameNums = [int(FrameNum) for FrameNum in FrameNums]
+    
+    for FrameNum in FrameNums:
+        if not 0 <= FrameNum < AllF:
+            msg = f'Frame number {FrameNum} is out of range for the SEG '\
+                  + f'which has {AllF} frames.'
+            
+            raise Exception(msg)
+    
+    Frames = np.zeros((len(FrameNums), R, C), dtype='uint8')
+    
+    if not FrameNums:
+        return Frames
+    
+    Bits = int(Seg.BitsAllocated)
+    
+    PixelData = Seg.PixelData
+    
+    IsCompressed = False
+    
+    if hasattr(Seg, 'file_meta') and 'TransferSyntaxUID' in Seg.file_meta:
+        IsCompressed = Seg.file_meta.TransferSyntaxUID.is_compressed
+    
+    if IsCompressed or not Bits in [1, 8] \
+    or not isinstance(PixelData, (bytes, bytearray, np.ndarray)):
+        # Decode the entire pixel array (pydicom keeps the decoded array on
+        # Seg, so this is only done once per SEG):
+        PixArr = np.reshape(Seg.pixel_array, (AllF, R, C))
+        
+        Frames[:] = PixArr[FrameNums]
+        
+        return Frames
+    
+    Key = str(getattr(Seg, 'SOPInstanceUID', id(Seg)))
+    
+    Entry = SegFrameCache.get(Key, None)
+    
+    if Entry is None or not Entry['PixelDataRef']() is PixelData:
+        try:
+            # Discard the entry when PixelData is garbage collected:
+            PixelDataRef = weakref.ref(PixelData, 
+                                       lambda Ref: DiscardSegFrames(Key, Ref))
+            
+            Bytes = 0
+        except TypeError:
+            # Keep PixelData (and count its size):
+            PixelDataRef = lambda: PixelData
+            
+            Bytes = len(PixelData)
+        
+        Entry = {'PixelDataRef' : PixelDataRef, 'Frames' : {}, 
+                 'Bytes' : Bytes}
+    
+    SegFrameCache[Key] = Entry
+    SegFrameCache.move_to_end(Key)
+    
+    CachedFrames = Entry['Frames']
+    
+    # The number of pixels per frame:
+    N = R*C
+    
+    for i in range(len(FrameNums)):
+        FrameNum = FrameNums[i]
+        
+        if not FrameNum in CachedFrames:
+            if Bits == 1:
+                # The first and last (+1) bits of the frame, and the bytes 
+                # that contain them:
+                StartBit = FrameNum*N
+                EndBit = StartBit + N
+                StartByte = StartBit//8
+                EndByte = -(-EndBit//8)
+                
+                Bytes = np.frombuffer(PixelData, dtype='uint8', 
+                                      count=EndByte - StartByte, 
+                                      offset=StartByte)
+                
+                # Bits are packed least significant bit first:
+                Unpacked = np.unpackbits(Bytes, bitorder='little')
+                
+                Frame = Unpacked[StartBit - 8*StartByte:EndBit - 8*StartByte]
+            else:
+                # Copy the frame so that it doesn't hold a reference to 
+                # PixelData:
+                Frame = np.frombuffer(PixelData, dtype='uint8', count=N, 
+                                      offset=FrameNum*N).copy()
+            
+            Frame = Frame.reshape((R, C))
+            
+            Frame.flags.writeable = False
+            
+            CachedFrames[FrameNum] = Frame
+            
+            Entry['Bytes'] += Frame.nbytes
+        
+        Frames[i] = CachedFrames[FrameNum]
+    
+    # Discard the least recently used entries (including this one if it 
+    # exceeds SegFrameCacheBytes on its own):
+    TotalBytes = sum([Entry['Bytes'] for Entry in SegFrameCache.values()])
+    
+    while SegFrameCache and TotalBytes > SegFrameCacheBytes:
+        TotalBytes -= SegFrameCache.popitem(last=False)[1]['Bytes']
+    
+    return Frames
+
+
+
+
+
+
+
+
+def DiscardSegFrames(Key, PixelDataRef):
+    """
+    Discard the entry for a SEG in SegFrameCache if it was created for the 
+    PixelData referenced by PixelDataRef (called by the weak reference to 
+    PixelData once it is garbage collected).
+    
+    Inputs:
+    ------
+    
+    Key : string
+        The key of the entry in SegFrameCache (the SOPInstanceUID of the SEG).
+    
+    PixelDataRef : weakref
+        The (dead) weak reference to the SEG's PixelData.
+    """
+    
+    Entry = SegFrameCache.get(Key, None)
+    
+    if Entry is not None and Entry['PixelDataRef'] is PixelDataRef:
+        del SegFrameCache[Key]
+
+
+
+
+
+
+
+
 def GetFrameFromPixArr(Seg, DicomDir, SearchString, SliceNum, LogToConsole):
     """
     Extract a single (2D) frame from a 3D pixel array that matches a given
@@ -656,7 +926,6 @@ def GetFrameFromPixArr(Seg, DicomDir, SearchString, SliceNum, LogToConsole):
         Frame from PixArr.
     """
     
-    import numpy as np
     from DicomTools import GetDicomSOPuids
     from DicomTools import GetRoiLabels
     from DicomTools import GetRoiNum
@@ -704,22 +973,8 @@ def GetFrameFromPixArr(Seg, DicomDir, SearchString, SliceNum, LogToConsole):
         print(f'   SliceNum = {SliceNum} relates to FrameNum = {FrameNum} in',
               'PixelArray')
     
-    PixArr = Seg.pixel_array
-    
-    if len(PixArr.shape) < 3:
-        # This is a single-frame PixArr, i.e. shape (R, C). Reshape it to 
-        # shape (1, R, C):
-        R, C = PixArr.shape
-        
-        PixArr = np.reshape(PixArr, (1, R, C))
-    else:
-        # This is a multi-frame PixArr, i.e. shape (AllF, R, C).
-        AllF, R, C = PixArr.shape
-    
-    # Initialise Frame:
-    Frame = np.zeros((1, R, C), dtype='uint')
-    
-    Frame[0] = PixArr[FrameNum]
+    # Unpack only the frame of interest from PixelData:
+    Frame = GetSegFrames(Seg, [FrameNum])
             
     return Frame
 
@@ -763,53 +1018,25 @@ def GetFramesFromPixArr(Seg, DicomDir, SearchString, LogToConsole):
     """
     
     import numpy as np
-    from DicomTools import GetDicomSOPuids
-    from DicomTools import GetRoiNum
     
-    # Determine which segment contains the segmentation to be copied, and
-    # the corresponding frame number in the pixel array:
-    """ Note:  SegNum is equivalent to SegmentNumber in SegmentSequence. """
-    SegNum = GetRoiNum(Seg, SearchString)
-    
-    SOPuids = GetDicomSOPuids(DicomDir)
-    
-    PFFGStoSliceIndsBySeg = GetPFFGStoSliceIndsBySeg(Seg, SOPuids)
-    
-    PFFGStoSliceIndsInSeg = PFFGStoSliceIndsBySeg[SegNum]
+    # Get the frame numbers in the SEG's pixel array that belong to the 
+    # segment of interest, and the corresponding Per-frame Functional Groups
+    # Sequence-to-slice indices:
+    FrameNumsInSeg, PFFGStoSliceIndsInSeg = GetFrameNums(Seg, SearchString, 
+                                                         DicomDir)
     
     # The number of frames in the segment of interest:
     F = len(PFFGStoSliceIndsInSeg)
     
-    # Get the number of rows and columns required for Frames:
-    PixArr = Seg.pixel_array
-    
-    if len(PixArr.shape) < 3:
-        """ This is a single-frame PixArr, i.e. shape (1, R, C). """
-        R, C = PixArr.shape
-    else:
-        """ This is a multi-frame PixArr, i.e. shape (AllF, R, C). """
-        AllF, R, C = PixArr.shape
-    
-    Frames = np.zeros((F, R, C), dtype='uint')
-    
-    for f in range(F):
-        SliceNum = PFFGStoSliceIndsInSeg[f]
-        
-        Frame = GetFrameFromPixArr(Seg, DicomDir, SearchString, SliceNum, 
-                                   LogToConsole)
-        
-        Frames[f] = Frame
+    # Unpack only those frames from PixelData:
+    Frames = GetSegFrames(Seg, FrameNumsInSeg)
     
     if LogToConsole:
         print('\n\n***Result from GetFramesFromPixArr:')
         print(f'   There are {F} frames in the segment matching',
               f'"{SearchString}".')
         print(f'   PFFGStoSliceIndsInSeg = {PFFGStoSliceIndsInSeg}')
-        print(f'   PixArr.shape = {PixArr.shape}')
-        if len(PixArr.shape) > 2:
-            [print(f'   np.amax(PixArr[{i}]) = {np.amax(PixArr[i])}') for i in range(PixArr.shape[0])]
-        else:
-            print(f'   np.amax(PixArr) = {np.amax(PixArr)}')
+        print(f'   FrameNumsInSeg = {FrameNumsInSeg}')
         print(f'   Frames.shape = {Frames.shape}')
         if len(Frames.shape) > 2:
             [print(f'   np.amax(Frames[{i}]) = {np.amax(Frames[i])}') for i in range(Frames.shape[0])]
@@ -855,24 +1082,14 @@ def GetPixArrInSeg(Seg, DicomDir, SearchString):
         each frame in PixArr.
     """
     
-    import numpy as np
-    
-    AllPixArr = Seg.pixel_array
-    
-    AllF, R, C = AllPixArr.shape
-    
     # Get the frame numbers of the SEG's pixel array that correspond to the 
     # segment of interest, and the corresponding Per-frame Functional Groups
     # Sequence-to-slice indices:
     FrameNumsInSeg, PFFGStoSliceIndsInSeg = GetFrameNums(Seg, SearchString, 
                                                          DicomDir)
     
-    F = len(FrameNumsInSeg)
-    
-    PixArrInSeg = np.zeros((F, R, C), dtype='uint')
-    
-    for i in range(F):  
-        PixArrInSeg[i] = AllPixArr[FrameNumsInSeg[i]]
+    # Unpack only those frames from PixelData:
+    PixArrInSeg = GetSegFrames(Seg, FrameNumsInSeg)
     
         
     return PixArrInSeg, PFFGStoSliceIndsInSeg
@@ -942,7 +1159,7 @@ def AddCopiedPixArr(OrigPixArr, OrigPFFGStoSliceInds,
     
     OrigF, R, C = OrigPixArr.shape
     
-    NewPixArr = np.zeros((F, R, C), dtype='uint')
+    NewPixArr = np.zeros((F, R, C), dtype='uint8')
     
     for FrameNum in range(F):
         # The corresponding slice number for this frame:
@@ -1246,7 +1463,181 @@ def InitialiseSeg(SegTemplate, SearchString, PFFGStoSliceInds, DicomDir,
 
 
 
-def ModifySeg(Seg, PixArr, PFFGStoSliceInds, DicomDir, LogToConsole=False):
+def GetOrigFrameNums(Seg, SearchString, DicomDir, PFFGStoSliceInds, 
+                     ModifiedSliceInds):
+    """
+    Get the frame numbers in a SEG's pixel array of the frames of a new pixel
+    array that are preserved (unmodified) from the SEG.
+    
+    Inputs:
+    ------
+    
+    Seg : Pydicom object
+        The original SEG object.
+    
+    SearchString : string
+        All or part of the Segment Label containing the segment of interest.
+    
+    DicomDir : string
+        Directory containing the corresponding DICOMs.
+    
+    PFFGStoSliceInds : list of integers
+        List of slice numbers that correspond to each frame in the new pixel
+        array.
+    
+    ModifiedSliceInds : list of integers
+        List of slice numbers of the frames in the new pixel array that were 
+        modified (e.g. copied), i.e. that don't exist in Seg.
+    
+    
+    Outputs:
+    -------
+    
+    OrigFrameNums : list of integers or None
+        List (for each frame in the new pixel array) of the frame number in
+        Seg's pixel array of the same frame, or None if the frame was modified.
+        To be passed to ModifySeg() (or PackPixArr()).
+    """
+    
+    # Get the frame numbers in Seg's pixel array that belong to the segment of
+    # interest, and the corresponding slice numbers:
+    FrameNumsInSeg, PFFGStoSliceIndsInSeg = GetFrameNums(Seg, SearchString, 
+                                                         DicomDir)
+    
+    FrameNumBySliceInd = dict(zip(PFFGStoSliceIndsInSeg, FrameNumsInSeg))
+    
+    OrigFrameNums = []
+    
+    for SliceInd in PFFGStoSliceInds:
+        if SliceInd in ModifiedSliceInds:
+            OrigFrameNums.append(None)
+        else:
+            OrigFrameNums.append(FrameNumBySliceInd.get(SliceInd, None))
+    
+    return OrigFrameNums
+
+
+
+
+
+
+
+
+def PackPixArr(PixArr, Seg=None, OrigFrameNums=None):
+    """
+    Pack the bits of a binary pixel array into bytes for a SEG's PixelData, 
+    re-using the packed bytes of any frames that are unchanged from an 
+    existing SEG.
+    
+    Inputs:
+    ------
+    
+    PixArr : Numpy array
+        A FxRxC (Frames x Rows x Columns) binary pixel array (of any type, 
+        e.g. uint8 or float, containing only zeros and ones).
+    
+    Seg : Pydicom object (optional; None by default)
+        SEG object whose (packed) PixelData contains the unchanged frames.
+    
+    OrigFrameNums : list of integers or None (optional; None by default)
+        List (for each frame in PixArr) of the frame number in Seg's PixelData
+        of the same frame, or None if the frame is new or was modified (see 
+        GetOrigFrameNums()).  If None all frames will be packed.
+    
+    
+    Outputs:
+    -------
+    
+    PixelData : bytes
+        The packed bits (padded to an even length).
+    
+    
+    Notes:
+    -----
+    
+    Frames start on a byte boundary when R*C is a multiple of 8, in which case
+    the bytes of unchanged frames are copied from Seg's PixelData and only
+    the modified frames are packed (with a single call to np.packbits).  
+    Otherwise (or if Seg's PixelData can't be sliced into frames of the same
+    size) all of PixArr is packed in one go.
+    
+    As for Pydicom's pack_bits() (which was previously used) an exception is 
+    raised if PixArr contains values other than zeros and ones, and the 
+    output is the same as that of pack_bits().
+    """
+    
+    import numpy as np
+    
+    PixArr = np.asarray(PixArr)
+    
+    if not PixArr.dtype == bool:
+        if np.any((PixArr != 0) & (PixArr != 1)):
+            msg = 'Only binary arrays (containing ones or zeroes) can be '\
+                  + 'packed.'
+            
+            raise Exception(msg)
+        
+        PixArr = PixArr.astype(bool)
+    
+    F, R, C = PixArr.shape
+    
+    # The number of bytes per frame (if byte-aligned):
+    B = R*C//8
+    
+    Reuse = OrigFrameNums is not None and Seg is not None and R*C % 8 == 0
+    
+    if Reuse:
+        IsCompressed = False
+        
+        if hasattr(Seg, 'file_meta') and 'TransferSyntaxUID' in Seg.file_meta:
+            IsCompressed = Seg.file_meta.TransferSyntaxUID.is_compressed
+        
+        Reuse = not IsCompressed and int(Seg.BitsAllocated) == 1 \
+                and int(Seg.Rows) == R and int(Seg.Columns) == C
+    
+    if Reuse:
+        # The number of whole frames in Seg's PixelData (NumberOfFrames may 
+        # have been modified already, e.g. by InitialiseSeg()):
+        OrigF = len(Seg.PixelData)//B
+        
+        OrigInds = np.array([-1 if FrameNum is None else FrameNum 
+                             for FrameNum in OrigFrameNums], dtype=int)
+        
+        if not len(OrigInds) == F or np.any(OrigInds >= OrigF):
+            Reuse = False
+    
+    if not Reuse:
+        Packed = np.packbits(PixArr.ravel(), bitorder='little')
+    else:
+        OrigPacked = np.frombuffer(Seg.PixelData, dtype='uint8', 
+                                   count=OrigF*B).reshape((OrigF, B))
+        
+        Packed = np.empty((F, B), dtype='uint8')
+        
+        IsOrig = OrigInds >= 0
+        
+        Packed[IsOrig] = OrigPacked[OrigInds[IsOrig]]
+        
+        if not np.all(IsOrig):
+            Packed[~IsOrig] = np.packbits(PixArr[~IsOrig].reshape((-1, R*C)), 
+                                          axis=1, bitorder='little')
+    
+    PixelData = Packed.tobytes()
+    
+    if len(PixelData) % 2:
+        PixelData += b'\x00'
+    
+    return PixelData
+
+
+
+
+
+
+
+
+def ModifySeg(Seg, PixArr, PFFGStoSliceInds, DicomDir, OrigFrameNums=None,
+              LogToConsole=False):
     """
     Modify various tag values of a SEG so that they are consistent with the
     corresponding tag values of the DICOMs.
@@ -1266,6 +1657,12 @@ def ModifySeg(Seg, PixArr, PFFGStoSliceInds, DicomDir, LogToConsole=False):
     
     DicomDir : string
         Directory containing the corresponding DICOMs.
+    
+    OrigFrameNums : list of integers or None (optional; None by default)
+        List (for each frame in PixArr) of the frame number in Seg's (current)
+        PixelData of the same frame, or None if the frame was modified (see 
+        GetOrigFrameNums()).  The packed bytes of the unmodified frames are
+        re-used rather than re-packed.  If None all frames will be packed.
                          
     LogToConsole : boolean (optional; False by default)
         Denotes whether intermediate results will be logged to the console.
@@ -1278,8 +1675,7 @@ def ModifySeg(Seg, PixArr, PFFGStoSliceInds, DicomDir, LogToConsole=False):
         Modified SEG ROI object.
     """
     
-    from DicomTools import ImportDicoms
-    from pydicom.pixel_data_handlers.numpy_handler import pack_bits
+    from DicomTools import GetSeriesMetadata
     import numpy as np
     
     F, R, C = PixArr.shape
@@ -1297,20 +1693,30 @@ def ModifySeg(Seg, PixArr, PFFGStoSliceInds, DicomDir, LogToConsole=False):
         raise Exception(f"There are {F} frames in PixArr and {P} indices in "\
                         + "PFFGStoSliceInds. They must be equal.")
     
+    # Pack the bits of PixArr (re-using the packed bytes of any unmodified 
+    # frames in Seg's current PixelData):
+    packed = PackPixArr(PixArr, Seg, OrigFrameNums)
+    
+    
+    # Get the SOP Instance UIDs and IPPs from the (cached) series metadata
+    # rather than importing the DICOMs:
+    Metadata = GetSeriesMetadata(DicomDir)
+    
+    SOPuids = Metadata['SOPuids']
     
-    Dicoms = ImportDicoms(DicomDir)
+    IPPs = Metadata['Positions']
     
     RIS = len(Seg.ReferencedSeriesSequence[0].ReferencedInstanceSequence)
              
-    if not RIS == len(Dicoms):
-        raise Exception(f"There are {len(Dicoms)} DICOMs and {RIS} sequences "\
+    if not RIS == len(SOPuids):
+        raise Exception(f"There are {len(SOPuids)} DICOMs and {RIS} sequences "\
                         + "in ReferencedInstanceSequence. They must be equal.")
     
     # Modify ReferencedInstanceSequence:
-    for i in range(len(Dicoms)):
+    for i in range(len(SOPuids)):
         Seg.ReferencedSeriesSequence[0]\
            .ReferencedInstanceSequence[i]\
-           .ReferencedSOPInstanceUID = Dicoms[i].SOPInstanceUID
+           .ReferencedSOPInstanceUID = SOPuids[i]
     
     
     Seg.NumberOfFrames = f"{F}"
@@ -1321,50 +1727,57 @@ def ModifySeg(Seg, PixArr, PFFGStoSliceInds, DicomDir, LogToConsole=False):
     # Get the ReferencedSOPInstanceUIDs in the ReferencedInstanceSequence:
     RefSOPs = GetRSOPuidsInRIS(Seg)
     
+    # Map each ReferencedSOPInstanceUID to its index in RefSOPs:
+    RefSOPindByUid = {Uid : ind for ind, Uid in enumerate(RefSOPs)}
+    
+    # Precompute the ReferencedSOPInstanceUID, DimensionIndexValues (DIVs) 
+    # and ImagePositionPatient for all frames:
+    """
+    Since there is always only one segment, the first integer in the DIV will
+    always be 1, as is the Referenced Segment Number. The second integer will 
+    be the 1 + the index of the SOP Instance UID for the s^th DICOM within 
+    RefSOPs (+1 since ind is an integer counting from 0, whereas the DIVs are
+    integers counting from 1).
+    """
+    SliceInds = np.array(PFFGStoSliceInds, dtype=int)
+    
+    RefSOPindBySliceInd = np.array([RefSOPindByUid[Uid] for Uid in SOPuids], 
+                                   dtype=int)
+    
+    FrameUids = [SOPuids[s] for s in PFFGStoSliceInds]
+    
+    FrameDIVs = np.stack((np.ones(P, dtype=int), 
+                          RefSOPindBySliceInd[SliceInds] + 1), axis=1).tolist()
+    
+    FrameIPPs = [IPPs[s] for s in PFFGStoSliceInds]
+    
     # Modify PerFrameFunctionalGroupsSequence:
     for i in range(P):
-        # The slice index for the i^th sequence:
-        s = PFFGStoSliceInds[i]
+        Sequence = Seg.PerFrameFunctionalGroupsSequence[i]
         
         if LogToConsole:
             print('\n\nResults of ModifySeg:')
             print(f'   PFFGStoSliceInds[{i}] = {PFFGStoSliceInds[i]}')
-            print(f'   DICOM slice number = {s}')
+            print(f'   DICOM slice number = {PFFGStoSliceInds[i]}')
         
-        Seg.PerFrameFunctionalGroupsSequence[i]\
-           .DerivationImageSequence[0]\
-           .SourceImageSequence[0]\
-           .ReferencedSOPInstanceUID = Dicoms[s].SOPInstanceUID
+        # Modify the ReferencedSOPInstanceUID, DimensionIndexValues (DIVs), 
+        # ImagePositionPatient and ReferencedSegmentNumber:
+        Sequence.DerivationImageSequence[0]\
+                .SourceImageSequence[0]\
+                .ReferencedSOPInstanceUID = FrameUids[i]
         
-        # Modify the DimensionIndexValues (DIVs), ImagePositionPatient and
-        # ReferencedSegmentNumber:
-        """
-        Since there is always only one segment, the first integer in the DIV 
-        will always be 1, as is the Referenced Segment Number. The second 
-        integer will be the 1 + the index of the SOP Instance UID for the s^th 
-        DICOM within RefSOPs (+1 since ind is an integer counting from 0, 
-        whereas the DIVs are integers counting from 1).
-        """
-        ind = RefSOPs.index(Dicoms[s].SOPInstanceUID)
-        
-        Seg.PerFrameFunctionalGroupsSequence[i]\
-           .FrameContentSequence[0]\
-           .DimensionIndexValues = [1, ind + 1]
+        Sequence.FrameContentSequence[0]\
+                .DimensionIndexValues = FrameDIVs[i]
         
-        Seg.PerFrameFunctionalGroupsSequence[i]\
-           .PlanePositionSequence[0]\
-           .ImagePositionPatient = Dicoms[s].ImagePositionPatient
+        Sequence.PlanePositionSequence[0]\
+                .ImagePositionPatient = FrameIPPs[i]
            
-        Seg.PerFrameFunctionalGroupsSequence[i]\
-           .SegmentIdentificationSequence[0]\
-           .ReferencedSegmentNumber = 1
+        Sequence.SegmentIdentificationSequence[0]\
+                .ReferencedSegmentNumber = 1
            
         if LogToConsole:
-              print(f'   DimensionIndexValues = {[1, ind + 1]}')
+              print(f'   DimensionIndexValues = {FrameDIVs[i]}')
               print(f'   ReferencedSegmentNumber = {1}')
-              
-        
-        
     
     
     if LogToConsole:
@@ -1374,67 +1787,9 @@ def ModifySeg(Seg, PixArr, PFFGStoSliceInds, DicomDir, LogToConsole=False):
     
     
 
-    # Ravel (to 1D array) PixArr and pack bits (see
-    # https://github.com/pydicom/pydicom/issues/1230):
-    packed = pack_bits(PixArr.ravel())
-    
     # Convert PixArr to bytes:
     #Seg.PixelData = PixArr.tobytes() <-- doesn't work
-    Seg.PixelData = packed + b'\x00' if len(packed) % 2 else packed
-    
-    
-    if False:
-        F, R, C = PixArr.shape
-        
-        # If there are more than one frames in PixArr:
-        if F > 1:
-            # Ravel (to 1D array) PixArr and pack bits (see
-            # https://github.com/pydicom/pydicom/issues/1230):
-            packed = pack_bits(PixArr.ravel())
-            
-            # Convert PixArr to bytes:
-            Seg.PixelData = packed + b'\x00' if len(packed) % 2 else packed
-            
-            if LogToConsole:
-                print(f'\n   len(packed) = {len(packed)}') 
-                """ 
-                = 39936 for UseCase 1a
-                = 6656 for UseCase 1b
-                """
-        else:
-            # Convert PixArr to bytes:
-            #Seg.PixelData = PixArr.tobytes()
-            
-            #if LogToConsole:
-                #print(f'\n   len(PixArr.tobytes()) = {len(PixArr.tobytes())}') 
-                #""" 
-                #=  for UseCase 1a
-                #= 212992 for UseCase 1b
-                #"""
-            
-            #PixArr = np.reshape(PixArr, (R, C))
-            
-            if LogToConsole:
-                print('\n   There is only one frame in PixArr, so it was reshaped',
-                      f'to shape {PixArr.shape}')
-                print(f'   np.amax(PixArr) = {np.amax(PixArr)}')
-            
-            # Ravel (to 1D array) PixArr and pack bits (see
-            # https://github.com/pydicom/pydicom/issues/1230):
-            packed = pack_bits(PixArr.ravel())
-            
-            # Convert PixArr to bytes:
-            Seg.PixelData = packed + b'\x00' if len(packed) % 2 else packed
-            
-            if LogToConsole:
-                print(f'\n   len(packed) = {len(packed)}') 
-                """ 
-                = 39936 for UseCase 1a
-                = 6656 for UseCase 1b
-                """
-        
-        
-    
+    Seg.PixelData = packed
     
     
     if LogToConsole:
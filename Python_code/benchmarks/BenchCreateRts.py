@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the creation of a Target RTS for a Direct copy onto an RTS with
+existing contours: CreateRts() versus InitialiseRts() followed by 
+ModifyRts(), with the ContourData of the existing contours re-used as read 
+from file (DS values, see GetCntDataInRoi()).  The time to write each RTS to
+file is included, and the written ContourData are checked to be the same.
+
+Usage:
+    python BenchCreateRts.py [NumOfSlices] [NumOfRois] [NumOfPts]
+"""
+
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from pydicom import dcmread
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'tests'))
+
+from SyntheticDicoms import MakeSeries, MakeRts
+from RtsTools import GetCntDataInRoi, GetPtsInRoi
+from RtsTools import CreateRts, InitialiseRts, ModifyRts
+
+
+
+
+def Main(NumOfSlices=200, NumOfRois=12, NumOfPts=128, Repeats=3):
+    with tempfile.TemporaryDirectory() as TempDir:
+        DicomDir = os.path.join(TempDir, 'Series')
+        RtsFpath = os.path.join(TempDir, 'Rts.dcm')
+
+        MakeSeries(DicomDir, NumOfSlices=NumOfSlices)
+
+        # NumOfRois ROIs with contours on 100 slices each:
+        Rois = [(f'Roi{r}', range(r % (NumOfSlices - 100),
+                                  r % (NumOfSlices - 100) + 100), 10.0 + r)
+                for r in range(NumOfRois)]
+
+        MakeRts(DicomDir, RtsFpath, Rois=Rois, NumOfPts=NumOfPts)
+
+        Rts = dcmread(RtsFpath)
+
+        RoiNum = NumOfRois - 1
+
+        PtsByCnt, CStoSliceInds = GetPtsInRoi(Rts, DicomDir, Rois[-1][0])
+
+        CntDataByCnt = GetCntDataInRoi(Rts, Rois[-1][0])
+
+        def Create():
+            return CreateRts(Rts, RoiNum, CntDataByCnt, PtsByCnt,
+                             CStoSliceInds, DicomDir)
+
+        def InitialiseAndModify():
+            NewRts = InitialiseRts(Rts, RoiNum, CStoSliceInds, DicomDir)
+
+            return ModifyRts(NewRts, CntDataByCnt, PtsByCnt, CStoSliceInds,
+                             DicomDir)
+
+        Times = {}
+        CntDataByFunc = {}
+
+        for Name, Func in [('CreateRts', Create),
+                           ('InitialiseRts + ModifyRts', InitialiseAndModify)]:
+            Times[Name] = []
+
+            for i in range(Repeats):
+                t0 = time.perf_counter()
+
+                Func().save_as(os.path.join(TempDir, 'NewRts.dcm'))
+
+                Times[Name].append(time.perf_counter() - t0)
+
+            NewRts = dcmread(os.path.join(TempDir, 'NewRts.dcm'))
+
+            CntDataByFunc[Name] = [np.array(Cnt.ContourData, dtype=float)
+                                   for Roic in NewRts.ROIContourSequence
+                                   for Cnt in Roic.ContourSequence]
+
+    Expected = [np.array(CntData, dtype=float) for CntData in CntDataByCnt]
+
+    for CntDataByCnt in CntDataByFunc.values():
+        assert len(CntDataByCnt) == len(Expected)
+        assert all(np.array_equal(a, b) for a, b in zip(CntDataByCnt,
+                                                        Expected))
+
+    print(f'{len(Expected)} contours of {NumOfPts} points copied from an RTS',
+          f'with {NumOfRois} ROIs (best of {Repeats}, including the write):')
+
+    for Name in Times:
+        print(f'   {Name:26} : {min(Times[Name])*1e3:8.1f} ms')
+
+
+
+
+if __name__ == '__main__':
+    Main(*[int(Arg) for Arg in sys.argv[1:4]])
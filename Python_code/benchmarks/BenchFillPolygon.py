@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the scanline polygon fill (ConversionTools.FillPolygon()) versus
+the shapely-based rasterisation that it replaced, on a 512x512 slice,
+checking that the masks are identical.
+
+Usage:
+    python BenchFillPolygon.py
+"""
+
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'tests'))
+
+from SyntheticDicoms import CodeDir
+from test_FillPolygon import ShapelyMask
+from ConversionTools import FillPolygon
+
+
+
+
+def Main(Size=512):
+    print(f'{Size}x{Size} slice, star-shaped contour of radius {Size//4}:')
+
+    for NumOfPts in [50, 200, 1000, 5000]:
+        Theta = np.linspace(0, 2*np.pi, NumOfPts, endpoint=False)
+
+        Radius = Size/4*(1 + 0.2*np.sin(7*Theta))
+
+        Inds = np.stack((Size/2 + Radius*np.cos(Theta),
+                         Size/2 + Radius*np.sin(Theta)), axis=1)
+
+        t0 = time.perf_counter()
+        Expected = ShapelyMask(Inds, Size, Size)
+        ShapelyTime = time.perf_counter() - t0
+
+        Times = []
+
+        for i in range(5):
+            t0 = time.perf_counter()
+            Mask = FillPolygon(Inds, Size, Size)
+            Times.append(time.perf_counter() - t0)
+
+        assert np.array_equal(Mask, Expected)
+
+        print(f'   {NumOfPts:5} points: shapely {ShapelyTime*1e3:8.1f} ms,',
+              f'scanline {min(Times)*1e3:6.2f} ms')
+
+
+
+
+if __name__ == '__main__':
+    Main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of GetDicomFpaths(SortMethod='slices') for series of several sizes:
+reading each file in full (HeaderOnly=False) versus parsing only the header
+tags (HeaderOnly=True), with the series metadata cache cleared before each
+call, and a repeat call that is served from the cache.
+
+Each of the full and header-only reads is timed with a warm page cache and,
+where os.posix_fadvise() is available, with the files evicted from the page
+cache beforehand (cold).  The header-only parse is not faster than the full
+read: with a warm page cache it took 79 ms versus 63 ms for 200 slices of
+512x512, and about 1.45x as long for 100, 400 and 1500 slices of 256x256
+(about 1.7x with the files evicted, on a virtual disk that the host may
+still cache).  The PixelData of each file is read in one go whereas the
+header is parsed tag by tag with a stop condition, so HeaderOnly=True can
+only pay off where reading the PixelData is the bottleneck (e.g. a network
+file system).  The benchmark reports which is faster for each size rather
+than assuming it.
+
+Usage:
+    python BenchGetDicomFpaths.py [Rows] [NumOfSlices ...]
+"""
+
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'tests'))
+
+from SyntheticDicoms import MakeSeries
+import DicomTools
+from DicomTools import GetDicomFpaths, ClearSeriesMetadataCache
+
+
+
+
+def EvictFromPageCache(DicomDir):
+    """ Evict the files in DicomDir from the page cache (returns False if
+    this isn't supported). """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+
+    for FileName in os.listdir(DicomDir):
+        Fd = os.open(os.path.join(DicomDir, FileName), os.O_RDONLY)
+
+        try:
+            os.posix_fadvise(Fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(Fd)
+
+    return True
+
+
+def TimeSeries(DicomDir, Repeats):
+    Times = {}
+
+    for Cache in ['warm', 'cold']:
+        for HeaderOnly in [False, True]:
+            Times[Cache, HeaderOnly] = []
+
+            for i in range(Repeats):
+                ClearSeriesMetadataCache()
+
+                if Cache == 'warm':
+                    # Make sure that the files are in the page cache:
+                    GetDicomFpaths(DicomDir, 'slices', HeaderOnly=False)
+
+                    ClearSeriesMetadataCache()
+
+                elif not EvictFromPageCache(DicomDir):
+                    break
+
+                t0 = time.perf_counter()
+
+                GetDicomFpaths(DicomDir, 'slices', HeaderOnly=HeaderOnly)
+
+                Times[Cache, HeaderOnly].append(time.perf_counter() - t0)
+
+    # Repeat calls (served from the series metadata cache):
+    Times['Cached'] = []
+
+    for i in range(Repeats):
+        t0 = time.perf_counter()
+
+        GetDicomFpaths(DicomDir, 'slices')
+
+        Times['Cached'].append(time.perf_counter() - t0)
+
+    # The ordering must be the same:
+    ClearSeriesMetadataCache()
+
+    assert GetDicomFpaths(DicomDir, 'slices', HeaderOnly=False) \
+           == GetDicomFpaths(DicomDir, 'slices', HeaderOnly=True)
+
+    return Times
+
+
+def Main(Rows=256, SizesOfSeries=(100, 400, 1500), Repeats=3):
+    DicomTools.SetSeriesIndex(None)
+
+    print(f'GetDicomFpaths(SortMethod="slices") for {Rows}x{Rows} slices',
+          f'(best of {Repeats}, ms):\n')
+    print(f'{"slices":>7} {"full warm":>10} {"hdr warm":>10} '
+          f'{"full cold":>10} {"hdr cold":>10} {"cached":>8}')
+
+    Notes = []
+
+    for NumOfSlices in SizesOfSeries:
+        with tempfile.TemporaryDirectory() as TempDir:
+            DicomDir = os.path.join(TempDir, 'Series')
+
+            MakeSeries(DicomDir, NumOfSlices=NumOfSlices, Rows=Rows,
+                       Columns=Rows)
+
+            Times = TimeSeries(DicomDir, Repeats)
+
+        Best = {Key : min(Vals)*1e3 if Vals else float('nan')
+                for Key, Vals in Times.items()}
+
+        print(f'{NumOfSlices:>7} {Best["warm", False]:>10.1f} '
+              f'{Best["warm", True]:>10.1f} {Best["cold", False]:>10.1f} '
+              f'{Best["cold", True]:>10.1f} {Best["Cached"]:>8.2f}')
+
+        for Cache in ['warm', 'cold']:
+            Full, Hdr = Best[Cache, False], Best[Cache, True]
+
+            if Hdr > Full:
+                Notes.append(f'{NumOfSlices} slices, {Cache} page cache: the '
+                             f'header-only parse is {Hdr/Full:.2f}x slower '
+                             f'than the full read ({Hdr:.1f} ms vs '
+                             f'{Full:.1f} ms).')
+
+    if Notes:
+        print('\nNote:')
+
+        for Note in Notes:
+            print(f'   {Note}')
+
+
+
+
+if __name__ == '__main__':
+    Args = [int(Arg) for Arg in sys.argv[1:]]
+
+    if len(Args) > 1:
+        Main(Args[0], Args[1:])
+    else:
+        Main(*Args)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of ImportDicoms(): sequential reads versus concurrent reads with a
+thread pool (Workers), checking that the DICOMs are in the same order.
+
+The thread pool is aimed at latency-bound storage (e.g. network file 
+systems), which can be simulated by adding a delay (in ms) to each file read.
+
+Usage:
+    python BenchImportDicoms.py [NumOfSlices] [Rows] [LatencyMs]
+"""
+
+
+import os
+import sys
+import time
+import tempfile
+import pydicom
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'tests'))
+
+from SyntheticDicoms import MakeSeries
+from DicomTools import ImportDicoms
+
+
+
+
+def Main(NumOfSlices=200, Rows=512, LatencyMs=0, Repeats=3):
+    if LatencyMs:
+        ReadFile = pydicom.read_file
+
+        def SlowReadFile(*args, **kwargs):
+            time.sleep(LatencyMs/1000)
+
+            return ReadFile(*args, **kwargs)
+
+        # ImportDicoms() imports read_file from pydicom when called:
+        pydicom.read_file = SlowReadFile
+
+    with tempfile.TemporaryDirectory() as TempDir:
+        DicomDir = os.path.join(TempDir, 'Series')
+
+        MakeSeries(DicomDir, NumOfSlices=NumOfSlices, Rows=Rows, Columns=Rows)
+
+        # Warm the series metadata cache (used to sort the files):
+        Uids = [Dicom.SOPInstanceUID for Dicom in ImportDicoms(DicomDir)]
+
+        print(f'{NumOfSlices} slices of {Rows}x{Rows} with {LatencyMs} ms',
+              f'latency (best of {Repeats}, {os.cpu_count()} CPUs):')
+
+        for Workers in [None, 2, 4, 8]:
+            Times = []
+
+            for i in range(Repeats):
+                t0 = time.perf_counter()
+
+                Dicoms = ImportDicoms(DicomDir, Workers=Workers)
+
+                Times.append(time.perf_counter() - t0)
+
+            assert [Dicom.SOPInstanceUID for Dicom in Dicoms] == Uids
+
+            print(f'   Workers = {str(Workers):4} : {min(Times)*1e3:8.1f} ms')
+
+
+
+
+if __name__ == '__main__':
+    Main(*[int(Arg) for Arg in sys.argv[1:4]])
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of ConversionTools.PixArr2IndsByFrame() on a synthetic SEG-like 
+pixel array with two objects per frame: sequential, a pool of threads and a
+pool of processes (reading the frames from shared memory), checking that the
+contours are identical.
+
+Contour tracing holds the GIL, so only the processes can scale, and only on 
+a machine with more than one core.
+
+Usage:
+    python BenchPixArr2IndsByFrame.py [NumOfFrames] [Rows]
+"""
+
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'tests'))
+
+from SyntheticDicoms import CodeDir
+from ConversionTools import PixArr2IndsByFrame
+
+
+
+
+def MakePixArr(NumOfFrames, Rows):
+    """ Two ellipses per frame whose sizes vary with the frame number. """
+    y, x = np.mgrid[:Rows, :Rows]
+
+    PixArr = np.zeros((NumOfFrames, Rows, Rows), dtype=np.uint8)
+
+    for f in range(NumOfFrames):
+        a = Rows/8*(1 + 0.5*np.sin(f/10))
+
+        PixArr[f] = (((x - Rows/3)/a)**2 + ((y - Rows/2)/(a/2))**2 < 1) \
+                    | (((x - 2*Rows/3)/(a/2))**2 + ((y - Rows/2)/a)**2 < 1)
+
+    return PixArr
+
+
+def Main(NumOfFrames=300, Rows=512, Repeats=3):
+    PixArr = MakePixArr(NumOfFrames, Rows)
+
+    FrameToSliceInds = list(range(NumOfFrames))
+
+    Expected = PixArr2IndsByFrame(PixArr, FrameToSliceInds)
+
+    print(f'{NumOfFrames} frames of {Rows}x{Rows} with 2 objects per frame',
+          f'(best of {Repeats}, {len(os.sched_getaffinity(0))} CPUs):')
+
+    for Workers, Processes in [(None, False), (2, False), (4, False),
+                               (2, True), (4, True), (8, True)]:
+        Times = []
+
+        for i in range(Repeats):
+            t0 = time.perf_counter()
+
+            IndsByCnt, CntToSliceInds = PixArr2IndsByFrame(PixArr,
+                                                           FrameToSliceInds,
+                                                           Workers=Workers,
+                                                           Processes=Processes)
+
+            Times.append(time.perf_counter() - t0)
+
+        assert CntToSliceInds == Expected[1]
+        assert all(np.array_equal(a, b) for a, b in zip(IndsByCnt,
+                                                        Expected[0]))
+
+        Pool = 'processes' if Processes else 'threads'
+
+        print(f'   Workers = {str(Workers):4} ({Pool:9}) :',
+              f'{min(Times)*1e3:8.1f} ms')
+
+
+
+
+if __name__ == '__main__':
+    Main(*[int(Arg) for Arg in sys.argv[1:3]])
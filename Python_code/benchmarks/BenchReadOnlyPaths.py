@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark (time and tracemalloc peak) of functions that only read pydicom 
+sequences or Numpy arrays and no longer deep-copy them: GetPtsInContour(),
+ErrorCheckRts() and UniqueItems().  The cost of the deep copies that were 
+removed is shown alongside for reference.
+
+Usage:
+    python BenchReadOnlyPaths.py [NumOfSlices] [NumOfRois] [NumOfPts]
+"""
+
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from io import StringIO
+from contextlib import redirect_stdout
+from copy import deepcopy
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'tests'))
+
+from SyntheticDicoms import MakeSeries, MakeRts
+from GeneralTools import UniqueItems
+from RtsTools import GetPtsInContour
+from RoiCopyTools import ErrorCheckRts
+
+
+
+
+def Measure(Func, Repeats=3):
+    """ The best time (in ms) and the tracemalloc peak (in MB) of Func(). """
+    Times = []
+
+    for i in range(Repeats):
+        t0 = time.perf_counter()
+        Func()
+        Times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    Func()
+    Peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return min(Times)*1e3, Peak/1e6
+
+
+def QuietErrorCheckRts(Rts, DicomDir):
+    """ ErrorCheckRts() without printing the errors found. """
+    with redirect_stdout(StringIO()):
+        return ErrorCheckRts(Rts, DicomDir)
+
+
+def Main(NumOfSlices=400, NumOfRois=36, NumOfPts=128):
+    with tempfile.TemporaryDirectory() as TempDir:
+        DicomDir = os.path.join(TempDir, 'Series')
+        RtsFpath = os.path.join(TempDir, 'Rts.dcm')
+
+        MakeSeries(DicomDir, NumOfSlices=NumOfSlices)
+
+        # NumOfRois ROIs with contours on 100 slices each:
+        Rois = [(f'Roi{r}', range(r % (NumOfSlices - 100),
+                                  r % (NumOfSlices - 100) + 100), 10.0 + r)
+                for r in range(NumOfRois)]
+
+        Rts = MakeRts(DicomDir, RtsFpath, Rois=Rois, NumOfPts=NumOfPts)
+
+        SliceNum = Rois[-1][1][50]
+
+        PixArr = np.random.default_rng(0).integers(0, 4, (100, 512, 512),
+                                                   dtype=np.uint8)
+
+        Results = {
+            'GetPtsInContour' : Measure(lambda: GetPtsInContour(
+                Rts, Rois[-1][0], SliceNum, DicomDir)),
+            '  (deepcopy of ROIContourSequence)' : Measure(lambda: deepcopy(
+                Rts.ROIContourSequence), Repeats=1),
+            # ErrorCheckRts() expects one ROI, so it reports (and prints) 
+            # errors for this RTS, but still runs all of its checks:
+            'ErrorCheckRts' : Measure(lambda: QuietErrorCheckRts(Rts, 
+                                                                 DicomDir)),
+            "  (deepcopy of the 1st ROI's ContourSequence)" : Measure(
+                lambda: deepcopy(Rts.ROIContourSequence[0].ContourSequence)),
+            'UniqueItems (100x512x512 uint8)' : Measure(lambda: UniqueItems(
+                PixArr)),
+            '  (deepcopy of the array)' : Measure(lambda: deepcopy(PixArr)),
+            }
+
+    print(f'{NumOfRois} ROIs with {NumOfRois*100} contours of {NumOfPts}',
+          f'points on a {NumOfSlices}-slice series:')
+
+    for Name, (Time, Peak) in Results.items():
+        print(f'   {Name:46} : {Time:8.1f} ms, peak {Peak:6.1f} MB')
+
+
+
+
+if __name__ == '__main__':
+    Main(*[int(Arg) for Arg in sys.argv[1:4]])
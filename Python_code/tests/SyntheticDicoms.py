@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic DICOM series and RTSTRUCTs for the tests and benchmarks.
+"""
+
+
+import os
+import sys
+
+# Make the modules in Python_code importable:
+CodeDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if CodeDir not in sys.path:
+    sys.path.insert(0, CodeDir)
+
+
+
+
+def MakeSeries(DicomDir, NumOfSlices=10, Rows=64, Columns=64,
+               IOP=(1, 0, 0, 0, 1, 0), Origin=(-100., -100., 0.),
+               PixelSpacing=(0.8, 0.7), SliceSpacing=2.5, OmitTags=(),
+               Seed=0):
+    """
+    Write a synthetic CT series (in shuffled file order) to DicomDir.
+
+    Inputs:
+    ------
+
+    DicomDir : string
+        Directory to write the DICOMs to (created if it doesn't exist).
+
+    NumOfSlices, Rows, Columns : integers (optional)
+        The dimensions of the series.
+
+    IOP : tuple of floats (optional)
+        ImageOrientationPatient.
+
+    Origin : tuple of floats (optional)
+        ImagePositionPatient of the first slice.
+
+    PixelSpacing : tuple of floats (optional)
+        PixelSpacing.
+
+    SliceSpacing : float (optional)
+        The spacing between slices (also used for SliceThickness).
+
+    OmitTags : tuple of strings (optional; () by default)
+        Keywords of tags to leave out (e.g. 'SliceThickness').
+
+    Seed : integer (optional; 0 by default)
+        Seed for the random pixel values and file order.
+
+
+    Outputs:
+    -------
+
+    Uids : dictionary
+        Dictionary containing the keys 'Studyuid', 'Seriesuid', 'FORuid' and
+        'SOPuids' (in slice order).
+    """
+
+    import numpy as np
+    from pydicom.dataset import FileDataset, FileMetaDataset
+    from pydicom.uid import generate_uid, ExplicitVRLittleEndian
+
+    os.makedirs(DicomDir, exist_ok=True)
+
+    Rng = np.random.default_rng(Seed)
+
+    Studyuid = generate_uid()
+    Seriesuid = generate_uid()
+    FORuid = generate_uid()
+    SOPuids = []
+
+    X = np.array(IOP[:3], dtype=float)
+    Y = np.array(IOP[3:], dtype=float)
+    Z = np.cross(X, Y)
+
+    FileOrder = Rng.permutation(NumOfSlices)
+
+    for k in range(NumOfSlices):
+        SOPuid = generate_uid()
+
+        SOPuids.append(SOPuid)
+
+        FileMeta = FileMetaDataset()
+        FileMeta.MediaStorageSOPClassUID = '1.2.840.10008.5.1.4.1.1.2'
+        FileMeta.MediaStorageSOPInstanceUID = SOPuid
+        FileMeta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+        Dicom = FileDataset(None, {}, file_meta=FileMeta, preamble=b'\0'*128)
+        Dicom.is_little_endian = True
+        Dicom.is_implicit_VR = False
+
+        Dicom.SOPClassUID = FileMeta.MediaStorageSOPClassUID
+        Dicom.SOPInstanceUID = SOPuid
+        Dicom.Modality = 'CT'
+        Dicom.PatientName = 'Synthetic'
+        Dicom.PatientID = '1'
+        Dicom.PatientBirthDate = ''
+        Dicom.PatientSex = 'O'
+        Dicom.StudyInstanceUID = Studyuid
+        Dicom.SeriesInstanceUID = Seriesuid
+        Dicom.FrameOfReferenceUID = FORuid
+        Dicom.StudyDate = '20200101'
+        Dicom.StudyTime = '120000'
+        Dicom.SeriesDate = '20200101'
+        Dicom.SeriesTime = '120000'
+        Dicom.StudyID = '1'
+        Dicom.Rows = Rows
+        Dicom.Columns = Columns
+        Dicom.PixelSpacing = list(PixelSpacing)
+        Dicom.SliceThickness = SliceSpacing
+        Dicom.ImageOrientationPatient = list(IOP)
+        Dicom.ImagePositionPatient = [round(float(item), 4) for item in
+                                      np.array(Origin) + k*SliceSpacing*Z]
+        Dicom.InstanceNumber = k + 1
+        Dicom.SamplesPerPixel = 1
+        Dicom.PhotometricInterpretation = 'MONOCHROME2'
+        Dicom.BitsAllocated = 16
+        Dicom.BitsStored = 16
+        Dicom.HighBit = 15
+        Dicom.PixelRepresentation = 0
+        Dicom.PixelData = Rng.integers(0, 1000, (Rows, Columns),
+                                       dtype=np.uint16).tobytes()
+
+        for Tag in OmitTags:
+            delattr(Dicom, Tag)
+
+        Dicom.save_as(os.path.join(DicomDir, f'{FileOrder[k]:04d}.dcm'),
+                      write_like_original=False)
+
+    return {'Studyuid' : Studyuid, 'Seriesuid' : Seriesuid,
+            'FORuid' : FORuid, 'SOPuids' : SOPuids}
+
+
+
+
+
+def MakeRts(DicomDir, RtsFpath, Rois=(('Tumour', range(3, 8), 10.0),
+                                      ('Body', range(0, 10), 20.0)),
+            NumOfPts=40):
+    """
+    Write a synthetic RTSTRUCT with circular contours referencing the series
+    in DicomDir.
+
+    Inputs:
+    ------
+
+    DicomDir : string
+        Directory containing the DICOMs.
+
+    RtsFpath : string
+        Full path of the RTS file to write.
+
+    Rois : tuple of tuples (optional)
+        A tuple (for each ROI) of the ROI name, the slice numbers of the
+        contours and the radius (in mm) of the contours.
+
+    NumOfPts : integer (optional; 40 by default)
+        The number of points in each contour.
+
+
+    Outputs:
+    -------
+
+    Rts : Pydicom object
+        The RTS object (as written).
+    """
+
+    import numpy as np
+    from pydicom.dataset import Dataset, FileDataset, FileMetaDataset
+    from pydicom.sequence import Sequence
+    from pydicom.uid import generate_uid, ExplicitVRLittleEndian
+    from DicomTools import GetSeriesMetadata
+
+    Metadata = GetSeriesMetadata(DicomDir)
+
+    FileMeta = FileMetaDataset()
+    FileMeta.MediaStorageSOPClassUID = '1.2.840.10008.5.1.4.1.1.481.3'
+    FileMeta.MediaStorageSOPInstanceUID = generate_uid()
+    FileMeta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+    Rts = FileDataset(None, {}, file_meta=FileMeta, preamble=b'\0'*128)
+    Rts.is_little_endian = True
+    Rts.is_implicit_VR = False
+
+    Rts.SOPClassUID = FileMeta.MediaStorageSOPClassUID
+    Rts.SOPInstanceUID = FileMeta.MediaStorageSOPInstanceUID
+    Rts.Modality = 'RTSTRUCT'
+    Rts.PatientName = 'Synthetic'
+    Rts.PatientID = '1'
+    Rts.PatientBirthDate = ''
+    Rts.PatientSex = 'O'
+    Rts.StudyInstanceUID = Metadata['Studyuid']
+    Rts.SeriesInstanceUID = generate_uid()
+    Rts.FrameOfReferenceUID = Metadata['FORuid']
+    Rts.StudyDate = '20200101'
+    Rts.StudyTime = '120000'
+    Rts.SeriesDate = '20200101'
+    Rts.SeriesTime = '120000'
+    Rts.StudyID = '1'
+    Rts.StructureSetLabel = 'Synthetic'
+    Rts.StructureSetDate = '20200101'
+    Rts.StructureSetTime = '120000'
+
+    def ContourImage(SliceNum):
+        Item = Dataset()
+        Item.ReferencedSOPClassUID = Metadata['SOPClassuid']
+        Item.ReferencedSOPInstanceUID = Metadata['SOPuids'][SliceNum]
+
+        return Item
+
+    SliceNums = sorted(set(s for Roi in Rois for s in Roi[1]))
+
+    RTRSe = Dataset()
+    RTRSe.SeriesInstanceUID = Metadata['Seriesuid']
+    RTRSe.ContourImageSequence = Sequence([ContourImage(s) for s in
+                                           SliceNums])
+
+    RTRS = Dataset()
+    RTRS.ReferencedSOPClassUID = '1.2.840.10008.3.1.2.3.1'
+    RTRS.ReferencedSOPInstanceUID = Metadata['Studyuid']
+    RTRS.RTReferencedSeriesSequence = Sequence([RTRSe])
+
+    RFOR = Dataset()
+    RFOR.FrameOfReferenceUID = Metadata['FORuid']
+    RFOR.RTReferencedStudySequence = Sequence([RTRS])
+
+    Rts.ReferencedFrameOfReferenceSequence = Sequence([RFOR])
+
+    X = np.array(Metadata['IOP'][:3])
+    Y = np.array(Metadata['IOP'][3:])
+
+    # The centre of the image (relative to the first voxel):
+    Centre = np.array([Metadata['Columns']*Metadata['PixelSpacing'][0],
+                       Metadata['Rows']*Metadata['PixelSpacing'][1]])/2
+
+    SSROIs = []
+    ROICs = []
+    Observations = []
+
+    for n, (Name, SliceNumsInRoi, Radius) in enumerate(Rois):
+        SSROI = Dataset()
+        SSROI.ROINumber = n + 1
+        SSROI.ReferencedFrameOfReferenceUID = Metadata['FORuid']
+        SSROI.ROIName = Name
+        SSROI.ROIGenerationAlgorithm = 'MANUAL'
+        SSROIs.append(SSROI)
+
+        Contours = []
+
+        for c, SliceNum in enumerate(SliceNumsInRoi):
+            Theta = np.linspace(0, 2*np.pi, NumOfPts, endpoint=False)
+
+            R = Radius + c % 3
+
+            Pts = np.array(Metadata['Positions'][SliceNum]) \
+                  + np.outer(Centre[0] + R*np.cos(Theta), X) \
+                  + np.outer(Centre[1] + R*np.sin(Theta), Y)
+
+            Contour = Dataset()
+            Contour.ContourImageSequence = Sequence([ContourImage(SliceNum)])
+            Contour.ContourGeometricType = 'CLOSED_PLANAR'
+            Contour.NumberOfContourPoints = len(Pts)
+            Contour.ContourNumber = c + 1
+            Contour.ContourData = [f'{item:.4f}' for item in Pts.ravel()]
+            Contours.append(Contour)
+
+        ROIC = Dataset()
+        ROIC.ROIDisplayColor = [255, 0, 0]
+        ROIC.ReferencedROINumber = n + 1
+        ROIC.ContourSequence = Sequence(Contours)
+        ROICs.append(ROIC)
+
+        Observation = Dataset()
+        Observation.ObservationNumber = n + 1
+        Observation.ReferencedROINumber = n + 1
+        Observation.RTROIInterpretedType = ''
+        Observation.ROIInterpreter = ''
+        Observations.append(Observation)
+
+    Rts.StructureSetROISequence = Sequence(SSROIs)
+    Rts.ROIContourSequence = Sequence(ROICs)
+    Rts.RTROIObservationsSequence = Sequence(Observations)
+
+    Rts.save_as(RtsFpath, write_like_original=False)
+
+    return Rts
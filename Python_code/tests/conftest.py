@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+pytest configuration: makes the modules in Python_code (and SyntheticDicoms)
+importable and resets the process-wide caches between tests.
+"""
+
+
+import os
+import sys
+
+import pytest
+
+TestsDir = os.path.dirname(os.path.abspath(__file__))
+
+for Dir in [TestsDir, os.path.dirname(TestsDir)]:
+    if Dir not in sys.path:
+        sys.path.insert(0, Dir)
+
+
+
+
+@pytest.fixture(autouse=True)
+def ClearCaches():
+    import DicomTools
+
+    DicomTools.ClearSeriesMetadataCache()
+
+    DicomTools.SetSeriesIndex(None)
+
+    yield
+
+    DicomTools.ClearSeriesMetadataCache()
+
+    DicomTools.SetSeriesIndex(None)
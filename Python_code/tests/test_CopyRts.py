@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of Direct copies of a contour (RoiCopyTools.CopyRts()) onto a Target
+RTS that already has contours, whose ContourData are preserved.
+"""
+
+
+import os
+
+import numpy as np
+import pytest
+from pydicom import dcmread
+
+from SyntheticDicoms import MakeSeries, MakeRts
+
+
+
+
+def SetFORuid(DicomDir, FORuid):
+    """ Set the FrameOfReferenceUID of the DICOMs in DicomDir. """
+    for FileName in os.listdir(DicomDir):
+        FilePath = os.path.join(DicomDir, FileName)
+
+        Dicom = dcmread(FilePath)
+        Dicom.FrameOfReferenceUID = FORuid
+        Dicom.save_as(FilePath)
+
+
+@pytest.mark.parametrize('UseCase', ['1a', '3a'])
+def test_CopyRts_direct_copy_to_existing_contours(tmp_path, UseCase):
+    from DicomTools import GetDicomUids
+    from RoiCopyTools import CopyRts
+
+    SrcDcmDir = str(tmp_path/'Src')
+
+    Uids = MakeSeries(SrcDcmDir, NumOfSlices=10)
+
+    SrcRts = MakeRts(SrcDcmDir, str(tmp_path/'SrcRts.dcm'))
+
+    if UseCase == '1a':
+        TrgDcmDir = SrcDcmDir
+    else:
+        # A different series with the same frame of reference but different
+        # pixel spacings:
+        TrgDcmDir = str(tmp_path/'Trg')
+
+        MakeSeries(TrgDcmDir, NumOfSlices=10, PixelSpacing=(1.0, 0.9))
+
+        SetFORuid(TrgDcmDir, Uids['FORuid'])
+
+    MakeRts(TrgDcmDir, str(tmp_path/'TrgRts.dcm'))
+
+    # Read the Target RTS from file so that its ContourData are DS values:
+    TrgRts = dcmread(str(tmp_path/'TrgRts.dcm'))
+
+    OrigCntData = [list(Cnt.ContourData) for Cnt
+                   in TrgRts.ROIContourSequence[0].ContourSequence]
+
+    NewRts = CopyRts(SrcRts, 'Tumour', SrcDcmDir, 4, TrgDcmDir,
+                     TrgRts=TrgRts, ToSliceNum=9)
+
+    # Write and read the new RTS:
+    NewRts.save_as(str(tmp_path/'NewRts.dcm'))
+
+    NewRts = dcmread(str(tmp_path/'NewRts.dcm'))
+
+    CS = NewRts.ROIContourSequence[0].ContourSequence
+
+    assert len(CS) == len(OrigCntData) + 1
+
+    # The existing contours are preserved:
+    for Cnt, CntData in zip(CS, OrigCntData):
+        assert np.array_equal(np.array(Cnt.ContourData, dtype=float),
+                              np.array(CntData, dtype=float))
+
+        assert len(Cnt.ContourData) == 3*int(Cnt.NumberOfContourPoints)
+
+    # The copied contour is on slice 9 of the Target series:
+    assert CS[-1].ContourImageSequence[0].ReferencedSOPInstanceUID \
+           == GetDicomUids(TrgDcmDir)[3][9]
+
+    assert len(CS[-1].ContourData) == 3*int(CS[-1].NumberOfContourPoints)
+
+
+class TxMapFilter:
+    """ Stands in for the Elastix image filter of a registration that gives
+    a translation. """
+    def GetTransformParameterMap(self):
+        return [{'Transform' : ['TranslationTransform'],
+                 'TransformParameters' : ['5.0', '0.0', '0.0']}]
+
+
+def test_GetRegTxMap_imports_images_on_cache_miss_only(tmp_path,
+                                                       monkeypatch):
+    """ The images are only imported by GetRegTxMap() if the registration of
+    the series isn't cached, and an image that is passed in isn't
+    imported. """
+    import SimpleITK as sitk
+    import ImageTools
+    from ImageTools import GetRegTxMap
+
+    SrcDcmDir = str(tmp_path/'Src')
+    TrgDcmDir = str(tmp_path/'Trg')
+
+    # Series in different frames of reference:
+    MakeSeries(SrcDcmDir, NumOfSlices=10)
+    MakeSeries(TrgDcmDir, NumOfSlices=10)
+
+    ImportedDirs = []
+
+    def ImportImage(DicomDir, *args, **kwargs):
+        ImportedDirs.append(DicomDir)
+
+    monkeypatch.setattr(ImageTools, 'ImportImage', ImportImage)
+    monkeypatch.setattr(ImageTools, 'TxMapCache', {})
+    monkeypatch.setattr(ImageTools, 'TxMapCacheDir', None)
+    monkeypatch.setattr(ImageTools, 'GetRegParamMap',
+                        lambda Tx='affine': {'Transform' : [Tx]})
+    monkeypatch.setattr(ImageTools, 'RegisterImages',
+                        lambda *args, **kwargs: (None, TxMapFilter()))
+
+    # SimpleITK built without Elastix has no ParameterMap:
+    if not hasattr(sitk, 'ParameterMap'):
+        monkeypatch.setattr(sitk, 'ParameterMap', dict, raising=False)
+
+    # A registration with the moving image passed in (as in CopySeg) only
+    # imports the fixed image:
+    TxMap = GetRegTxMap(TrgDcmDir, SrcDcmDir, MovIm='MovIm')
+
+    assert ImportedDirs == [TrgDcmDir]
+
+    ImportedDirs.clear()
+
+    # The repeat call is served from the cache:
+    assert GetRegTxMap(TrgDcmDir, SrcDcmDir) == TxMap
+
+    assert ImportedDirs == []
+
+
+def test_CopyRts_use_case_5_imports_no_images_if_registered(tmp_path,
+                                                            monkeypatch):
+    """ The images are only imported (by GetRegTxMap()) if the registration
+    of the series isn't cached. """
+    import SimpleITK as sitk
+    import ImageTools
+    from ImageTools import GetRegTxMap
+    from RoiCopyTools import CopyRts
+
+    SrcDcmDir = str(tmp_path/'Src')
+    TrgDcmDir = str(tmp_path/'Trg')
+
+    # Series in different frames of reference:
+    MakeSeries(SrcDcmDir, NumOfSlices=10)
+    MakeSeries(TrgDcmDir, NumOfSlices=10)
+
+    SrcRts = MakeRts(SrcDcmDir, str(tmp_path/'SrcRts.dcm'))
+
+    ImportedDirs = []
+
+    def ImportImage(DicomDir, *args, **kwargs):
+        ImportedDirs.append(DicomDir)
+
+    monkeypatch.setattr(ImageTools, 'ImportImage', ImportImage)
+    monkeypatch.setattr(ImageTools, 'TxMapCache', {})
+    monkeypatch.setattr(ImageTools, 'TxMapCacheDir', None)
+    monkeypatch.setattr(ImageTools, 'GetRegParamMap',
+                        lambda Tx='affine': {'Transform' : [Tx]})
+    monkeypatch.setattr(ImageTools, 'RegisterImages',
+                        lambda *args, **kwargs: (None, TxMapFilter()))
+
+    # SimpleITK built without Elastix has no ParameterMap:
+    if not hasattr(sitk, 'ParameterMap'):
+        monkeypatch.setattr(sitk, 'ParameterMap', dict, raising=False)
+
+    # The first registration imports both images:
+    GetRegTxMap(TrgDcmDir, SrcDcmDir)
+
+    assert sorted(ImportedDirs) == sorted([SrcDcmDir, TrgDcmDir])
+
+    ImportedDirs.clear()
+
+    NewRts = CopyRts(SrcRts, 'Tumour', SrcDcmDir, 4, TrgDcmDir)
+
+    assert ImportedDirs == []
+
+    assert len(NewRts.ROIContourSequence[0].ContourSequence) > 0
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the DICOM series metadata and file sorting in DicomTools.
+"""
+
+
+import os
+
+import pytest
+
+from SyntheticDicoms import MakeSeries
+
+
+
+
+def GetSliceNumsFromFpaths(DicomDir, FilePaths):
+    """ Get the InstanceNumber - 1 of each file (i.e. its slice number). """
+    from pydicom import dcmread
+
+    return [int(dcmread(FilePath, stop_before_pixels=True).InstanceNumber) - 1
+            for FilePath in FilePaths]
+
+
+def test_GetDicomFpaths_HeaderOnly_matches_full_read(tmp_path):
+    from DicomTools import GetDicomFpaths
+
+    DicomDir = str(tmp_path/'Series')
+
+    MakeSeries(DicomDir, NumOfSlices=12)
+
+    Fast = GetDicomFpaths(DicomDir, 'slices')
+    Full = GetDicomFpaths(DicomDir, 'slices', HeaderOnly=False)
+
+    assert Fast == Full
+    assert GetSliceNumsFromFpaths(DicomDir, Fast) == list(range(12))
+
+
+def test_GetDicomFpaths_positional_LogToConsole(tmp_path):
+    """ The third positional argument is (still) LogToConsole. """
+    import inspect
+    from DicomTools import GetDicomFpaths
+
+    Params = list(inspect.signature(GetDicomFpaths).parameters)
+
+    assert Params[:3] == ['DicomDir', 'SortMethod', 'LogToConsole']
+
+    DicomDir = str(tmp_path/'Series')
+
+    MakeSeries(DicomDir, NumOfSlices=5)
+
+    assert GetDicomFpaths(DicomDir, 'slices', False) \
+           == GetDicomFpaths(DicomDir, 'slices')
+
+
+def test_GetSeriesMetadata_without_SliceThickness(tmp_path):
+    from DicomTools import GetSeriesMetadata
+
+    DicomDir = str(tmp_path/'Series')
+
+    MakeSeries(DicomDir, NumOfSlices=6, SliceSpacing=3.0,
+               OmitTags=('SliceThickness',))
+
+    Metadata = GetSeriesMetadata(DicomDir)
+
+    assert Metadata['SliceThickness'] is None
+    assert Metadata['Spacings'][2] == pytest.approx(3.0)
+
+
+def test_GetSeriesMetadata_empty_SliceThickness(tmp_path):
+    from pydicom import dcmread
+    from DicomTools import GetSeriesMetadata
+
+    DicomDir = str(tmp_path/'Series')
+
+    MakeSeries(DicomDir, NumOfSlices=4)
+
+    for FileName in os.listdir(DicomDir):
+        Dicom = dcmread(os.path.join(DicomDir, FileName))
+        Dicom.SliceThickness = ''
+        Dicom.save_as(os.path.join(DicomDir, FileName))
+
+    assert GetSeriesMetadata(DicomDir)['SliceThickness'] is None
+
+
+@pytest.mark.parametrize('UseIndex', [False, True])
+def test_sorting_only_requires_IPP(tmp_path, UseIndex):
+    import DicomTools
+    from DicomTools import GetDicomFpaths
+    from ImageTools import GetSeriesGeometry
+
+    if UseIndex:
+        DicomTools.SetSeriesIndex(str(tmp_path/'Index.sqlite'))
+
+    DicomDir = str(tmp_path/'Series')
+
+    MakeSeries(DicomDir, NumOfSlices=8,
+               OmitTags=('ImageOrientationPatient', 'PixelSpacing',
+                         'SliceThickness'))
+
+    # Twice so that the headers are read from the index the second time:
+    for i in range(2):
+        DicomTools.ClearSeriesMetadataCache()
+
+        FilePaths = GetDicomFpaths(DicomDir, 'slices')
+
+        assert GetSliceNumsFromFpaths(DicomDir, FilePaths) == list(range(8))
+
+    # The geometry can't be obtained without the tags:
+    with pytest.raises(Exception, match='ImageOrientationPatient'):
+        GetSeriesGeometry(DicomDir)
+
+
+@pytest.mark.parametrize('Workers', [None, 4])
+def test_ImportDicoms_order(tmp_path, Workers):
+    from DicomTools import ImportDicoms
+
+    DicomDir = str(tmp_path/'Series')
+
+    Uids = MakeSeries(DicomDir, NumOfSlices=9)
+
+    # The third positional argument is (still) LogToConsole:
+    Dicoms = ImportDicoms(DicomDir, 'slices', False, Workers=Workers)
+
+    assert [Dicom.SOPInstanceUID for Dicom in Dicoms] == Uids['SOPuids']
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that the scanline fill (ConversionTools.FillPolygon()) gives the same
+masks as the shapely-based rasterisation that it replaced.
+"""
+
+
+import numpy as np
+import pytest
+
+
+
+
+def ShapelyMask(Inds, NumOfRows, NumOfCols):
+    """ The shapely-based rasterisation previously used in Indices2Mask(). """
+    from itertools import product
+    from shapely.geometry import Polygon, Point
+
+    Mask = np.zeros((NumOfRows, NumOfCols), dtype=bool)
+
+    Poly = Polygon([Ind[:2] for Ind in Inds])
+
+    xMin, yMin, xMax, yMax = Poly.bounds
+
+    points = [Point(x, y) for x, y in
+              product(np.arange(int(xMin), np.ceil(xMax)),
+                      np.arange(int(yMin), np.ceil(yMax)))]
+
+    for point in filter(Poly.contains, points):
+        x = int(point.x)
+        y = int(point.y)
+
+        if 0 <= y < NumOfRows and 0 <= x < NumOfCols:
+            Mask[y, x] = True
+
+    return Mask
+
+
+# Polygons as lists of [i, j] indices:
+Polygons = {
+    'square' : [[2, 2], [12, 2], [12, 9], [2, 9]],
+    'triangle' : [[1.5, 1.2], [17.3, 4.6], [6.1, 15.8]],
+    # Concave polygons:
+    'L-shape' : [[2, 2], [14, 2], [14, 6], [7, 6], [7, 15], [2, 15]],
+    'U-shape' : [[1, 1], [18, 1], [18, 17], [13, 17], [13, 6], [6, 6],
+                 [6, 17], [1, 17]],
+    'star' : [[10 + (8 if k % 2 == 0 else 3.3)*np.cos(k*np.pi/5),
+               10 + (8 if k % 2 == 0 else 3.3)*np.sin(k*np.pi/5)]
+              for k in range(10)],
+    # Self-touching (two lobes meeting at a single vertex, and a polygon
+    # whose boundary touches itself along an edge):
+    'touching vertex' : [[2, 2], [9, 9], [16, 2], [16, 16], [9, 9], [2, 16]],
+    'touching edge' : [[2, 2], [16, 2], [16, 8], [9, 8], [9, 5], [9, 8],
+                       [2, 8]],
+    # Self-intersecting (bowtie):
+    'bowtie' : [[2, 2], [16, 16], [16, 2], [2, 16]],
+    # Edges (and vertices) on integer rows/columns:
+    'edge-aligned' : [[3, 3], [3, 12], [8, 12], [8, 7], [15, 7], [15, 3]],
+    'diagonal' : [[0, 10], [10, 0], [19, 9], [9, 19]],
+    # Partly outside the image:
+    'clipped' : [[-5.5, -3], [25, 4.5], [12, 30.2]],
+    'half-integer' : [[2.5, 2.5], [12.5, 2.5], [12.5, 9.5], [2.5, 9.5]],
+    }
+
+
+@pytest.mark.parametrize('Name', list(Polygons.keys()))
+def test_FillPolygon_matches_shapely(Name):
+    from ConversionTools import FillPolygon
+
+    Inds = np.array(Polygons[Name], dtype=float)
+
+    Inds = np.hstack((Inds, np.zeros((len(Inds), 1))))
+
+    Expected = ShapelyMask(Inds, 20, 20)
+
+    assert np.array_equal(FillPolygon(Inds, 20, 20), Expected)
+
+    # Also with the vertices in reverse order:
+    assert np.array_equal(FillPolygon(Inds[::-1], 20, 20), Expected)
+
+
+def test_FillPolygon_matches_shapely_random():
+    from ConversionTools import FillPolygon
+
+    Rng = np.random.default_rng(0)
+
+    for n in range(200):
+        NumOfPts = Rng.integers(3, 30)
+
+        # A mix of integer and float vertices (integer vertices put edges and
+        # vertices on pixel centres):
+        Inds = Rng.uniform(-4, 36, (NumOfPts, 2))
+
+        if n % 2:
+            Inds = np.round(Inds)
+
+        Expected = ShapelyMask(Inds, 32, 32)
+
+        assert np.array_equal(FillPolygon(Inds, 32, 32), Expected), n
+
+
+@pytest.mark.parametrize('NumOfPts', [50, 1000])
+def test_FillPolygon_matches_shapely_near_boundary(NumOfPts):
+    """ Vertices that are within rounding error of pixel centres (here the 
+    vertex at Theta = pi) must give the same pixels as shapely. """
+    from ConversionTools import FillPolygon
+
+    Theta = np.linspace(0, 2*np.pi, NumOfPts, endpoint=False)
+
+    Radius = 16*(1 + 0.2*np.sin(7*Theta))
+
+    Inds = np.stack((32 + Radius*np.cos(Theta), 32 + Radius*np.sin(Theta)),
+                    axis=1)
+
+    assert np.array_equal(FillPolygon(Inds, 64, 64), ShapelyMask(Inds, 64, 64))
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that tracing the contours of the objects in a frame on the bounding box
+of the object (ConversionTools.Mask2IndsByObj()) gives the same contours as
+tracing them on the whole frame.
+"""
+
+
+import numpy as np
+import pytest
+
+
+
+
+def FullFrameIndsByObj(Mask, Thresh):
+    """ find_contours on the whole zero-padded frame (as [x, y] indices). """
+    from skimage.measure import find_contours
+
+    Padded = np.pad(np.asarray(Mask, dtype=float), 1)
+
+    return [Inds - 1 for Inds in find_contours(Padded.T, Thresh)]
+
+
+def test_Mask2IndsByObj_float_mask_matches_full_frame():
+    """ The neighbours of the pixels above Thresh (here 0.3) are used in the
+    interpolation of the contours, as for the whole frame. """
+    from ConversionTools import Mask2IndsByObj
+
+    Mask = np.zeros((15, 14))
+    Mask[4:11, 3:9] = 0.3
+    Mask[5:10, 4:8] = 1.0
+
+    IndsByObj = Mask2IndsByObj(Mask, 0.5)
+
+    assert len(IndsByObj) == 1
+    assert IndsByObj[0][:, 1].min() == pytest.approx(4 + 2/7)
+    assert IndsByObj[0][:, 1].max() == pytest.approx(10 - 2/7)
+
+    Rng = np.random.default_rng(0)
+
+    for n in range(100):
+        # Random float masks, with objects at the edges of some frames:
+        Mask = Rng.random((12, 10))*(Rng.random((12, 10)) < 0.6)
+
+        Mask[:, :Rng.integers(0, 4)] = 0
+
+        for Thresh in [0.3, 0.5, 0.8]:
+            Expected = FullFrameIndsByObj(Mask, Thresh)
+
+            IndsByObj = Mask2IndsByObj(Mask, Thresh)
+
+            assert len(IndsByObj) == len(Expected)
+            assert all(np.allclose(a, b, rtol=0, atol=1e-12)
+                       for a, b in zip(IndsByObj, Expected))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that packing a SEG's pixel array (SegTools.PackPixArr()), including 
+the re-use of the packed bytes of unchanged frames, gives the same PixelData 
+as Pydicom's pack_bits() (previously used by ModifySeg()).
+"""
+
+
+import numpy as np
+import pytest
+from pydicom.dataset import Dataset
+from pydicom.pixel_data_handlers.numpy_handler import pack_bits
+
+
+
+
+def MakePixArr(NumOfFrames, NumOfRows, NumOfCols, Seed=0):
+    Shape = (NumOfFrames, NumOfRows, NumOfCols)
+
+    return np.random.default_rng(Seed).integers(0, 2, Shape, dtype=np.uint8)
+
+
+@pytest.mark.parametrize('Dtype', [np.uint8, np.float64, bool])
+@pytest.mark.parametrize('NumOfRows, NumOfCols', [(16, 12), (13, 11), 
+                                                  (3, 5)])
+def test_PackPixArr_matches_pack_bits(Dtype, NumOfRows, NumOfCols):
+    from SegTools import PackPixArr
+
+    for NumOfFrames in [1, 2, 5]:
+        PixArr = MakePixArr(NumOfFrames, NumOfRows, NumOfCols).astype(Dtype)
+
+        assert PackPixArr(PixArr) == pack_bits(PixArr.ravel())
+
+
+@pytest.mark.parametrize('Dtype', [np.uint8, np.float64])
+def test_PackPixArr_reusing_frames_matches_pack_bits(Dtype):
+    """ Frames of the new pixel array that are unchanged from the SEG are 
+    copied from its PixelData (OrigFrameNums), the others are packed. """
+    from SegTools import PackPixArr
+
+    OrigPixArr = MakePixArr(6, 16, 12, Seed=1)
+
+    Seg = Dataset()
+    Seg.BitsAllocated = 1
+    Seg.Rows, Seg.Columns = 16, 12
+    Seg.PixelData = pack_bits(OrigPixArr.ravel())
+
+    # Frames 0, 1 and 4 of the SEG (in a different order), a modified frame
+    # and a new frame:
+    PixArr = np.concatenate((OrigPixArr[[4, 0]], MakePixArr(1, 16, 12),
+                             OrigPixArr[[1]], MakePixArr(1, 16, 12, Seed=2)))
+
+    OrigFrameNums = [4, 0, None, 1, None]
+
+    PixelData = PackPixArr(PixArr.astype(Dtype), Seg, OrigFrameNums)
+
+    assert PixelData == pack_bits(PixArr.ravel())
+
+    # All frames re-used:
+    assert PackPixArr(OrigPixArr.astype(Dtype), Seg, list(range(6))) \
+           == Seg.PixelData
+
+
+def test_PackPixArr_rejects_non_binary():
+    from SegTools import PackPixArr
+
+    PixArr = MakePixArr(2, 8, 8).astype(float)
+    PixArr[1, 3, 4] = 0.5
+
+    with pytest.raises(Exception, match='binary'):
+        PackPixArr(PixArr)
+
+    PixArr[1, 3, 4] = 2
+
+    with pytest.raises(Exception, match='binary'):
+        PackPixArr(PixArr.astype(np.uint8))
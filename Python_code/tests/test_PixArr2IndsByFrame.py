@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the conversion of a pixel array to contour indices by frame
+(ConversionTools.PixArr2IndsByFrame()), sequentially and with a pool of
+processes that read the frames from shared memory.
+"""
+
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+
+
+
+def MakePixArr(NumOfFrames=12, NumOfRows=48, NumOfCols=40):
+    """ Frames with two objects on even frames, one on odd frames and an
+    empty last frame. """
+    PixArr = np.zeros((NumOfFrames, NumOfRows, NumOfCols), dtype=np.uint8)
+
+    for f in range(NumOfFrames - 1):
+        PixArr[f, 5:15, 4:12 + f] = 1
+
+        if f % 2 == 0:
+            PixArr[f, 25:40, 20:30] = 1
+
+    return PixArr
+
+
+@pytest.mark.parametrize('Workers, Processes', [(None, False), (2, False),
+                                                (2, True)])
+def test_PixArr2IndsByFrame(Workers, Processes):
+    from ConversionTools import PixArr2IndsByFrame
+
+    PixArr = MakePixArr()
+
+    FrameToSliceInds = list(range(3, 3 + len(PixArr)))
+
+    IndsByCnt, CntToSliceInds = PixArr2IndsByFrame(PixArr, FrameToSliceInds,
+                                                   Workers=Workers,
+                                                   Processes=Processes)
+
+    # One contour per object, in frame order:
+    Expected = [3 + f for f in range(len(PixArr) - 1)
+                for i in range(2 if f % 2 == 0 else 1)]
+
+    assert CntToSliceInds == Expected
+
+    for Inds, SliceNum in zip(IndsByCnt, CntToSliceInds):
+        assert Inds.shape[1] == 3
+        assert np.all(Inds[:, 2] == SliceNum)
+
+    if Workers:
+        Serial, SerialSliceInds = PixArr2IndsByFrame(PixArr, FrameToSliceInds)
+
+        assert SerialSliceInds == CntToSliceInds
+        assert all(np.array_equal(a, b) for a, b in zip(Serial, IndsByCnt))
+
+
+def test_SharedFrames2IndsByObj_does_not_unlink_block():
+    """ A process (with its own resource tracker) that attaches to the shared
+    memory block must not unlink it when it exits. """
+    from multiprocessing import shared_memory
+    from ConversionTools import SharedFrames2IndsByObj
+
+    PixArr = MakePixArr()
+
+    Shm = shared_memory.SharedMemory(create=True, size=PixArr.nbytes)
+
+    try:
+        np.ndarray(PixArr.shape, dtype=PixArr.dtype, buffer=Shm.buf)[:] = PixArr
+
+        Item = (Shm.name, PixArr.shape, PixArr.dtype.str, [0, 1], 0.5)
+
+        Code = ('from ConversionTools import SharedFrames2IndsByObj; '
+                f'print(len(SharedFrames2IndsByObj({Item!r})))')
+
+        Env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+        Result = subprocess.run([sys.executable, '-c', Code], env=Env,
+                                capture_output=True, text=True, check=True)
+
+        assert Result.stdout.strip() == '2'
+        assert 'leaked' not in Result.stderr
+
+        # The block still exists:
+        Attached = shared_memory.SharedMemory(name=Shm.name)
+        Attached.close()
+
+        assert len(SharedFrames2IndsByObj(Item)[0]) == 2
+    finally:
+        Shm.close()
+        Shm.unlink()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that resampling a labelmap onto only the part of the reference grid 
+that it intersects (ImageTools.ResampleImage(Crop=True)) gives the same image
+as resampling the entire reference grid.
+"""
+
+
+import numpy as np
+import pytest
+import SimpleITK as sitk
+
+
+
+
+def MakeLabmapIm(Size=(40, 36, 12), Seed=0):
+    """ A labelmap with a small non-zero blob. """
+    Arr = np.zeros(Size[::-1], dtype=np.uint8)
+
+    Arr[4:7, 10:19, 12:22] = 1
+    Arr[5, 14:17, 8:12] = 1
+
+    LabmapIm = sitk.GetImageFromArray(Arr)
+    LabmapIm.SetSpacing((0.8, 0.7, 2.5))
+    LabmapIm.SetOrigin((-10., -5., 3.))
+
+    return LabmapIm
+
+
+def MakeRefIm(Kind, Seed):
+    """ A reference grid that is oblique (random rotation) or flipped. """
+    Rng = np.random.default_rng(Seed)
+
+    if Kind == 'oblique':
+        Tx = sitk.Euler3DTransform()
+        Tx.SetRotation(*Rng.uniform(-0.5, 0.5, 3))
+
+        Direction = np.array(Tx.GetMatrix())
+    else:
+        Direction = np.diag(Rng.choice([-1., 1.], 3)).ravel()
+
+    RefIm = sitk.Image([44, 40, 30], sitk.sitkUInt8)
+    RefIm.SetSpacing(tuple(Rng.uniform(0.5, 1.5, 3)))
+    RefIm.SetDirection(tuple(Direction))
+
+    # Centre the grid on the labelmap:
+    Centre = np.array([6., 7., 16.])
+    Extent = Direction.reshape(3, 3) @ (np.array(RefIm.GetSize())
+                                        *np.array(RefIm.GetSpacing()))
+    RefIm.SetOrigin(tuple(Centre - Extent/2 + Rng.uniform(-1, 1, 3)))
+
+    return RefIm
+
+
+@pytest.mark.parametrize('Interpolation', ['NearestNeighbor', 'Linear', 
+                                           'BSpline', 'Gaussian'])
+@pytest.mark.parametrize('Kind', ['oblique', 'flipped'])
+def test_ResampleImage_Crop_matches_full_resample(Interpolation, Kind):
+    from ImageTools import ResampleImage
+
+    LabmapIm = MakeLabmapIm()
+
+    for Seed in range(10):
+        RefIm = MakeRefIm(Kind, Seed)
+
+        Full = ResampleImage(LabmapIm, RefIm, Interpolation)
+        Cropped = ResampleImage(LabmapIm, RefIm, Interpolation, Crop=True)
+
+        assert Cropped.GetPixelID() == Full.GetPixelID()
+        assert Cropped.GetOrigin() == Full.GetOrigin()
+        assert Cropped.GetDirection() == Full.GetDirection()
+
+        assert np.array_equal(sitk.GetArrayViewFromImage(Cropped),
+                              sitk.GetArrayViewFromImage(Full)), Seed
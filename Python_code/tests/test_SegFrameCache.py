@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the cache of frames unpacked from the PixelData of SEGs
+(SegTools.GetSegFrames() and SegFrameCache).
+"""
+
+
+import gc
+
+import numpy as np
+import pytest
+from pydicom.dataset import Dataset
+from pydicom.pixel_data_handlers.numpy_handler import pack_bits
+
+
+@pytest.fixture(autouse=True)
+def ClearSegFrameCache():
+    import SegTools
+
+    SegTools.SegFrameCache.clear()
+    yield
+    SegTools.SegFrameCache.clear()
+
+
+def MakeSeg(PixArr, Bits=1, Uid='1.2.3.4'):
+    """ A minimal (uncompressed) SEG dataset with PixelData as bytes. """
+    Seg = Dataset()
+    Seg.SOPInstanceUID = Uid
+    Seg.NumberOfFrames, Seg.Rows, Seg.Columns = PixArr.shape
+    Seg.BitsAllocated = Bits
+
+    if Bits == 1:
+        Seg.PixelData = pack_bits(PixArr.ravel())
+    else:
+        Seg.PixelData = PixArr.astype(np.uint8).tobytes()
+
+    return Seg
+
+
+def MakePixArr(NumOfFrames=6, NumOfRows=13, NumOfCols=11, Seed=0):
+    Shape = (NumOfFrames, NumOfRows, NumOfCols)
+
+    return np.random.default_rng(Seed).integers(0, 2, Shape, dtype=np.uint8)
+
+
+@pytest.mark.parametrize('Bits', [1, 8])
+def test_GetSegFrames(Bits):
+    from SegTools import GetSegFrames
+
+    PixArr = MakePixArr()
+
+    Seg = MakeSeg(PixArr, Bits)
+
+    # Twice (the second time from the cache):
+    for i in range(2):
+        assert np.array_equal(GetSegFrames(Seg, [4, 1, 5]), PixArr[[4, 1, 5]])
+
+
+@pytest.mark.parametrize('Bits', [1, 8])
+def test_SegFrameCache_does_not_keep_PixelData(Bits):
+    """ An entry for PixelData that can be weakly referenced (e.g. a memmap)
+    is discarded once the PixelData is garbage collected. """
+    import SegTools
+    from SegTools import GetSegFrames
+
+    PixArr = MakePixArr()
+
+    Seg = MakeSeg(PixArr, Bits)
+
+    Seg.PixelData = np.frombuffer(Seg.PixelData, dtype=np.uint8).copy()
+
+    GetSegFrames(Seg, [0, 2])
+
+    assert '1.2.3.4' in SegTools.SegFrameCache
+
+    del Seg
+    gc.collect()
+
+    assert not SegTools.SegFrameCache
+
+
+def test_SegFrameCache_replaced_PixelData():
+    from SegTools import GetSegFrames
+
+    PixArr = MakePixArr()
+
+    Seg = MakeSeg(PixArr)
+
+    GetSegFrames(Seg, [0, 1])
+
+    NewPixArr = 1 - PixArr
+
+    Seg.PixelData = MakeSeg(NewPixArr).PixelData
+
+    assert np.array_equal(GetSegFrames(Seg, [0, 1]), NewPixArr[[0, 1]])
+
+
+def test_SegFrameCache_is_bounded_by_bytes(monkeypatch):
+    """ The PixelData (as bytes) and the frames of the SEGs in the cache are
+    kept within SegFrameCacheBytes, discarding the least recently used. """
+    import SegTools
+    from SegTools import GetSegFrames
+
+    PixArr = MakePixArr(NumOfFrames=10, NumOfRows=20, NumOfCols=20)
+
+    # The PixelData (4000 bytes) and 3 frames (1200 bytes) of each SEG:
+    monkeypatch.setattr(SegTools, 'SegFrameCacheBytes', 12000)
+
+    Segs = [MakeSeg(PixArr, Bits=8, Uid=f'1.2.3.{i}') for i in range(3)]
+
+    for Seg in Segs:
+        GetSegFrames(Seg, [0, 1, 2])
+
+    assert list(SegTools.SegFrameCache.keys()) == ['1.2.3.1', '1.2.3.2']
+
+    assert sum([Entry['Bytes'] for Entry in SegTools.SegFrameCache.values()]) \
+           == 2*(4000 + 1200)
+
+    # A SEG that exceeds the limit on its own isn't kept:
+    BigSeg = MakeSeg(MakePixArr(NumOfFrames=10, NumOfRows=40, NumOfCols=40),
+                     Bits=8, Uid='1.2.3.9')
+
+    assert np.array_equal(GetSegFrames(BigSeg, [3]),
+                          MakePixArr(NumOfFrames=10, NumOfRows=40,
+                                     NumOfCols=40)[[3]])
+
+    assert not SegTools.SegFrameCache
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Tests that transforming several labelmaps in one pass 
+(ImageTools.TransformLabmapIms()) gives the same labelmaps as transforming 
+each labelmap separately (ImageTools.TransformImage()).
+"""
+
+
+import numpy as np
+import pytest
+import SimpleITK as sitk
+
+
+
+
+def MakeLabmapIms(NumOfIms, Size=(24, 20, 8), Seed=0):
+    """ Overlapping random labelmaps with a common geometry. """
+    Rng = np.random.default_rng(Seed)
+
+    LabmapIms = []
+
+    for i in range(NumOfIms):
+        Arr = (Rng.random(Size[::-1]) < 0.3).astype(np.uint8)
+
+        LabmapIm = sitk.GetImageFromArray(Arr)
+        LabmapIm.SetSpacing((0.8, 0.7, 2.5))
+        LabmapIm.SetOrigin((-10., -5., 3.))
+
+        LabmapIms.append(LabmapIm)
+
+    return LabmapIms
+
+
+def MakeTxMap(Translation, RefIm):
+    """ A Transformix parameter map of a translation onto the grid of RefIm.
+    """
+    def Strs(Vals):
+        return [str(Val) for Val in Vals]
+
+    return ({'Transform' : ['TranslationTransform'],
+             'NumberOfParameters' : ['3'],
+             'TransformParameters' : Strs(Translation),
+             'InitialTransformParametersFileName' : ['NoInitialTransform'],
+             'HowToCombineTransforms' : ['Compose'],
+             'FixedImageDimension' : ['3'],
+             'MovingImageDimension' : ['3'],
+             'FixedInternalImagePixelType' : ['float'],
+             'MovingInternalImagePixelType' : ['float'],
+             'Size' : Strs(RefIm.GetSize()),
+             'Index' : ['0', '0', '0'],
+             'Spacing' : Strs(RefIm.GetSpacing()),
+             'Origin' : Strs(RefIm.GetOrigin()),
+             'Direction' : Strs(RefIm.GetDirection()),
+             'UseDirectionCosines' : ['true'],
+             'ResampleInterpolator' : ['FinalBSplineInterpolator'],
+             'FinalBSplineInterpolationOrder' : ['3'],
+             'Resampler' : ['DefaultResampler'],
+             'DefaultPixelValue' : ['0'],
+             'ResultImageFormat' : ['nii'],
+             'ResultImagePixelType' : ['float'],
+             'CompressResultImage' : ['false']},)
+
+
+def ResampleByTxMap(Im, RegImFilt=None, Interpolation='Default', TxMap=None):
+    """ Stands in for ImageTools.TransformImage() (i.e. Transformix) for the 
+    translation in TxMap, casting the result to float32 as Transformix does.
+    """
+    assert 'eighbo' in Interpolation
+
+    Map = TxMap[0]
+
+    Tx = sitk.TranslationTransform(3, [float(Val) for Val 
+                                       in Map['TransformParameters']])
+
+    TxIm = sitk.Resample(Im, Im, Tx, sitk.sitkNearestNeighbor, 0)
+
+    return sitk.Cast(TxIm, sitk.sitkFloat32)
+
+
+def AssertSameLabmaps(LabmapIms, TxMap):
+    from ImageTools import TransformImage, TransformLabmapIms
+
+    TxLabmapIms = TransformLabmapIms(LabmapIms, TxMap=TxMap)
+
+    assert len(TxLabmapIms) == len(LabmapIms)
+
+    for LabmapIm, TxLabmapIm in zip(LabmapIms, TxLabmapIms):
+        Expected = TransformImage(LabmapIm, Interpolation='NearestNeighbor',
+                                  TxMap=MakeTxMap(
+                                      TxMap[0]['TransformParameters'], 
+                                      LabmapIm))
+
+        assert np.array_equal(sitk.GetArrayViewFromImage(TxLabmapIm),
+                              sitk.GetArrayViewFromImage(Expected) > 0.5)
+
+        assert TxLabmapIm.GetOrigin() == Expected.GetOrigin()
+        assert TxLabmapIm.GetSpacing() == Expected.GetSpacing()
+
+
+@pytest.mark.parametrize('NumOfIms', [1, 24, 30])
+def test_TransformLabmapIms_matches_separate_transforms(NumOfIms, 
+                                                        monkeypatch):
+    import ImageTools
+
+    Calls = []
+
+    def TransformImage(Im, *args, **kwargs):
+        Calls.append(Im.GetPixelID())
+
+        return ResampleByTxMap(Im, *args, **kwargs)
+
+    monkeypatch.setattr(ImageTools, 'TransformImage', TransformImage)
+
+    # SimpleITK built without Elastix has no ParameterMap:
+    if not hasattr(sitk, 'ParameterMap'):
+        monkeypatch.setattr(sitk, 'ParameterMap', dict, raising=False)
+
+    LabmapIms = MakeLabmapIms(NumOfIms)
+
+    TxMap = MakeTxMap([1.6, -2.1, 2.5], LabmapIms[0])
+
+    AssertSameLabmaps(LabmapIms, TxMap)
+
+    # The labelmaps are packed into uint32 images, 24 labelmaps at a time:
+    NumOfPasses = -(-NumOfIms//24)
+
+    assert Calls[:NumOfPasses] == [sitk.sitkUInt32]*NumOfPasses
+
+
+@pytest.mark.skipif(not hasattr(sitk, 'TransformixImageFilter'),
+                    reason='SimpleITK was built without Elastix')
+def test_TransformLabmapIms_matches_separate_transforms_elastix():
+    LabmapIms = MakeLabmapIms(30)
+
+    AssertSameLabmaps(LabmapIms, MakeTxMap([1.6, -2.1, 2.5], LabmapIms[0]))
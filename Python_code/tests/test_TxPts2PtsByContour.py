@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the matrix of a registration transform parameter map
+(ImageTools.GetTxMatrixFromTxMap()) and of the transformation of contour
+points onto the Target slices (ConversionTools.TxPts2PtsByContour() and
+ClipPolygon()).
+"""
+
+
+import numpy as np
+import pytest
+import SimpleITK as sitk
+
+from SyntheticDicoms import MakeSeries
+
+
+
+
+def MakeTxMap(Tx, Transform, **Extra):
+    """ An Elastix-style transform parameter map of the SimpleITK transform
+    Tx. """
+    Map = {'Transform' : [Transform],
+           'TransformParameters' : [str(Val) for Val in Tx.GetParameters()]}
+
+    if hasattr(Tx, 'GetCenter'):
+        Map['CenterOfRotationPoint'] = [str(Val) for Val in Tx.GetCenter()]
+
+    Map.update(Extra)
+
+    return (Map,)
+
+
+def CheckTxMatrix(TxMatrix, Tx, Seed=0):
+    """ Check that TxMatrix maps points as the SimpleITK transform Tx does. """
+    Pts = np.random.default_rng(Seed).uniform(-200, 200, (20, 3))
+
+    TxPts = Pts @ TxMatrix[:3, :3].T + TxMatrix[:3, 3]
+
+    Expected = np.array([Tx.TransformPoint(Pt.tolist()) for Pt in Pts])
+
+    assert np.allclose(TxMatrix[3], [0, 0, 0, 1])
+    assert np.allclose(TxPts, Expected, atol=1e-9)
+
+
+@pytest.mark.parametrize('ComputeZYX', [True, False])
+def test_GetTxMatrixFromTxMap_Euler(ComputeZYX):
+    from ImageTools import GetTxMatrixFromTxMap
+
+    Tx = sitk.Euler3DTransform()
+    Tx.SetCenter((12.5, -30., 41.))
+    Tx.SetRotation(0.3, -0.2, 0.7)
+    Tx.SetTranslation((4., -7.5, 2.25))
+    Tx.SetComputeZYX(ComputeZYX)
+
+    TxMap = MakeTxMap(Tx, 'EulerTransform',
+                      ComputeZYX=['true' if ComputeZYX else 'false'])
+
+    CheckTxMatrix(GetTxMatrixFromTxMap(TxMap), Tx)
+
+
+def test_GetTxMatrixFromTxMap_Affine():
+    from ImageTools import GetTxMatrixFromTxMap
+
+    Rng = np.random.default_rng(1)
+
+    Tx = sitk.AffineTransform(3)
+    Tx.SetMatrix(tuple((np.eye(3) + Rng.uniform(-0.3, 0.3, (3, 3))).ravel()))
+    Tx.SetTranslation(tuple(Rng.uniform(-10, 10, 3)))
+    Tx.SetCenter(tuple(Rng.uniform(-50, 50, 3)))
+
+    CheckTxMatrix(GetTxMatrixFromTxMap(MakeTxMap(Tx, 'AffineTransform')), Tx)
+
+
+def test_GetTxMatrixFromTxMap_Translation():
+    from ImageTools import GetTxMatrixFromTxMap
+
+    Tx = sitk.TranslationTransform(3, (3., -1.5, 8.))
+
+    CheckTxMatrix(GetTxMatrixFromTxMap(MakeTxMap(Tx, 'TranslationTransform')),
+                  Tx)
+
+
+def test_GetTxMatrixFromTxMap_not_a_matrix():
+    from ImageTools import GetTxMatrixFromTxMap
+
+    Tx = sitk.TranslationTransform(3, (3., -1.5, 8.))
+
+    TxMap = MakeTxMap(Tx, 'TranslationTransform')
+
+    assert GetTxMatrixFromTxMap(TxMap + TxMap) is None
+
+    TxMap[0]['Transform'] = ['BSplineTransform']
+
+    assert GetTxMatrixFromTxMap(TxMap) is None
+
+
+def PolygonArea(Points):
+    """ The area of a planar polygon in the z = constant plane. """
+    x, y = Points[:, 0], Points[:, 1]
+
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))/2
+
+
+@pytest.mark.parametrize('Seed', range(10))
+def test_ClipPolygon_matches_shapely(Seed):
+    from shapely.geometry import MultiPoint, box
+    from ConversionTools import ClipPolygon
+
+    Rng = np.random.default_rng(Seed)
+
+    Hull = MultiPoint(Rng.uniform(-10, 10, (12, 2)).tolist()).convex_hull
+
+    Points = np.zeros((len(Hull.exterior.coords) - 1, 3))
+    Points[:, :2] = np.array(Hull.exterior.coords)[:-1]
+    Points[:, 2] = 5.
+
+    for Axis in [0, 1]:
+        for Sign in [1, -1]:
+            Limit = Rng.uniform(-5, 5)
+
+            Clipped = ClipPolygon(Points, Axis, Limit, Sign)
+
+            Bounds = [-100., -100., 100., 100.]
+            Bounds[Axis if Sign == 1 else Axis + 2] = Limit
+
+            Expected = Hull.intersection(box(*Bounds)).area
+
+            assert np.allclose(Clipped[:, 2], 5.)
+            assert np.isclose(PolygonArea(Clipped), Expected)
+
+
+def test_ClipPolygon_all_inside_or_outside():
+    from ConversionTools import ClipPolygon
+
+    Points = np.array([[0., 0., 0.], [2., 0., 0.], [2., 2., 0.], [0., 2., 0.]])
+
+    assert np.array_equal(ClipPolygon(Points, 0, -1.), Points)
+    assert ClipPolygon(Points, 0, 3.).shape == (0, 3)
+    assert ClipPolygon(Points, 1, -1., Sign=-1).shape == (0, 3)
+
+
+def GetContour(DicomDir, SliceNum):
+    """ A (concave) contour on slice SliceNum of the series in DicomDir. """
+    from ImageTools import GetSeriesGeometry
+
+    Inds = np.array([[10., 12.], [40., 10.], [45., 30.], [25., 22.],
+                     [12., 35.]])
+
+    Inds = np.column_stack([Inds, np.full(len(Inds), SliceNum),
+                            np.ones(len(Inds))])
+
+    Affine = GetSeriesGeometry(DicomDir).Affine
+
+    return (Inds @ Affine.T)[:, :3]
+
+
+@pytest.fixture
+def DicomDir(tmp_path):
+    DicomDir = str(tmp_path / 'Series')
+
+    MakeSeries(DicomDir, NumOfSlices=10, Rows=64, Columns=64)
+
+    return DicomDir
+
+
+def test_TxPts2PtsByContour_identity(DicomDir):
+    from ConversionTools import TxPts2PtsByContour, Pts2CntData
+
+    Points = GetContour(DicomDir, 4)
+
+    PtsByCnt, CntDataByCnt,\
+    CntToSliceInds = TxPts2PtsByContour(Points=Points, TxMatrix=np.eye(4),
+                                        SrcDicomDir=DicomDir,
+                                        TrgDicomDir=DicomDir)
+
+    assert CntToSliceInds == [4]
+    assert np.allclose(PtsByCnt[0], Points)
+    assert CntDataByCnt == [Pts2CntData(PtsByCnt[0])]
+
+
+def test_TxPts2PtsByContour_shift_round_trip(DicomDir):
+    from ConversionTools import TxPts2PtsByContour
+    from ImageTools import GetSeriesGeometry
+
+    Affine = GetSeriesGeometry(DicomDir).Affine
+
+    Points = GetContour(DicomDir, 4)
+
+    # The Target (fixed) to Source (moving) transform of a shift of two
+    # slices and a few pixels in-plane:
+    Shift = Affine[:3, :3] @ np.array([3., -2., 2.])
+
+    TxMatrix = np.eye(4)
+    TxMatrix[:3, 3] = -Shift
+
+    PtsByCnt, _, CntToSliceInds = TxPts2PtsByContour(Points, TxMatrix,
+                                                     DicomDir, DicomDir)
+
+    assert CntToSliceInds == [6]
+    assert np.allclose(PtsByCnt[0], Points + Shift)
+
+    PtsByCnt, _, CntToSliceInds = TxPts2PtsByContour(PtsByCnt[0],
+                                                     np.linalg.inv(TxMatrix),
+                                                     DicomDir, DicomDir)
+
+    assert CntToSliceInds == [4]
+    assert np.allclose(PtsByCnt[0], Points)
+
+
+def test_TxPts2PtsByContour_tilted_slab(DicomDir):
+    """ A contour tilted out of the plane of the slices reaches several Target
+    slices, each contour lying on its slice and within the image. """
+    from ConversionTools import TxPts2PtsByContour
+    from ImageTools import GetSeriesGeometry, GetTxMatrixFromTxMap
+
+    Geometry = GetSeriesGeometry(DicomDir)
+
+    Points = GetContour(DicomDir, 4)
+
+    Tx = sitk.Euler3DTransform()
+    Tx.SetCenter(tuple(Points.mean(axis=0)))
+    Tx.SetRotation(0.25, 0., 0.)
+
+    TxMatrix = GetTxMatrixFromTxMap(MakeTxMap(Tx, 'EulerTransform'))
+
+    PtsByCnt, _, CntToSliceInds = TxPts2PtsByContour(Points, TxMatrix,
+                                                     DicomDir, DicomDir)
+
+    assert len(CntToSliceInds) > 1
+    assert CntToSliceInds == sorted(set(CntToSliceInds))
+
+    Cols, Rows, _ = Geometry.Size
+
+    for Pts, s in zip(PtsByCnt, CntToSliceInds):
+        Inds = Pts @ Geometry.InvAffine[:3, :3].T + Geometry.InvAffine[:3, 3]
+
+        assert np.allclose(Inds[:, 2], s)
+        assert np.all((Inds[:, 0] >= -0.5 - 1e-9)
+                      & (Inds[:, 0] <= Cols - 0.5 + 1e-9))
+        assert np.all((Inds[:, 1] >= -0.5 - 1e-9)
+                      & (Inds[:, 1] <= Rows - 0.5 + 1e-9))
+
+
+def test_TxPts2PtsByContour_perpendicular_slab(DicomDir):
+    from ConversionTools import TxPts2PtsByContour
+
+    Points = GetContour(DicomDir, 4)
+
+    # A rotation of 90 degrees about the x axis:
+    TxMatrix = np.eye(4)
+    TxMatrix[1:3, 1:3] = [[0., -1.], [1., 0.]]
+
+    with pytest.raises(Exception, match='perpendicular'):
+        TxPts2PtsByContour(Points, TxMatrix, DicomDir, DicomDir)